@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+"""
+🧩 SPILLERARKETYPER MED MINI-BATCH K-MEANS
+==========================================
+Grupperer spillere i arketyper, enten over de rolle-vektede FIFA-matrisene
+(samme standardisering og vekter som search_players) eller over stilfeatures
+fra StatsBomb-statistikken.
+
+Sentroidene oppdateres strømmende med mini-batcher (partial_fit): hver
+sentroid er det løpende gjennomsnittet av punktene den har fått tildelt,
+med antallet lagret, slik at treningen kan fortsette etter save()/load().
+Tildelingene per spiller caches, så "samme arketype som X" er bare et
+oppslag, og nye spillere tildeles eksisterende arketyper inkrementelt.
+"""
+
+import numpy as np
+import pandas as pd
+
+# Tellinger fra StatsBomb-statistikken som gjøres om til per 90 minutter
+STYLE_COUNTS = [
+    'passes_attempted', 'key_passes', 'crosses_attempted', 'shots_total', 'dribbles_attempted',
+    'tackles_attempted', 'interceptions', 'clearances', 'pressure_events', 'ball_recoveries',
+    'ball_receipts', 'headers'
+]
+# Andeler og posisjoner som brukes direkte
+STYLE_RATES = ['pass_completion_rate', 'long_pass_share', 'forward_pass_share', 'avg_position_x', 'avg_position_y']
+# Pasningsnettverk og xT (statsbomb/pass_network.py, expected_threat.py), brukt når kolonnene finnes:
+# vektet ut-/inn-grad per 90, andeler og sentralitet direkte
+STYLE_NETWORK_COUNTS = ['network_out_degree', 'network_in_degree']
+STYLE_NETWORK_RATES = ['network_pass_share', 'network_eigenvector', 'network_betweenness', 'xt_per_90']
+
+ARCHETYPES_PATH = 'data/archetypes_{source}.npz'
+
+
+def style_features(stats_df, min_minutes=450):
+    """
+    Stilfeatures per spiller fra generate_player_stats.py-utdata
+
+    Eldre statistikkfiler uten spilletid (minutes_played = 0) faller tilbake
+    til 90 minutter per kamp. Nettverks- og xT-kolonnene tas med når filen har dem.
+
+    Args:
+        stats_df (pd.DataFrame): Spillerstatistikk (én rad per spiller)
+        min_minutes (int): Spillere med færre minutter utelates
+
+    Returns:
+        pd.DataFrame: player_name + STYLE_COUNTS (per 90) + STYLE_RATES, og de
+            STYLE_NETWORK_COUNTS (per 90) og STYLE_NETWORK_RATES som finnes
+    """
+    minutes = stats_df.get('minutes_played', pd.Series(0, index=stats_df.index))
+    minutes = minutes.where(minutes > 0, stats_df['matches_played'] * 90)
+    stats = stats_df[minutes >= min_minutes]
+    per_90 = 90.0 / minutes[minutes >= min_minutes].to_numpy(dtype=float)
+    passes = stats['passes_attempted'].replace(0, np.nan)
+
+    features = pd.DataFrame({'player_name': stats['player_name'].to_numpy()})
+    for column in STYLE_COUNTS:
+        features[f'{column}_per_90'] = stats[column].to_numpy(dtype=float) * per_90
+    features['pass_completion_rate'] = stats['pass_completion_rate'].to_numpy(dtype=float)
+    features['long_pass_share'] = (stats['long_passes'] / passes).fillna(0).to_numpy()
+    features['forward_pass_share'] = (stats['forward_passes'] / passes).fillna(0).to_numpy()
+    features['avg_position_x'] = stats['avg_position_x'].to_numpy(dtype=float)
+    features['avg_position_y'] = stats['avg_position_y'].to_numpy(dtype=float)
+    for column in STYLE_NETWORK_COUNTS:
+        if column in stats.columns:
+            features[f'{column}_per_90'] = stats[column].to_numpy(dtype=float) * per_90
+    for column in STYLE_NETWORK_RATES:
+        if column in stats.columns:
+            features[column] = stats[column].to_numpy(dtype=float)
+    return features.dropna().reset_index(drop=True)
+
+
+def _nearest(X, centroids, centroid_sq_norms):
+    """Nærmeste sentroid og kvadrert avstand for hver rad (via normidentiteten)"""
+    sq_distances = centroid_sq_norms[None, :] - 2.0 * (X @ centroids.T)
+    labels = sq_distances.argmin(axis=1)
+    best = sq_distances[np.arange(len(X)), labels] + np.einsum('ij,ij->i', X, X)
+    return labels, np.maximum(best, 0.0)
+
+
+def _kmeans_plus_plus(X, n_clusters, rng):
+    """k-means++-initialisering på den første mini-batchen"""
+    centroids = [X[rng.integers(len(X))]]
+    closest = ((X - centroids[0]) ** 2).sum(axis=1)
+    for _ in range(1, n_clusters):
+        probabilities = closest / closest.sum() if closest.sum() > 0 else None
+        centroids.append(X[rng.choice(len(X), p=probabilities)])
+        closest = np.minimum(closest, ((X - centroids[-1]) ** 2).sum(axis=1))
+    return np.array(centroids)
+
+
+class Archetypes:
+    """
+    Arketyper (sentroider) og cachede tildelinger per spiller
+
+    Args:
+        features (list): Feature-navn
+        mean, scale (np.ndarray): Standardisering av rå features (som StandardScaler)
+        weights (np.ndarray): Vekt per feature etter standardisering (rolleprofil)
+        n_clusters (int): Antall arketyper
+        random_state (int): Frø for initialiseringen
+    """
+
+    def __init__(self, features, mean, scale, weights=None, n_clusters=8, random_state=0):
+        self.features = list(features)
+        self.mean = np.asarray(mean, dtype=np.float64)
+        self.scale = np.asarray(scale, dtype=np.float64)
+        self.weights = np.ones(len(self.features)) if weights is None else np.asarray(weights, dtype=np.float64)
+        self.n_clusters = n_clusters
+        self.rng = np.random.default_rng(random_state)
+
+        self.centroids = None
+        self.counts = np.zeros(n_clusters, dtype=np.int64)
+        self.players = pd.Index([], dtype=object)
+        self.labels = np.empty(0, dtype=np.int64)
+        self.distances = np.empty(0)
+
+    def transform(self, frame):
+        """Rå features -> standardisert og vektet matrise"""
+        X = frame[self.features].to_numpy(dtype=np.float64)
+        return (X - self.mean) / self.scale * self.weights
+
+    def partial_fit(self, X):
+        """
+        Oppdater sentroidene med én mini-batch (allerede transformert)
+
+        Hver sentroid blir det løpende gjennomsnittet av alle punkter den har
+        fått tildelt, dvs. per-punkt-læringsrate 1/antall som i mini-batch k-means.
+        """
+        if self.centroids is None:
+            self.centroids = _kmeans_plus_plus(X, self.n_clusters, self.rng)
+
+        labels, _ = _nearest(X, self.centroids, (self.centroids ** 2).sum(axis=1))
+        batch_counts = np.bincount(labels, minlength=self.n_clusters)
+        batch_sums = np.zeros_like(self.centroids)
+        np.add.at(batch_sums, labels, X)
+
+        updated = batch_counts > 0
+        totals = self.counts[updated] + batch_counts[updated]
+        self.centroids[updated] = (self.centroids[updated] * self.counts[updated, None]
+                                   + batch_sums[updated]) / totals[:, None]
+        self.counts[updated] = totals
+        return self
+
+    def fit(self, frame, batch_size=1024, n_epochs=3, name_column='short_name'):
+        """
+        Tren arketypene strømmende over stokkede mini-batcher og cache tildelingene
+
+        Args:
+            frame (pd.DataFrame): Spillere med name_column og alle features
+            batch_size (int): Spillere per mini-batch
+            n_epochs (int): Antall passeringer over dataene
+        """
+        X = self.transform(frame)
+        if len(X) < self.n_clusters:
+            raise ValueError(f"Trenger minst {self.n_clusters} spillere, fikk {len(X)}")
+        for _ in range(n_epochs):
+            order = self.rng.permutation(len(X))
+            for start in range(0, len(X), batch_size):
+                self.partial_fit(X[order[start:start + batch_size]])
+
+        self.players = pd.Index([], dtype=object)
+        self.labels = np.empty(0, dtype=np.int64)
+        self.distances = np.empty(0)
+        self.assign(frame, name_column=name_column)
+        return self
+
+    def assign(self, frame, name_column='short_name'):
+        """
+        Tildel spillere til eksisterende arketyper uten å endre sentroidene
+
+        Spillere som allerede er tildelt beholder sin arketype; nye spillere
+        legges til i cachen.
+
+        Returns:
+            np.ndarray: Arketype per rad i frame
+        """
+        labels, distances = _nearest(self.transform(frame), self.centroids, (self.centroids ** 2).sum(axis=1))
+        names = frame[name_column].to_numpy()
+
+        known = self.players.get_indexer(names)
+        new = (known < 0) & ~pd.Index(names).duplicated()
+        self.players = self.players.append(pd.Index(names[new]))
+        self.labels = np.concatenate([self.labels, labels[new]])
+        self.distances = np.concatenate([self.distances, np.sqrt(distances[new])])
+
+        positions = self.players.get_indexer(names)
+        return self.labels[positions]
+
+    def archetype_of(self, player_name):
+        """Arketype for en spiller fra cachen"""
+        position = self.players.get_indexer([player_name])[0]
+        if position < 0:
+            raise ValueError(f"{player_name} har ingen arketype (bruk assign() for nye spillere)")
+        return int(self.labels[position])
+
+    def same_archetype(self, player_name, top_n=None):
+        """
+        Spillere i samme arketype som player_name, nærmest sentroiden først
+
+        Leser bare de cachede tildelingene; ingen avstander regnes ut på nytt.
+        """
+        label = self.archetype_of(player_name)
+        members = np.flatnonzero((self.labels == label) & (self.players != player_name))
+        members = members[np.argsort(self.distances[members], kind='stable')][:top_n]
+        return pd.DataFrame({'player_name': self.players[members], 'archetype': label,
+                             'centroid_distance': self.distances[members]})
+
+    def summary(self):
+        """Antall spillere og sentroid (i standardiserte enheter) per arketype"""
+        sizes = np.bincount(self.labels, minlength=self.n_clusters)
+        centroids = self.centroids / np.where(self.weights != 0, self.weights, 1.0)
+        table = pd.DataFrame(centroids, columns=self.features)
+        table.insert(0, 'players', sizes)
+        return table
+
+    def save(self, filename):
+        """Lagre sentroider, tellinger og tildelinger som en komprimert .npz-fil"""
+        np.savez_compressed(filename, features=np.array(self.features), mean=self.mean, scale=self.scale,
+                            weights=self.weights, centroids=self.centroids, counts=self.counts,
+                            players=self.players.to_numpy(dtype=str), labels=self.labels,
+                            distances=self.distances)
+
+    @classmethod
+    def load(cls, filename, random_state=0):
+        """Last inn arketyper lagret med save()"""
+        with np.load(filename) as data:
+            archetypes = cls(list(data['features']), data['mean'], data['scale'], data['weights'],
+                             n_clusters=len(data['centroids']), random_state=random_state)
+            archetypes.centroids = data['centroids'].copy()
+            archetypes.counts = data['counts'].copy()
+            archetypes.players = pd.Index(data['players'].astype(object))
+            archetypes.labels = data['labels'].copy()
+            archetypes.distances = data['distances'].copy()
+        return archetypes
+
+
+def _standardization(frame, features):
+    values = frame[features].to_numpy(dtype=np.float64)
+    scale = values.std(axis=0)
+    return values.mean(axis=0), np.where(scale > 0, scale, 1.0)
+
+
+def role_archetypes(player_role, n_clusters=8, weights=None, **fit_kwargs):
+    """
+    Arketyper over den rolle-vektede FIFA-matrisen (samme pool og vekter som search_players)
+
+    Kjøres fra rotmappen (trenger search_functions og data/).
+    """
+    from search_functions.unified_search import build_search_index, resolve_weights, role_group
+
+    pool_df, feature_list, _ = build_search_index(role_group(player_role))
+    weights_dict = resolve_weights(player_role, weights)
+    weight_vector = None if not weights_dict else [weights_dict.get(f, 0.0) for f in feature_list]
+
+    mean, scale = _standardization(pool_df, feature_list)
+    archetypes = Archetypes(feature_list, mean, scale, weight_vector, n_clusters=n_clusters)
+    return archetypes.fit(pool_df, name_column='short_name', **fit_kwargs)
+
+
+def style_archetypes(stats_df, n_clusters=8, min_minutes=450, **fit_kwargs):
+    """Arketyper over stilfeatures fra StatsBomb-statistikken"""
+    features_df = style_features(stats_df, min_minutes=min_minutes)
+    features = [column for column in features_df.columns if column != 'player_name']
+
+    mean, scale = _standardization(features_df, features)
+    archetypes = Archetypes(features, mean, scale, n_clusters=n_clusters)
+    return archetypes.fit(features_df, name_column='player_name', **fit_kwargs)
+
+
+def main():
+    """
+    Bygg stilarketyper fra StatsBomb-statistikken og vis arketypen til en spiller
+
+    Kjøres fra rotmappen: python3 -m advanced_similarity.archetypes "Mesut Özil"
+    """
+    import sys
+
+    player = sys.argv[1] if len(sys.argv) > 1 else 'Mesut Özil'
+    stats_file = sys.argv[2] if len(sys.argv) > 2 else 'data/pl_2015_2016_player_stats_full_20250910_181721.csv'
+
+    print("🧩 Spillerarketyper (mini-batch k-means)")
+    print("=" * 50)
+
+    archetypes = style_archetypes(pd.read_csv(stats_file), batch_size=128)
+    filename = ARCHETYPES_PATH.format(source='style')
+    archetypes.save(filename)
+    print(f"✅ {len(archetypes.players)} spillere i {archetypes.n_clusters} arketyper, lagret i {filename}")
+    print(archetypes.summary()[['players']].T)
+
+    print(f"\nSpillere i samme arketype som {player}:")
+    print(Archetypes.load(filename).same_archetype(player, top_n=10))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+🧬 EVOLUSJONÆR OPTIMALISERING AV FEATURE-VEKTER
+===============================================
+Genetisk algoritme som utvikler vekter for rolleprofilene (role_profiles)
+mot ekspertmerkede par av like spillere.
+
+Fitness for en hel populasjon regnes ut i én batch: for alle kandidatvekter
+og alle merkede spørringer beregnes vektet cosine similarity mot alle
+spillere som ett tensorprodukt (populasjon x spørringer x spillere), og
+rangen til fasitspilleren gir mean reciprocal rank (MRR). Store populasjoner
+kan deles på flere prosesser.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+# Maks antall elementer i én (populasjon x spørringer x spillere)-blokk
+_BLOCK_ELEMENTS = 8_000_000
+
+# Data som deles med arbeidsprosessene (settes av _init_worker)
+_worker_data = {}
+
+
+def load_similar_pairs(filename, names):
+    """
+    Last inn ekspertmerkede par (kolonnene 'player' og 'similar_player')
+
+    Args:
+        filename (str): CSV-fil med par av like spillere
+        names (array-like): Spillernavn i samme rekkefølge som feature-matrisen
+
+    Returns:
+        tuple: (queries, targets) som indekser i feature-matrisen
+    """
+    pairs = pd.read_csv(filename)
+    # Første forekomst vinner ved like navn, som i search_players
+    positions = pd.Series(np.arange(len(names)), index=pd.Index(names))
+    positions = positions[~positions.index.duplicated()]
+    queries = positions.reindex(pairs['player']).fillna(-1).astype(int).to_numpy()
+    targets = positions.reindex(pairs['similar_player']).fillna(-1).astype(int).to_numpy()
+
+    known = (queries >= 0) & (targets >= 0)
+    if not known.all():
+        missing = pairs.loc[~known, ['player', 'similar_player']].to_records(index=False).tolist()
+        print(f"⚠️ Hopper over {len(missing)} par med ukjente spillere: {missing[:5]}")
+    return queries[known], targets[known]
+
+
+def population_fitness(X, queries, targets, population, X_sq=None):
+    """
+    Fitness (MRR) for en hel populasjon av vektvektorer i én batch
+
+    For hver kandidat w er likheten cos(w * x_q, w * x_n). Radnormene for
+    alle kandidater er ett matriseprodukt X^2 @ (w^2)^T; deretter normeres
+    spørringene og spillerne per kandidat, slik at likhetene for en blokk av
+    kandidater er ett batch-matriseprodukt (kandidater x spørringer x spillere)
+    uten divisjon over den store tensoren.
+
+    Args:
+        X (np.ndarray): Standardisert feature-matrise (spillere x features)
+        queries (np.ndarray): Indeks for spørrespilleren i hvert par
+        targets (np.ndarray): Indeks for fasitspilleren i hvert par
+        population (np.ndarray): Vektvektorer (kandidater x features)
+        X_sq (np.ndarray): Valgfri forhåndsberegnet X**2
+
+    Returns:
+        np.ndarray: Mean reciprocal rank per kandidat (1.0 = fasit alltid øverst)
+    """
+    X = np.asarray(X, dtype=np.float32)
+    X_sq = X * X if X_sq is None else X_sq
+    population = np.asarray(population, dtype=np.float32)
+    n_candidates, n_queries, n_players = len(population), len(queries), len(X)
+
+    row_norms = np.sqrt(X_sq @ (population * population).T).T          # (p, n)
+    inverse_norms = np.divide(1.0, row_norms, out=np.zeros_like(row_norms), where=row_norms > 0)
+    query_rows = np.arange(n_queries)
+
+    fitness = np.empty(n_candidates)
+    block = max(1, _BLOCK_ELEMENTS // max(n_queries * n_players, 1))
+    for start in range(0, n_candidates, block):
+        stop = min(start + block, n_candidates)
+        weights = population[start:stop, None, :]                                   # (b, 1, d)
+        players = X[None, :, :] * weights * inverse_norms[start:stop, :, None]      # (b, n, d)
+        similarities = players[:, queries, :] @ players.transpose(0, 2, 1)          # (b, m, n)
+
+        # Spørrespilleren selv skal ikke telle i rangeringen
+        similarities[:, query_rows, queries] = -np.inf
+        target_similarity = similarities[:, query_rows, targets]
+        ranks = (similarities > target_similarity[:, :, None]).sum(axis=2) + 1
+        fitness[start:stop] = (1.0 / ranks).mean(axis=1)
+
+    return fitness
+
+
+def _init_worker(X, queries, targets):
+    _worker_data.update(X=X, X_sq=X * X, queries=queries, targets=targets)
+
+
+def _worker_fitness(population):
+    return population_fitness(_worker_data['X'], _worker_data['queries'], _worker_data['targets'],
+                              population, X_sq=_worker_data['X_sq'])
+
+
+def _normalize(population):
+    """Vekter er ikke-negative og summerer til 1, som i role_profiles"""
+    population = np.clip(population, 0.0, None)
+    totals = population.sum(axis=1, keepdims=True)
+    return np.divide(population, totals, out=np.full_like(population, 1.0 / population.shape[1]),
+                     where=totals > 0)
+
+
+def evolve_weights(X, queries, targets, feature_names, initial_weights=None, population_size=64,
+                   generations=200, elite=4, tournament_size=3, mutation_rate=0.2, mutation_scale=0.05,
+                   n_jobs=1, random_state=0, verbose=True):
+    """
+    Utvikle feature-vekter med en genetisk algoritme
+
+    Turneringsseleksjon, blend-crossover (BLX-0.5), gaussisk mutasjon og
+    elitisme. Hele populasjonen evalueres i én batch per generasjon.
+
+    Args:
+        X (np.ndarray): Standardisert feature-matrise (spillere x features)
+        queries, targets (np.ndarray): Ekspertmerkede par (indekser i X)
+        feature_names (list): Navn på kolonnene i X
+        initial_weights (dict): Startprofil, f.eks. role_profiles['cam'] (seedes inn i populasjonen)
+        population_size (int): Antall kandidater per generasjon
+        generations (int): Antall generasjoner
+        elite (int): Antall beste kandidater som overlever uendret
+        tournament_size (int): Kandidater per turnering
+        mutation_rate (float): Sannsynlighet for mutasjon per gen
+        mutation_scale (float): Standardavvik for gaussisk mutasjon
+        n_jobs (int): Antall prosesser for fitness-evaluering (1 = i denne prosessen)
+        random_state (int): Frø for tilfeldighetsgeneratoren
+        verbose (bool): Skriv ut fremdrift
+
+    Returns:
+        tuple: (beste vekter som dict, historikk som DataFrame med beste og gjennomsnittlig fitness)
+    """
+    rng = np.random.default_rng(random_state)
+    X = np.asarray(X, dtype=np.float32)
+    queries, targets = np.asarray(queries), np.asarray(targets)
+    n_features = X.shape[1]
+
+    population = _normalize(rng.random((population_size, n_features)))
+    if initial_weights:
+        population[0] = _normalize(np.array([[initial_weights.get(f, 0.0) for f in feature_names]]))[0]
+
+    executor = None
+    if n_jobs > 1:
+        executor = ProcessPoolExecutor(max_workers=n_jobs, initializer=_init_worker,
+                                       initargs=(X, queries, targets))
+    X_sq = X * X
+
+    def evaluate(candidates):
+        if executor is None:
+            return population_fitness(X, queries, targets, candidates, X_sq=X_sq)
+        chunks = np.array_split(candidates, n_jobs)
+        return np.concatenate(list(executor.map(_worker_fitness, chunks)))
+
+    history = []
+    try:
+        fitness = evaluate(population)
+        for generation in range(1, generations + 1):
+            order = np.argsort(fitness)[::-1]
+            n_children = population_size - elite
+
+            # Turneringsseleksjon av foreldrepar
+            contestants = rng.integers(0, population_size, size=(2, n_children, tournament_size))
+            winners = np.take_along_axis(contestants, np.argmax(fitness[contestants], axis=2)[..., None], axis=2)
+            mothers, fathers = population[winners[0, :, 0]], population[winners[1, :, 0]]
+
+            # BLX-0.5 crossover og gaussisk mutasjon
+            low, high = np.minimum(mothers, fathers), np.maximum(mothers, fathers)
+            spread = high - low
+            children = rng.uniform(low - 0.5 * spread, high + 0.5 * spread)
+            mutate = rng.random(children.shape) < mutation_rate
+            children += mutate * rng.normal(0.0, mutation_scale, children.shape)
+
+            population = np.vstack([population[order[:elite]], _normalize(children)])
+            fitness = np.concatenate([fitness[order[:elite]], evaluate(population[elite:])])
+
+            history.append((generation, fitness.max(), fitness.mean()))
+            if verbose and (generation % 20 == 0 or generation == 1):
+                print(f"Generasjon {generation}: beste MRR {fitness.max():.4f}, snitt {fitness.mean():.4f}")
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    best = population[np.argmax(fitness)]
+    best_weights = {name: round(float(w), 4) for name, w in zip(feature_names, best)}
+    return best_weights, pd.DataFrame(history, columns=['generation', 'best_fitness', 'mean_fitness'])
+
+
+def main():
+    """
+    Utvikle vekter for en rolle fra en CSV med ekspertmerkede par
+
+    Kjøres fra rotmappen: python3 -m advanced_similarity.evolutionary_features cam data/similar_pairs.csv
+    """
+    import sys
+    from search_functions.role_profiles import role_profiles
+    from search_functions.unified_search import build_search_index, role_group
+
+    role = sys.argv[1] if len(sys.argv) > 1 else 'cam'
+    pairs_file = sys.argv[2] if len(sys.argv) > 2 else 'data/similar_pairs.csv'
+
+    print("🧬 Evolusjonær optimalisering av feature-vekter")
+    print("=" * 50)
+
+    pool_df, feature_names, index = build_search_index(role_group(role))
+    queries, targets = load_similar_pairs(pairs_file, pool_df['short_name'])
+    print(f"📊 {len(pool_df):,} spillere, {len(queries)} merkede par")
+
+    # Samme startvektor som evolve_weights: features utenfor profilen får 0 (uten profil, som gk: like vekter)
+    start_weights = role_profiles.get(role)
+    if start_weights is None:
+        start_vector = np.ones(len(feature_names))
+    else:
+        start_vector = np.array([start_weights.get(f, 0.0) for f in feature_names])
+    start_fitness = population_fitness(index.X, queries, targets, start_vector[None, :])[0]
+    print(f"Startprofil '{role}': MRR {start_fitness:.4f}")
+
+    best_weights, history = evolve_weights(index.X, queries, targets, feature_names,
+                                           initial_weights=start_weights)
+    print(f"\n✅ Beste MRR: {history['best_fitness'].iloc[-1]:.4f}")
+    print({name: weight for name, weight in best_weights.items() if weight > 0.005})
+
+
+if __name__ == "__main__":
+    main()
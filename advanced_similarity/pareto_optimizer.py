@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+📈 PARETO-FRONTER FOR PRIS, KVALITET OG LIKHET
+==============================================
+Rask ikke-dominert sortering (alle mål minimeres internt):
+
+- 2 mål: sortering på første mål + binærsøk over frontenes siste verdi,
+  O(n log n)
+- 3 mål: samme sveip, der hver front holder en 2-D "trapp" av de to
+  siste målene, slik at dominanssjekken er et binærsøk, O(n log n log F)
+- 4+ mål: rank som lengste dominanskjede, med vektorisert dominanssjekk
+  blokk for blokk mot alle tidligere punkter
+
+Crowding distance regnes ut for alle fronter samtidig. nsga2_select()
+kombinerer de to og kan brukes som seleksjonskjerne i en NSGA-II-løkke.
+"""
+
+from bisect import bisect_right
+
+import numpy as np
+
+
+def _unique_rows(objectives):
+    """Slå sammen identiske punkter (de havner alltid i samme front)"""
+    unique, inverse = np.unique(objectives, axis=0, return_inverse=True)
+    return unique, inverse.ravel()
+
+
+def _sort_two_objectives(points):
+    """Fronter for 2 mål; punktene er unike og sortert leksikografisk"""
+    last_values = []   # siste (minste) verdi av mål 2 i hver front, stigende over frontene
+    ranks = np.empty(len(points), dtype=np.int64)
+    for i, value in enumerate(points[:, 1].tolist()):
+        front = bisect_right(last_values, value)
+        if front == len(last_values):
+            last_values.append(value)
+        else:
+            last_values[front] = value
+        ranks[i] = front
+    return ranks
+
+
+def _sort_three_objectives(points):
+    """Fronter for 3 mål; hver front har en trapp (mål 2 stigende, mål 3 fallende)"""
+    stair_keys, stair_values = [], []
+    ranks = np.empty(len(points), dtype=np.int64)
+
+    for i, (b, c) in enumerate(zip(points[:, 1].tolist(), points[:, 2].tolist())):
+        # Første front der ingen punkter har mål 2 <= b og mål 3 <= c
+        low, high = 0, len(stair_keys)
+        while low < high:
+            middle = (low + high) // 2
+            j = bisect_right(stair_keys[middle], b) - 1
+            if j >= 0 and stair_values[middle][j] <= c:
+                low = middle + 1
+            else:
+                high = middle
+
+        if low == len(stair_keys):
+            stair_keys.append([b])
+            stair_values.append([c])
+        else:
+            keys, values = stair_keys[low], stair_values[low]
+            start = bisect_right(keys, b)
+            stop = start
+            while stop < len(keys) and values[stop] >= c:
+                stop += 1
+            keys[start:stop] = [b]
+            values[start:stop] = [c]
+        ranks[i] = low
+
+    return ranks
+
+
+def _sort_many_objectives(points, block=256):
+    """
+    Fronter for 4+ mål; punktene er unike og sortert leksikografisk
+
+    Bare tidligere punkter kan dominere et punkt, og fronten er lengden av
+    den lengste dominanskjeden: rank[i] = 1 + maks rank blant dominantene.
+    Dominans mot alle tidligere blokker sjekkes vektorisert per blokk (på
+    kompakte heltallsranger per mål), og bare avhengighetene inne i blokken
+    løses sekvensielt.
+    """
+    n, n_objectives = points.shape
+    compact = np.min_scalar_type(n + 1)
+    levels = np.empty((n_objectives, n), dtype=compact)
+    for m in range(n_objectives):
+        levels[m] = np.unique(points[:, m], return_inverse=True)[1].ravel()
+
+    ranks = np.empty(n, dtype=np.int64)
+    depth = np.empty(n, dtype=compact)   # rank + 1, så 0 betyr ingen dominant
+    for start in range(0, n, block):
+        stop = min(start + block, n)
+        best = np.full(stop - start, -1, dtype=np.int64)
+
+        if start:
+            dominated = levels[0, None, :start] <= levels[0, start:stop, None]
+            for m in range(1, n_objectives):
+                dominated &= levels[m, None, :start] <= levels[m, start:stop, None]
+            best = (dominated * depth[None, :start]).max(axis=1).astype(np.int64) - 1
+
+        inner = levels[0, None, start:stop] <= levels[0, start:stop, None]
+        for m in range(1, n_objectives):
+            inner &= levels[m, None, start:stop] <= levels[m, start:stop, None]
+        for i in range(stop - start):
+            dominating = np.flatnonzero(inner[i, :i])
+            if len(dominating):
+                best[i] = max(best[i], ranks[start + dominating].max())
+            ranks[start + i] = best[i] + 1
+        depth[start:stop] = ranks[start:stop] + 1
+
+    return ranks
+
+
+def non_dominated_sort(objectives):
+    """
+    Ikke-dominert sortering (alle mål minimeres)
+
+    Args:
+        objectives (np.ndarray): Målverdier (kandidater x mål)
+
+    Returns:
+        np.ndarray: Front-nummer per kandidat (0 = Pareto-optimal)
+    """
+    objectives = np.asarray(objectives, dtype=np.float64)
+    if objectives.ndim != 2 or objectives.shape[1] < 2:
+        raise ValueError("Trenger minst to mål (kandidater x mål)")
+    if len(objectives) == 0:
+        return np.empty(0, dtype=np.int64)
+
+    points, inverse = _unique_rows(objectives)   # np.unique sorterer leksikografisk
+    if points.shape[1] == 2:
+        ranks = _sort_two_objectives(points)
+    elif points.shape[1] == 3:
+        ranks = _sort_three_objectives(points)
+    else:
+        ranks = _sort_many_objectives(points)
+    return ranks[inverse]
+
+
+def crowding_distance(objectives, ranks):
+    """
+    Crowding distance for alle fronter samtidig
+
+    Args:
+        objectives (np.ndarray): Målverdier (kandidater x mål)
+        ranks (np.ndarray): Front-nummer per kandidat fra non_dominated_sort()
+
+    Returns:
+        np.ndarray: Crowding distance per kandidat (inf for endepunktene i hver front)
+    """
+    objectives = np.asarray(objectives, dtype=np.float64)
+    n, n_objectives = objectives.shape
+    distance = np.zeros(n)
+
+    for m in range(n_objectives):
+        order = np.lexsort((objectives[:, m], ranks))
+        values, fronts = objectives[order, m], ranks[order]
+
+        first = np.r_[True, fronts[1:] != fronts[:-1]]
+        last = np.r_[fronts[1:] != fronts[:-1], True]
+
+        # Spennvidde per front for normalisering
+        front_ids = np.cumsum(first) - 1
+        span = (values[last] - values[first])[front_ids]
+
+        gap = np.zeros(n)
+        inner = ~first & ~last
+        gap[inner] = (values[2:] - values[:-2])[inner[1:-1]]
+        gap = np.divide(gap, span, out=np.zeros(n), where=span > 0)
+        gap[first | last] = np.inf
+        distance[order] += gap
+
+    return distance
+
+
+def nsga2_select(objectives, k):
+    """
+    NSGA-II-seleksjon: velg k kandidater etter front og deretter crowding distance
+
+    Returns:
+        np.ndarray: Indekser for de k valgte kandidatene
+    """
+    ranks = non_dominated_sort(objectives)
+    crowding = crowding_distance(objectives, ranks)
+    return np.lexsort((-crowding, ranks))[:k]
+
+
+def pareto_fronts(candidates, objectives):
+    """
+    Rangerte Pareto-fronter og crowding distance for en kandidattabell
+
+    Args:
+        candidates (pd.DataFrame): Kandidater med én kolonne per mål
+        objectives (dict): Kolonne -> 'min' eller 'max', f.eks.
+            {'value_eur': 'min', 'overall': 'max', 'similarity': 'max'}
+
+    Returns:
+        pd.DataFrame: Kandidatene med 'pareto_rank' og 'crowding_distance',
+            sortert etter front og deretter crowding distance
+    """
+    for column, direction in objectives.items():
+        if direction not in ('min', 'max'):
+            raise ValueError(f"Ukjent retning for '{column}': '{direction}' (bruk 'min' eller 'max')")
+
+    signs = np.array([1.0 if direction == 'min' else -1.0 for direction in objectives.values()])
+    values = candidates[list(objectives)].to_numpy(dtype=np.float64) * signs
+
+    result = candidates.copy()
+    result['pareto_rank'] = non_dominated_sort(values)
+    result['crowding_distance'] = crowding_distance(values, result['pareto_rank'].to_numpy())
+    return result.sort_values(['pareto_rank', 'crowding_distance'], ascending=[True, False])
+
+
+def pareto_search(player_name, player_role, objectives=None, metric="cosine", weights=None):
+    """
+    Pareto-fronter over hele kandidatpoolen for et søk etter like spillere
+
+    Likheten til målspilleren regnes ut mot alle spillere i poolen med den
+    samme cachede indeksen som search_players, og kombineres med pris og
+    kvalitet. Kjøres fra rotmappen (trenger search_functions og data/).
+
+    Args:
+        player_name (str): Målspilleren ('short_name')
+        player_role (str): Rolle i role_profiles, f.eks. 'cam'
+        objectives (dict): Mål og retning (standard: billig, god og lik)
+        metric (str): Avstandsmål; 'similarity' for cosine, ellers 'distance' (som i search_players)
+        weights (dict): Valgfrie vekter på toppen av rolleprofilen
+
+    Returns:
+        pd.DataFrame: Alle kandidater med pareto_rank og crowding_distance
+    """
+    from search_functions.unified_search import build_search_index, resolve_weights, role_group
+
+    score = 'similarity' if metric == "cosine" else 'distance'
+    if objectives is None:
+        objectives = {'value_eur': 'min', 'overall': 'max', score: 'max' if score == 'similarity' else 'min'}
+
+    pool_df, feature_list, index = build_search_index(role_group(player_role))
+    positions = np.flatnonzero(pool_df['short_name'].to_numpy() == player_name)
+    if len(positions) == 0:
+        raise ValueError(f"{player_name} finnes ikke i datasettet.")
+
+    weights_dict = resolve_weights(player_role, weights)
+    weight_vector = None if not weights_dict else np.array([weights_dict.get(f, 0.0) for f in feature_list])
+    distances = index.distances(positions[0], metric=metric, weights=weight_vector)
+
+    candidates = pool_df.assign(**{score: 1.0 - distances if metric == "cosine" else distances})
+    candidates = candidates.drop(candidates.index[positions])
+    return pareto_fronts(candidates, objectives)
+
+
+if __name__ == "__main__":
+    import sys
+
+    player = sys.argv[1] if len(sys.argv) > 1 else "K. De Bruyne"
+    role = sys.argv[2] if len(sys.argv) > 2 else "cam"
+
+    fronts = pareto_search(player, role)
+    print(f"📈 Pareto-front for alternativer til {player} ({role}):")
+    print(fronts[fronts['pareto_rank'] == 0][['short_name', 'value_eur', 'overall', 'similarity']])
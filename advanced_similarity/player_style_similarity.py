@@ -10,9 +10,6 @@ Fokus på bevegelsesmønstre, pasningsstil og ball-bruk.
 
 import pandas as pd
 import numpy as np
-from sklearn.preprocessing import StandardScaler
-from sklearn.metrics.pairwise import cosine_similarity
-import matplotlib.pyplot as plt
 
 def load_player_data():
     """
@@ -0,0 +1,152 @@
+# edition_benchmark.py
+"""
+Benchmark the multi-edition store (search_functions/edition_store.py) on synthetic FIFA 15-22 editions.
+
+For each population size it writes eight players_<edition>.csv files,
+loads them into an EditionStore and reports load time, store memory next to
+the memory of eight independent DataFrames (what eight unified_search
+datasets would hold), and the latency of cross-edition queries (one target
+edition, and all editions in one pass).
+
+With --trajectories, career-trajectory search (trajectory_search.py) is
+measured on that many synthetic players, generated in memory: build time,
+query latency for banded DTW with LB_Keogh pruning and for age-aligned L2,
+and the share of candidates the lower bound pruned.
+
+    python -m benchmarks.edition_benchmark
+    python -m benchmarks.edition_benchmark --players 20000,200000 --output editions.json
+    python -m benchmarks.edition_benchmark --players 20000 --trajectories 1000000
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.search_benchmark import latency_summary
+
+DEFAULT_PLAYERS = (20_000, 200_000)
+
+
+def run_size(n_players, queries, seed):
+    import pandas as pd
+
+    from benchmarks.synthetic_players import EDITIONS, write_editions
+    from search_functions.edition_store import EditionStore
+    from search_functions.positions import POSITION_BITS
+
+    records = []
+    with tempfile.TemporaryDirectory(prefix="edition_benchmark_") as workdir:
+        paths = write_editions(n_players, workdir, seed=seed)
+
+        # One frame at a time: only the sizes are needed
+        frames_mb = sum(pd.read_csv(path, low_memory=False).memory_usage(deep=True).sum() for path in paths.values())
+        frames_mb /= 1024 ** 2
+
+        start = time.perf_counter()
+        store = EditionStore.load(EDITIONS, os.path.join(workdir, "players_{edition}.csv"))
+        load_s = time.perf_counter() - start
+        records.append({"players": n_players, "scenario": "load", "seconds": round(load_s, 3),
+                        "store_mb": round(store.nbytes / 1024 ** 2, 2), "frames_mb": round(frames_mb, 2),
+                        "rows": sum(len(e) for e in store.editions.values())})
+
+        rng = np.random.default_rng(seed)
+        first, last = EDITIONS[0], EDITIONS[-1]
+        outfield = np.flatnonzero((store.editions[first].masks & POSITION_BITS["GK"]) == 0)
+        query_ids = store.ids[store.editions[first].rows[rng.choice(outfield, size=queries)]]
+
+        for scenario, target in [(f"{first}_to_{last}", last), ("to_all", None)]:
+            store.search(int(query_ids[0]), first, target, "cam")
+            samples = []
+            for sofifa_id in query_ids:
+                start = time.perf_counter()
+                store.search(int(sofifa_id), first, target, "cam", top_n=10)
+                samples.append((time.perf_counter() - start) * 1000)
+            records.append({"players": n_players, "scenario": scenario, **latency_summary(samples)})
+
+    return records
+
+
+def run_trajectories(n_players, queries, seed, band=1):
+    from benchmarks.synthetic_players import EDITIONS, generate_editions
+    from search_functions.tracing import MemorySink, tracing
+    from search_functions.trajectory_search import TRAJECTORY_FEATURES, TrajectoryIndex
+
+    start = time.perf_counter()
+    columns = TRAJECTORY_FEATURES + ["age"]
+    full = np.full((n_players, len(EDITIONS), len(columns)), np.nan, dtype=np.float32)
+    names = np.empty(n_players, dtype=object)
+    for step, (_, frame) in enumerate(generate_editions(n_players, seed=seed)):
+        # Synthetic sofifa_ids are 100000 + player number
+        rows = frame["sofifa_id"].to_numpy() - 100_000
+        full[rows, step] = frame[columns].to_numpy(dtype=np.float32)
+        names[rows] = frame["short_name"].to_numpy()
+    generate_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    index = TrajectoryIndex.from_editions(100_000 + np.arange(n_players), names, full, TRAJECTORY_FEATURES)
+    del full
+    records = [{"players": n_players, "scenario": "trajectory_build", "seconds": round(time.perf_counter() - start, 3),
+                "generate_seconds": round(generate_s, 3), "rows": len(index),
+                "index_mb": round(index.nbytes / 1024 ** 2, 2)}]
+
+    rng = np.random.default_rng(seed)
+    query_ids = index.ids[rng.choice(np.flatnonzero(index.lengths >= 4), size=queries)]
+    for method in ("dtw", "age"):
+        samples = []
+        sink = MemorySink()
+        with tracing(sink):
+            for sofifa_id in query_ids:
+                start = time.perf_counter()
+                index.search(int(sofifa_id), top_n=10, method=method, band=band)
+                samples.append((time.perf_counter() - start) * 1000)
+        exact = [r["attributes"]["exact"] for r in sink.records if r["name"] == "trajectories.dtw"]
+        record = {"players": n_players, "scenario": f"trajectory_{method}", **latency_summary(samples)}
+        if exact:
+            record["pruned_share"] = round(1 - float(np.mean(exact)) / len(index), 4)
+        records.append(record)
+    return records
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--players", default=",".join(map(str, DEFAULT_PLAYERS)),
+                        help="Comma-separated population sizes")
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--trajectories", type=int, help="Also benchmark trajectory search on this many players")
+    parser.add_argument("--band", type=int, default=1, help="DTW band half-width for --trajectories")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Also write the results as JSON")
+    args = parser.parse_args()
+
+    records = []
+    for n_players in map(int, args.players.split(",")):
+        records += run_size(n_players, args.queries, args.seed)
+        print(f"  {n_players:>10,} players done", file=sys.stderr)
+    if args.trajectories:
+        records += run_trajectories(args.trajectories, min(args.queries, 20), args.seed, band=args.band)
+        print(f"  {args.trajectories:>10,} trajectories done", file=sys.stderr)
+
+    for r in records:
+        if r["scenario"] == "load":
+            print(f"{r['players']:>10,} load             {r['seconds']:>8.2f} s  {r['rows']:>10,} rows  "
+                  f"store {r['store_mb']:>8.1f} MB  vs {r['frames_mb']:>8.1f} MB as DataFrames")
+        elif r["scenario"] == "trajectory_build":
+            print(f"{r['players']:>10,} trajectory_build {r['seconds']:>8.2f} s  {r['rows']:>10,} trajectories  "
+                  f"index {r['index_mb']:>8.1f} MB")
+        else:
+            pruned = f"  pruned {r['pruned_share']:.1%}" if "pruned_share" in r else ""
+            print(f"{r['players']:>10,} {r['scenario']:<16} p50 {r['p50_ms']:>8.2f} ms  "
+                  f"p95 {r['p95_ms']:>8.2f} ms{pruned}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(records, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+# import_benchmark.py
+"""
+Measure import time of the search and pipeline modules, and check which heavy dependencies they pull in.
+
+Every import runs in a fresh interpreter (median of --repeat runs). A module
+that loads a heavy dependency (pandas, scikit-learn, scipy, matplotlib,
+statsbombpy) it is not allowed to is reported as a violation and the run
+exits with status 1, so a stray top-level import is caught before it slows
+down every CLI call and worker start.
+
+    python -m benchmarks.import_benchmark
+    python -m benchmarks.import_benchmark --repeat 10 --output import_times.json
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+import numpy as np
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY = ("pandas", "sklearn", "scipy", "matplotlib", "statsbombpy")
+
+# Module -> heavy dependencies it may load at import time
+MODULES = {
+    "numpy": (),
+    "pandas": ("pandas",),
+    "sklearn.preprocessing": ("pandas", "sklearn", "scipy"),
+    "search_functions.metrics": (),
+    "search_functions.tracing": (),
+    "search_functions.unified_search": (),
+    "search_functions.shared_index": (),
+    "search_functions.quick_search": (),
+    "search_functions.search_service": (),
+    "advanced_similarity.player_style_similarity": ("pandas",),
+    "generate_player_stats": ("pandas", "scipy", "sklearn"),
+}
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed, "loaded": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def measure(module, repeat):
+    """Median import time (s) of `module` in fresh interpreters, and the heavy modules it loaded."""
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join([REPO_ROOT, os.path.join(REPO_ROOT, "statsbomb"),
+                                                        os.environ.get("PYTHONPATH", "")])}
+    times, loaded = [], []
+    for _ in range(repeat):
+        result = subprocess.run([sys.executable, "-c", PROBE.format(module=module, heavy=HEAVY)], cwd=REPO_ROOT,
+                                env=env, capture_output=True, text=True)
+        if result.returncode != 0:
+            return {"module": module, "error": result.stderr.strip().splitlines()[-1]}
+        probe = json.loads(result.stdout.strip().splitlines()[-1])
+        times.append(probe["seconds"])
+        loaded = probe["loaded"]
+    return {"module": module, "import_ms": round(float(np.median(times)) * 1000, 1), "loaded": loaded,
+            "violations": sorted(set(loaded) - set(MODULES[module]))}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="Also write the results as JSON")
+    args = parser.parse_args()
+
+    results = [measure(module, args.repeat) for module in MODULES]
+    print(f"{'module':<46} {'import ms':>10}  heavy modules loaded")
+    for r in results:
+        if "error" in r:
+            print(f"{r['module']:<46} {'-':>10}  skipped ({r['error']})")
+            continue
+        flag = f"  NOT ALLOWED: {', '.join(r['violations'])}" if r["violations"] else ""
+        print(f"{r['module']:<46} {r['import_ms']:>10.1f}  {', '.join(r['loaded']) or '-'}{flag}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    if any(r.get("violations") for r in results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
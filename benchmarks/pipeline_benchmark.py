@@ -0,0 +1,153 @@
+# pipeline_benchmark.py
+"""
+Benchmark the StatsBomb player statistics pipeline on synthetic event data.
+
+Every size runs in its own subprocess, from a temporary directory whose
+data/ holds a synthetic season file, so generate_player_stats runs unchanged
+and fully offline. Per stage the wall time, events per second and the peak
+RSS so far are recorded:
+
+    find        find_existing_events_data()
+    load        load_existing_events_data() (pd.read_csv below 50 matches,
+                where the loader rejects the file as test data)
+    minutes     calculate_minutes_played()
+    xt          calculate_player_xt()
+    network     calculate_network_features()
+    statistics  calculate_player_statistics() (includes the three above)
+    save        save_player_statistics()
+    total       find + load + statistics + save
+
+    python -m benchmarks.pipeline_benchmark --matches 1,38
+    python -m benchmarks.pipeline_benchmark --matches 1,38,380,3800
+
+3800 matches is about 13.6M events; loading them takes tens of GB of RAM.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STATSBOMB_DIR = os.path.join(REPO_ROOT, "statsbomb")
+DEFAULT_MATCHES = (1, 38, 380, 3800)
+DEFAULT_OUTPUT = os.path.join(REPO_ROOT, "benchmarks", "results", "pipeline_results.json")
+# Stages the pipeline itself runs (minutes, xt and network are parts of statistics)
+PIPELINE_STAGES = ("find", "load", "statistics", "save")
+EVENTS_FILE = os.path.join("data", "pl_2015_2016_all_events_synthetic.csv")
+
+
+def peak_rss_mb():
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kB on Linux, bytes on macOS
+    return round(peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024, 1)
+
+
+def run_worker():
+    """Run every pipeline stage once in this process (cwd = dataset directory)."""
+    import pandas as pd
+    import generate_player_stats as pipeline
+    from expected_threat import calculate_player_xt
+    from pass_network import calculate_network_features
+
+    records = []
+
+    def stage(name, function, *args):
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = function(*args)
+        wall_s = time.perf_counter() - start
+        records.append({"stage": name, "wall_s": round(wall_s, 4), "peak_rss_mb": peak_rss_mb()})
+        return result
+
+    stage("find", pipeline.find_existing_events_data)
+    events_df = stage("load", pipeline.load_existing_events_data, EVENTS_FILE)
+    if events_df is None:
+        # Too few matches for the loader's sanity check; time the plain read instead
+        records.pop()
+        events_df = stage("load", pd.read_csv, EVENTS_FILE)
+    n_events = len(events_df)
+
+    stage("minutes", pipeline.calculate_minutes_played, events_df)
+    stage("xt", calculate_player_xt, events_df)
+    stage("network", calculate_network_features, events_df)
+    stats_df = stage("statistics", pipeline.calculate_player_statistics, events_df)
+    stage("save", pipeline.save_player_statistics, stats_df)
+
+    total_s = sum(r["wall_s"] for r in records if r["stage"] in PIPELINE_STAGES)
+    records.append({"stage": "total", "wall_s": round(total_s, 4), "peak_rss_mb": peak_rss_mb()})
+    for record in records:
+        record["events"] = n_events
+        record["events_per_s"] = round(n_events / record["wall_s"]) if record["wall_s"] > 0 else None
+    return records
+
+
+def run_size(n_matches, seed):
+    """Generate n_matches matches of events and run the pipeline on them in a fresh subprocess."""
+    from benchmarks.synthetic_events import write_events
+
+    with tempfile.TemporaryDirectory(prefix="pipeline_benchmark_") as workdir:
+        os.makedirs(os.path.join(workdir, "data"))
+        start = time.perf_counter()
+        write_events(n_matches, os.path.join(workdir, EVENTS_FILE), seed=seed)
+        generate_s = time.perf_counter() - start
+
+        path = os.pathsep.join([REPO_ROOT, STATSBOMB_DIR, os.environ.get("PYTHONPATH", "")])
+        command = [sys.executable, "-m", "benchmarks.pipeline_benchmark", "--worker"]
+        output = subprocess.run(command, cwd=workdir, env={**os.environ, "PYTHONPATH": path},
+                                check=True, capture_output=True, text=True).stdout
+
+    records = json.loads(output.strip().splitlines()[-1])
+    for record in records:
+        record["matches"] = n_matches
+    print(f"  {n_matches:>6,} matches: generated in {generate_s:.1f}s", file=sys.stderr)
+    return records
+
+
+def print_table(results):
+    print(f"{'matches':>8} {'events':>12} {'stage':<11} {'wall s':>10} {'events/s':>12} {'peak RSS MB':>12}")
+    for r in results["results"]:
+        print(f"{r['matches']:>8,} {r['events']:>12,} {r['stage']:<11} {r['wall_s']:>10.3f} "
+              f"{r['events_per_s'] or 0:>12,} {r['peak_rss_mb']:>12.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--matches", default=",".join(map(str, DEFAULT_MATCHES)),
+                        help="Comma-separated numbers of matches")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=DEFAULT_OUTPUT)
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_worker()))
+        return
+
+    results = {
+        "meta": {"date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                 "python": platform.python_version(), "numpy": np.__version__,
+                 "platform": platform.platform(), "cpu_count": os.cpu_count()},
+        "results": [],
+    }
+    for n_matches in (int(size) for size in args.matches.split(",")):
+        results["results"] += run_size(n_matches, args.seed)
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print_table(results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+# search_benchmark.py
+"""
+Benchmark search_players on synthetic FIFA-shaped datasets.
+
+Every dataset size runs in its own subprocess, from a temporary directory
+that holds data/players_22.csv, so the search code runs unchanged and
+cold start and peak RSS are measured per size.
+
+    python -m benchmarks.search_benchmark --sizes 10000,100000
+    python -m benchmarks.search_benchmark --baseline benchmarks/search_baseline.json
+    python -m benchmarks.search_benchmark --sizes 10000,100000,1000000 --save-baseline
+
+Results are written as JSON (one record per size and scenario). With
+--baseline, p95 latency and peak RSS are compared per record and the run
+exits with status 1 if any of them regressed by more than --tolerance, or
+if the baseline has the dataset size but not the scenario (regenerate it
+with --save-baseline after adding a scenario).
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_SIZES = (10_000, 100_000, 1_000_000)
+DEFAULT_OUTPUT = os.path.join(REPO_ROOT, "benchmarks", "results", "search_results.json")
+DEFAULT_BASELINE = os.path.join(REPO_ROOT, "benchmarks", "search_baseline.json")
+COMPARED = ("p95_ms", "peak_rss_mb")
+
+
+def latency_summary(samples_ms):
+    samples = np.asarray(samples_ms, dtype=float)
+    return {
+        "runs": len(samples),
+        "p50_ms": round(float(np.percentile(samples, 50)), 3),
+        "p95_ms": round(float(np.percentile(samples, 95)), 3),
+        "p99_ms": round(float(np.percentile(samples, 99)), 3),
+    }
+
+
+def peak_rss_mb():
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kB on Linux, bytes on macOS
+    return round(peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024, 1)
+
+
+def filtered_search(player_name, player_role, max_value_eur, top_n=10):
+    """Dashboard-style query: similar players under a budget (search wide, then filter)."""
+    from search_functions.unified_search import build_search_index, role_group, search_players
+
+    pool_df, _, _ = build_search_index(role_group(player_role))
+    candidates = search_players(player_name, player_role, top_n=max(10 * top_n, 200))
+    affordable = pool_df.loc[candidates.index, "value_eur"] <= max_value_eur
+    return candidates[affordable.to_numpy()].head(top_n)
+
+
+def run_worker(queries, batch_size, seed):
+    """Measure all scenarios in this process (started fresh, cwd = dataset directory)."""
+    start = time.perf_counter()
+    from search_functions.unified_search import build_search_index, search_players, search_players_batch
+
+    pool_df, _, _ = build_search_index("outfield")
+    names = pool_df["short_name"].to_numpy()
+    rng = np.random.default_rng(seed)
+
+    search_players(names[0], "cam", top_n=10)
+    build_search_index("gk")
+    cold_ms = (time.perf_counter() - start) * 1000
+
+    records = [{"scenario": "cold_start", **latency_summary([cold_ms])}]
+
+    samples = []
+    for name in rng.choice(names, size=queries):
+        start = time.perf_counter()
+        search_players(name, "cam", top_n=10)
+        samples.append((time.perf_counter() - start) * 1000)
+    records.append({"scenario": "warm_single", **latency_summary(samples)})
+
+    samples = []
+    for _ in range(max(queries // batch_size, 20)):
+        batch = list(rng.choice(names, size=batch_size))
+        start = time.perf_counter()
+        search_players_batch(batch, "cam", top_n=10)
+        samples.append((time.perf_counter() - start) * 1000)
+    records.append({"scenario": f"batch_{batch_size}", **latency_summary(samples)})
+
+    budget = float(np.median(pool_df["value_eur"]))
+    samples = []
+    for name in rng.choice(names, size=queries):
+        start = time.perf_counter()
+        filtered_search(name, "cam", budget)
+        samples.append((time.perf_counter() - start) * 1000)
+    records.append({"scenario": "filtered", **latency_summary(samples)})
+
+    # Position-restricted query: only the eligible rows (bitmask filter) are scored
+    from search_functions.role_profiles import role_positions
+
+    samples = []
+    for name in rng.choice(names, size=queries):
+        start = time.perf_counter()
+        search_players(name, "fullback", top_n=10, positions=role_positions["fullback"])
+        samples.append((time.perf_counter() - start) * 1000)
+    records.append({"scenario": "eligible", **latency_summary(samples)})
+
+    rss = peak_rss_mb()
+    for record in records:
+        record["peak_rss_mb"] = rss
+    return records
+
+
+def run_size(rows, queries, batch_size, seed):
+    """Generate a dataset of `rows` players and benchmark it in a fresh subprocess."""
+    from benchmarks.synthetic_players import write_players
+
+    with tempfile.TemporaryDirectory(prefix="search_benchmark_") as workdir:
+        os.makedirs(os.path.join(workdir, "data"))
+        start = time.perf_counter()
+        write_players(rows, os.path.join(workdir, "data", "players_22.csv"), seed=seed)
+        generate_s = time.perf_counter() - start
+
+        env = {**os.environ, "PYTHONPATH": REPO_ROOT + os.pathsep + os.environ.get("PYTHONPATH", "")}
+        command = [sys.executable, "-m", "benchmarks.search_benchmark", "--worker",
+                   "--queries", str(queries), "--batch-size", str(batch_size), "--seed", str(seed)]
+        output = subprocess.run(command, cwd=workdir, env=env, check=True, capture_output=True, text=True).stdout
+
+    records = json.loads(output.strip().splitlines()[-1])
+    for record in records:
+        record["rows"] = rows
+    print(f"  {rows:>10,} rows: generated in {generate_s:.1f}s", file=sys.stderr)
+    return records
+
+
+def compare(results, baseline, tolerance):
+    """
+    Check the results against a baseline.
+
+    Returns:
+        tuple: (regressions, missing) where regressions are the records whose compared
+        metrics grew more than `tolerance`, and missing the (rows, scenario) pairs that
+        have no baseline record and so were not compared.
+    """
+    previous = {(r["rows"], r["scenario"]): r for r in baseline["results"]}
+    regressions, missing = [], []
+    for record in results["results"]:
+        old = previous.get((record["rows"], record["scenario"]))
+        if old is None:
+            missing.append((record["rows"], record["scenario"]))
+            continue
+        for metric in COMPARED:
+            if old.get(metric) and record[metric] > old[metric] * (1 + tolerance):
+                regressions.append({"rows": record["rows"], "scenario": record["scenario"], "metric": metric,
+                                    "baseline": old[metric], "current": record[metric]})
+    return regressions, missing
+
+
+def print_table(results):
+    print(f"{'rows':>10} {'scenario':<14} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10} {'peak RSS MB':>12}")
+    for r in results["results"]:
+        print(f"{r['rows']:>10,} {r['scenario']:<14} {r['p50_ms']:>10.2f} {r['p95_ms']:>10.2f} "
+              f"{r['p99_ms']:>10.2f} {r['peak_rss_mb']:>12.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)),
+                        help="Comma-separated dataset sizes (10k to 10M rows)")
+    parser.add_argument("--queries", type=int, default=200, help="Queries per latency scenario")
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=DEFAULT_OUTPUT)
+    parser.add_argument("--baseline", help="Compare against this results file")
+    parser.add_argument("--save-baseline", action="store_true", help=f"Also write the results to {DEFAULT_BASELINE}")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative growth before a regression")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_worker(args.queries, args.batch_size, args.seed)))
+        return
+
+    results = {
+        "meta": {"date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                 "python": platform.python_version(), "numpy": np.__version__,
+                 "platform": platform.platform(), "cpu_count": os.cpu_count()},
+        "results": [],
+    }
+    for rows in (int(size) for size in args.sizes.split(",")):
+        results["results"] += run_size(rows, args.queries, args.batch_size, args.seed)
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    if args.save_baseline:
+        with open(DEFAULT_BASELINE, "w") as f:
+            json.dump(results, f, indent=2)
+    print_table(results)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions, missing = compare(results, baseline, args.tolerance)
+        for r in regressions:
+            print(f"REGRESSION {r['rows']:,} rows {r['scenario']} {r['metric']}: "
+                  f"{r['baseline']} -> {r['current']}")
+        # A size the baseline never measured is only reported; a scenario missing at a measured size fails
+        baseline_sizes = {r["rows"] for r in baseline["results"]}
+        stale = [(rows, scenario) for rows, scenario in missing if rows in baseline_sizes]
+        for rows, scenario in missing:
+            print(f"{'MISSING' if rows in baseline_sizes else 'NOT COMPARED'} {rows:,} rows {scenario}: "
+                  f"no baseline record")
+        if regressions or stale:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,379 @@
+# synthetic_events.py
+
+import ast
+import os
+
+import numpy as np
+import pandas as pd
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SAMPLE_EVENTS = os.path.join(REPO_ROOT, "data", "sample_match_events.csv")
+
+# Events placed at fixed points of the match rather than resampled with the play
+STRUCTURAL_TYPES = ("Starting XI", "Half Start", "Half End", "Substitution", "Tactical Shift")
+JITTERED_LOCATIONS = ("location", "pass_end_location", "carry_end_location")
+PITCH = (120.0, 80.0)
+
+N_TEAMS = 20  # 380 matches = one double round-robin season
+TEAM_ID_OFFSET = 1000
+PLAYER_ID_OFFSET = 100000
+MATCH_ID_OFFSET = 9000000
+
+
+def _parse(value):
+    return ast.literal_eval(value) if isinstance(value, str) else None
+
+
+def _point_array(values):
+    """'[x, y]' strings -> (n, 2) float array, NaN where missing."""
+    points = np.full((len(values), 2), np.nan)
+    for row, value in enumerate(values):
+        point = _parse(value)
+        if point:
+            points[row] = point[:2]
+    return points
+
+
+def _format_points(points):
+    valid = ~np.isnan(points[:, 0])
+    formatted = np.full(len(points), np.nan, dtype=object)
+    if valid.any():
+        x = pd.Series(points[valid, 0]).round(1).astype(str)
+        y = pd.Series(points[valid, 1]).round(1).astype(str)
+        formatted[valid] = ("[" + x + ", " + y + "]").to_numpy()
+    return formatted
+
+
+def _uuids(rng, n):
+    raw = rng.integers(0, 256, size=(n, 16), dtype=np.uint8)
+    raw[:, 6] = (raw[:, 6] & 0x0F) | 0x40  # version 4
+    raw[:, 8] = (raw[:, 8] & 0x3F) | 0x80  # RFC 4122 variant
+    h = raw.tobytes().hex()
+    return [f"{h[i:i + 8]}-{h[i + 8:i + 12]}-{h[i + 12:i + 16]}-{h[i + 16:i + 20]}-{h[i + 20:i + 32]}"
+            for i in range(0, 32 * n, 32)]
+
+
+def _timestamp(seconds):
+    millis = np.round(seconds * 1000).astype(np.int64)
+    minutes, millis = np.divmod(millis, 60000)
+    secs, millis = np.divmod(millis, 1000)
+    return [f"00:{m:02d}:{s:02d}.{ms:03d}" for m, s, ms in zip(minutes, secs, millis)]
+
+
+def _remap_players(value, lookup):
+    """Replace {'id', 'name'} player dicts inside parsed tactics/freeze frames."""
+    if isinstance(value, list):
+        return [_remap_players(item, lookup) for item in value]
+    if isinstance(value, dict):
+        if set(value) == {"id", "name"} and value["id"] in lookup:
+            player_id, name = lookup[value["id"]]
+            return {"id": player_id, "name": name}
+        return {key: _remap_players(item, lookup) for key, item in value.items()}
+    return value
+
+
+def team_name(team):
+    return f"Team {team + 1:02d}"
+
+
+def player_name(team, slot):
+    return f"Player {team + 1:02d}-{slot + 1:02d}"
+
+
+def fixture(match):
+    """(home, away) team numbers: every block of 380 matches is a double round-robin."""
+    home = match % N_TEAMS
+    away = (home + 1 + (match // N_TEAMS) % (N_TEAMS - 1)) % N_TEAMS
+    return home, away
+
+
+class EventTemplate:
+    """
+    A real match (data/sample_match_events.csv) prepared for resampling.
+
+    Play is split into possession chains (consecutive events with the same
+    period and possession). A synthetic match lays resampled chains end to
+    end until each half reaches the template's length, so the event type
+    mix, the order of events inside a possession (pass -> ball receipt ->
+    carry ...) and the joint distribution of the type-specific columns all
+    follow the real match. Starting XI, half start/end and substitutions are
+    placed explicitly.
+
+    Every template player is given a slot (0-10 starting XI, 11+ the
+    substitutes in order of appearance) on the home or the away side, and
+    slots are mapped onto the synthetic teams' squads.
+
+    Args:
+        path (str): StatsBomb event CSV with a single match.
+    """
+
+    def __init__(self, path=SAMPLE_EVENTS):
+        events = pd.read_csv(path, low_memory=False)
+        self.columns = list(events.columns)
+        events = events.sort_values("index", ignore_index=True)
+        self.events = events
+        n = len(events)
+
+        starting_xi = events[events["type"] == "Starting XI"]
+        self.sides = list(starting_xi["team"])
+        self.side = (events["team"] == self.sides[1]).to_numpy().astype(np.int8)
+        self.possession_side = (events["possession_team"] == self.sides[1]).to_numpy().astype(np.int8)
+
+        # Player slots per side
+        self.slots = {}
+        for side, tactics in enumerate(starting_xi["tactics"]):
+            for slot, entry in enumerate(_parse(tactics)["lineup"]):
+                self.slots[int(entry["player"]["id"])] = (side, slot)
+        for side in (0, 1):
+            subs = events[(events["type"] == "Substitution") & (self.side == side)]
+            for replacement_id in subs["substitution_replacement_id"].dropna().astype(int):
+                self.slots.setdefault(replacement_id, (side, sum(s == side for s, _ in self.slots.values())))
+        self.squad_size = max(slot for _, slot in self.slots.values()) + 1
+
+        def slot_column(column):
+            ids = events[column].to_numpy()
+            return np.array([self.slots.get(int(i), (0, -1))[1] if not pd.isna(i) else -1 for i in ids])
+
+        self.player_slot = slot_column("player_id")
+        self.recipient_slot = slot_column("pass_recipient_id")
+        self.replacement_slot = slot_column("substitution_replacement_id")
+        self.points = {column: _point_array(events[column].to_numpy()) for column in JITTERED_LOCATIONS}
+        self.tactics = [_parse(t) for t in events["tactics"]]
+        self.freeze_frames = [_parse(f) for f in events["shot_freeze_frame"]]
+
+        # Clock within the period (seconds)
+        self.clock = pd.to_timedelta(events["timestamp"]).dt.total_seconds().to_numpy()
+        self.period = events["period"].to_numpy()
+
+        structural = events["type"].isin(STRUCTURAL_TYPES).to_numpy()
+        self.structural = np.flatnonzero(structural)
+        self.period_length = {p: self.clock[self.period == p].max() for p in np.unique(self.period)}
+
+        # Possession chains of non-structural events, per period
+        play = np.flatnonzero(~structural)
+        keys = events["period"].to_numpy()[play] * 100000 + events["possession"].to_numpy()[play]
+        breaks = np.flatnonzero(np.diff(keys)) + 1
+        self.chains = {}
+        for rows in np.split(play, breaks):
+            self.chains.setdefault(int(self.period[rows[0]]), []).append(rows)
+        self.chain_span = {}
+        for period, chains in self.chains.items():
+            starts = np.array([self.clock[rows[0]] for rows in chains] + [self.period_length[period]])
+            self.chain_span[period] = np.maximum(np.diff(starts), 0.5)
+
+        # References (related events, key pass <-> shot) as offsets inside the chain
+        position = {event_id: row for row, event_id in enumerate(events["id"])}
+        chain_of = np.full(n, -1)
+        chain_start = np.zeros(n, dtype=np.int64)
+        for number, rows in enumerate(c for chains in self.chains.values() for c in chains):
+            chain_of[rows] = number
+            chain_start[rows] = rows[0]
+
+        def offsets(value, row):
+            refs = value if isinstance(value, list) else [value]
+            rows = [position.get(ref) for ref in refs]
+            # Rows are contiguous within a chain after removing structural events
+            return [int(np.searchsorted(play, r) - np.searchsorted(play, chain_start[row]))
+                    for r in rows if r is not None and chain_of[r] == chain_of[row] >= 0]
+
+        self.related = [offsets(_parse(v), row) if isinstance(v, str) else []
+                        for row, v in enumerate(events["related_events"])]
+        self.references = {column: [offsets(v, row) if isinstance(v, str) else []
+                                    for row, v in enumerate(events[column])]
+                           for column in ("pass_assisted_shot_id", "shot_key_pass_id")}
+
+    def match_rows(self, rng):
+        """
+        Template rows, period, clock and chain bookkeeping for one synthetic match.
+
+        Returns:
+            dict: per-event arrays row, period, clock, possession, swap and
+            chain_base, plus members (event positions grouped by chain, in
+            order). members[chain_base + k] is the position of the k-th
+            event of the event's chain; chain_base is -1 for structural events.
+        """
+        parts = []
+        for period, chains in self.chains.items():
+            length = self.period_length[period] + rng.uniform(-90, 90)
+            spans = self.chain_span[period]
+            picks = []
+            elapsed = 0.0
+            while elapsed < length:
+                batch = rng.integers(0, len(chains), size=64)
+                ends = elapsed + np.cumsum(spans[batch])
+                keep = np.searchsorted(ends, length) + 1
+                picks.extend(batch[:keep])
+                elapsed = ends[min(keep, len(batch)) - 1]
+            starts = np.concatenate([[0.0], np.cumsum(spans[picks])[:-1]])
+            swaps = rng.random(len(picks)) < 0.5
+            for chain, start, swap in zip(picks, starts, swaps):
+                rows = chains[chain]
+                parts.append((rows, period, start + np.maximum.accumulate(self.clock[rows] - self.clock[rows[0]]), swap))
+            # Structural events of this period, at their template time (half end at the new length)
+            rows = self.structural[self.period[self.structural] == period]
+            clock = np.where(self.events["type"].to_numpy()[rows] == "Half End", elapsed,
+                             np.minimum(self.clock[rows], elapsed))
+            parts.append((rows, period, clock, None))
+
+        row = np.concatenate([rows for rows, _, _, _ in parts])
+        period = np.concatenate([np.full(len(rows), p) for rows, p, _, _ in parts])
+        clock = np.concatenate([c for _, _, c, _ in parts])
+        swap = np.concatenate([np.full(len(rows), bool(s)) for rows, _, _, s in parts])
+        chain = np.concatenate([np.full(len(rows), number if s is not None else -1)
+                                for number, (rows, _, _, s) in enumerate(parts)])
+
+        # Kick-off events first and half end last at equal clock
+        types = self.events["type"].to_numpy()[row]
+        rank = np.where(np.isin(types, ("Starting XI", "Half Start")), 0, np.where(types == "Half End", 2, 1))
+        order = np.lexsort((rank, clock, period))
+        row, period, clock, swap, chain = row[order], period[order], clock[order], swap[order], chain[order]
+
+        # Possession numbers: one per chain, structural events join the current one
+        current = np.maximum.accumulate(chain)
+        possession = np.maximum(np.cumsum(np.r_[True, current[1:] != current[:-1]] & (current >= 0)), 1)
+
+        # Chain members in order, so a chain offset can be turned into a position
+        # (structural events may fall in the middle of a chain)
+        in_chain = np.flatnonzero(chain >= 0)
+        members = in_chain[np.argsort(chain[in_chain], kind="stable")]
+        first = np.r_[0, np.flatnonzero(np.diff(chain[members])) + 1]
+        base = np.full(len(row), -1)
+        group_of = np.repeat(np.arange(len(first)), np.diff(np.r_[first, len(members)]))
+        base[members] = first[group_of]
+        return {"row": row, "period": period, "clock": clock, "possession": possession,
+                "swap": swap, "chain_base": base, "members": members}
+
+
+def generate_events(n_matches, seed=0, first_match=0, template=None, jitter=1.0):
+    """
+    Synthetic StatsBomb events for n_matches matches, with the columns of data/sample_match_events.csv.
+
+    Values are in the form pandas reads them from the CSV (locations, related
+    events and tactics as strings), so the frame can be passed straight to
+    calculate_player_statistics or written with to_csv. Locations are
+    jittered by a normal with `jitter` metres standard deviation, and pass
+    length and angle follow the jittered locations.
+
+    Args:
+        n_matches (int): Number of matches.
+        seed (int): Random seed.
+        first_match (int): Number of the first match (fixtures and match_id continue from it).
+        template (EventTemplate): Template to resample (default: the sample match).
+        jitter (float): Location noise in metres.
+
+    Returns:
+        pd.DataFrame: One row per event, ordered by match and index.
+    """
+    template = template or EventTemplate()
+    rng = np.random.default_rng(seed)
+    events = template.events
+
+    matches = []
+    total = members_total = 0
+    for match in range(first_match, first_match + n_matches):
+        rows = template.match_rows(rng)
+        n = len(rows["row"])
+        rows["match"] = np.full(n, match)
+        rows["index"] = np.arange(1, n + 1)
+        # Positions and member indices relative to the whole chunk
+        rows["chain_base"] = np.where(rows["chain_base"] >= 0, rows["chain_base"] + members_total, -1)
+        rows["members"] = rows["members"] + total
+        matches.append(rows)
+        total += n
+        members_total += len(rows["members"])
+    columns = {key: np.concatenate([m[key] for m in matches]) for key in matches[0]}
+    row = columns["row"]
+
+    frame = events.take(row).reset_index(drop=True)
+    match = columns["match"]
+    fixtures = np.array([fixture(m) for m in range(first_match, first_match + n_matches)])
+    home, away = fixtures[match - first_match, 0], fixtures[match - first_match, 1]
+
+    def team_of(side):
+        side = side ^ columns["swap"]
+        return np.where(side == 0, home, away)
+
+    team = team_of(template.side[row])
+    possession_team = team_of(template.possession_side[row])
+    team_names = np.array([team_name(t) for t in range(N_TEAMS)], dtype=object)
+    names = np.array([[player_name(t, s) for s in range(template.squad_size)] for t in range(N_TEAMS)],
+                     dtype=object)
+
+    frame["match_id"] = MATCH_ID_OFFSET + match
+    frame["index"] = columns["index"]
+    frame["period"] = columns["period"]
+    clock = columns["clock"]
+    frame["timestamp"] = _timestamp(clock)
+    frame["minute"] = (columns["period"] - 1) * 45 + (clock // 60).astype(int)
+    frame["second"] = (clock % 60).astype(int)
+    frame["possession"] = columns["possession"]
+    frame["team"] = team_names[team]
+    frame["team_id"] = TEAM_ID_OFFSET + team
+    frame["possession_team"] = team_names[possession_team]
+    frame["possession_team_id"] = TEAM_ID_OFFSET + possession_team
+
+    for name_column, id_column, slots in (("player", "player_id", template.player_slot),
+                                          ("pass_recipient", "pass_recipient_id", template.recipient_slot),
+                                          ("substitution_replacement", "substitution_replacement_id",
+                                           template.replacement_slot)):
+        slot = slots[row]
+        valid = slot >= 0
+        frame[name_column] = np.where(valid, names[team, np.maximum(slot, 0)], np.nan)
+        frame[id_column] = np.where(valid, PLAYER_ID_OFFSET + team * 100 + slot, np.nan)
+
+    # Locations with noise; pass geometry follows the new end points
+    points = {}
+    for column in JITTERED_LOCATIONS:
+        p = template.points[column][row] + rng.normal(0, jitter, size=(len(row), 2))
+        points[column] = np.clip(p, 0, PITCH)
+        frame[column] = _format_points(points[column])
+    is_pass = (frame["type"] == "Pass").to_numpy() & ~np.isnan(points["location"][:, 0])
+    delta = points["pass_end_location"][is_pass] - points["location"][is_pass]
+    frame.loc[is_pass, "pass_length"] = np.hypot(delta[:, 0], delta[:, 1])
+    frame.loc[is_pass, "pass_angle"] = np.arctan2(delta[:, 1], delta[:, 0])
+
+    # New ids; references inside a chain point at the copied events
+    ids = np.array(_uuids(rng, len(row)), dtype=object)
+    frame["id"] = ids
+    members, chain_base = columns["members"], columns["chain_base"]
+
+    def references(refs, as_list):
+        values = np.full(len(row), np.nan, dtype=object)
+        for position in np.flatnonzero(chain_base >= 0):
+            found = refs[row[position]]
+            if found:
+                targets = ids[members[chain_base[position] + np.asarray(found)]]
+                values[position] = repr(list(targets)) if as_list else targets[0]
+        return values
+
+    frame["related_events"] = references(template.related, as_list=True)
+    for column, refs in template.references.items():
+        frame[column] = references(refs, as_list=False)
+
+    # Player names inside tactics and freeze frames
+    def lookup(position):
+        mapped = {}
+        for player_id, (side, slot) in template.slots.items():
+            t = (home if (side ^ columns["swap"][position]) == 0 else away)[position]
+            mapped[player_id] = (int(PLAYER_ID_OFFSET + t * 100 + slot), player_name(t, slot))
+        return mapped
+
+    for column, parsed in (("tactics", template.tactics), ("shot_freeze_frame", template.freeze_frames)):
+        values = frame[column].to_numpy(dtype=object).copy()
+        for position in np.flatnonzero(frame[column].notna().to_numpy()):
+            values[position] = repr(_remap_players(parsed[row[position]], lookup(position)))
+        frame[column] = values
+
+    return frame[template.columns]
+
+
+def write_events(n_matches, path, seed=0, chunk_matches=20):
+    """Write synthetic events for n_matches matches to CSV in chunks (keeps memory bounded)."""
+    template = EventTemplate()
+    n_events = 0
+    for first in range(0, n_matches, chunk_matches):
+        chunk = generate_events(min(chunk_matches, n_matches - first), seed=seed + first, first_match=first,
+                                template=template)
+        chunk.to_csv(path, mode="w" if first == 0 else "a", header=first == 0, index=False)
+        n_events += len(chunk)
+    return n_events
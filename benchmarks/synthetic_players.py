@@ -0,0 +1,131 @@
+# synthetic_players.py
+
+import numpy as np
+import pandas as pd
+
+# Position strings in the style of FIFA's 'player_positions', with rough frequencies
+POSITIONS = {
+    "GK": 0.11,
+    "CB": 0.14, "CB, RB": 0.03, "CB, LB": 0.02, "CB, CDM": 0.03,
+    "RB": 0.04, "RB, RM": 0.02, "RWB, RB": 0.01, "LB": 0.04, "LB, LM": 0.02, "LWB, LB": 0.01,
+    "CDM, CM": 0.06, "CM": 0.06, "CM, CAM": 0.05, "CAM, CM": 0.04, "CAM": 0.03,
+    "RM, LM": 0.03, "LM, RM": 0.03, "RW, RM": 0.03, "LW, LM": 0.03, "RW, LW, ST": 0.02,
+    "ST": 0.09, "ST, CF": 0.03, "CF, ST": 0.01,
+}
+
+
+def generate_players(n_rows, seed=0):
+    """
+    Synthetic player table with the columns unified_search uses.
+
+    Attributes are drawn around a per-player quality level so overall,
+    potential, value_eur and the ratings are correlated as in the real data.
+    Goalkeepers have no outfield ratings (NaN), as in the FIFA CSVs.
+
+    Args:
+        n_rows (int): Number of players.
+        seed (int): Random seed.
+
+    Returns:
+        pd.DataFrame: short_name, player_positions and all KEEPER_FEATURES/OUTFIELD_FEATURES.
+    """
+    rng = np.random.default_rng(seed)
+    positions = rng.choice(list(POSITIONS), size=n_rows, p=np.array(list(POSITIONS.values())) / sum(POSITIONS.values()))
+    is_keeper = positions == "GK"
+
+    age = rng.integers(16, 40, n_rows)
+    overall = np.clip(rng.normal(66, 7, n_rows), 40, 94).round()
+    potential = np.clip(overall + np.maximum(0, 27 - age) * rng.uniform(0, 1.2, n_rows), overall, 95).round()
+    value_eur = np.round(np.exp((overall - 40) / 7.5 + rng.normal(8.5, 0.5, n_rows)), -3)
+
+    def rating(offset, spread=8.0):
+        return np.clip(overall + offset + rng.normal(0, spread, n_rows), 15, 97).round()
+
+    players = pd.DataFrame({
+        "short_name": np.char.add("Player ", np.arange(n_rows).astype(str)),
+        "player_positions": positions,
+        "age": age,
+        "height_cm": np.clip(rng.normal(181, 7, n_rows) + 6 * is_keeper, 155, 206).round(),
+        "weight_kg": np.clip(rng.normal(75, 7, n_rows) + 7 * is_keeper, 50, 110).round(),
+        "overall": overall,
+        "potential": potential,
+        "value_eur": value_eur,
+    })
+
+    for column, offset in [("pace", 2), ("shooting", -8), ("passing", -3),
+                           ("dribbling", 1), ("defending", -12), ("physic", 0)]:
+        players[column] = np.where(is_keeper, np.nan, rating(offset))
+    for column in ["goalkeeping_diving", "goalkeeping_handling", "goalkeeping_kicking",
+                   "goalkeeping_positioning", "goalkeeping_reflexes"]:
+        players[column] = np.where(is_keeper, rating(0, 4), rng.integers(5, 16, n_rows))
+
+    return players
+
+
+def write_players(n_rows, path, seed=0, chunk_rows=1_000_000):
+    """Write a synthetic dataset to CSV in chunks (keeps memory bounded for 10M rows)."""
+    for start in range(0, n_rows, chunk_rows):
+        chunk = generate_players(min(chunk_rows, n_rows - start), seed=seed + start)
+        chunk["short_name"] = np.char.add("Player ", np.arange(start, start + len(chunk)).astype(str))
+        chunk.to_csv(path, mode="w" if start == 0 else "a", header=start == 0, index=False)
+
+
+EDITIONS = (15, 16, 17, 18, 19, 20, 21, 22)
+RATING_COLUMNS = ["pace", "shooting", "passing", "dribbling", "defending", "physic",
+                  "goalkeeping_diving", "goalkeeping_handling", "goalkeeping_kicking",
+                  "goalkeeping_positioning", "goalkeeping_reflexes"]
+
+
+def generate_editions(n_players, editions=EDITIONS, seed=0, change_rate=0.35):
+    """
+    Synthetic FIFA editions of the same player population, keyed by 'sofifa_id'.
+
+    Every player has a career window (a run of consecutive editions, possibly
+    none of the generated ones). Between
+    editions the age goes up by one and each rating changes with probability
+    `change_rate` by a few points, drifting up for young players and down for
+    old ones; value_eur follows overall. As in the real editions, most
+    attributes are unchanged from one year to the next.
+
+    Yields:
+        tuple: (edition, DataFrame with sofifa_id plus the generate_players columns) per edition.
+    """
+    rng = np.random.default_rng(seed)
+    players = generate_players(n_players, seed=seed)
+    players.insert(0, "sofifa_id", 100_000 + np.arange(n_players))
+    players["short_name"] = np.char.add("Player ", np.arange(n_players).astype(str))
+
+    # Start age counts from the first edition
+    players["age"] = np.maximum(players["age"] - rng.integers(0, len(editions), n_players), 16)
+    # Careers may have started before the first edition, so edition sizes stay similar
+    first = rng.integers(1 - len(editions), len(editions), n_players)
+    last = first + rng.integers(0, 2 * len(editions), n_players)
+
+    for step, edition in enumerate(editions):
+        if step > 0:
+            players["age"] += 1
+            previous_overall = players["overall"].to_numpy()
+            trend = np.where(players["age"] < 24, 1.0, np.where(players["age"] > 30, -1.0, 0.0))
+            for column in RATING_COLUMNS + ["overall"]:
+                changed = rng.random(n_players) < change_rate
+                delta = rng.integers(-2, 3, n_players) + trend
+                players[column] = np.where(changed, np.clip(players[column] + delta, 15, 97), players[column])
+            players["potential"] = np.maximum(players["potential"] - (players["age"] > 27), players["overall"])
+            players["value_eur"] = np.round(players["value_eur"] * np.exp((players["overall"] - previous_overall) / 7.5),
+                                            -3)
+            players["weight_kg"] = np.where(rng.random(n_players) < 0.1,
+                                            players["weight_kg"] + rng.integers(-2, 3, n_players), players["weight_kg"])
+
+        active = (first <= step) & (step <= last)
+        yield edition, players[active].reset_index(drop=True)
+
+
+def write_editions(n_players, directory, editions=EDITIONS, seed=0):
+    """Write data/players_<edition>.csv style files for every edition into `directory`."""
+    import os
+
+    paths = {}
+    for edition, frame in generate_editions(n_players, editions=editions, seed=seed):
+        paths[edition] = os.path.join(directory, f"players_{edition}.csv")
+        frame.to_csv(paths[edition], index=False)
+    return paths
@@ -0,0 +1,387 @@
+# edition_store.py
+
+import sys
+
+import numpy as np
+
+from search_functions.metrics import MetricIndex
+from search_functions.positions import NO_POSITION, POSITION_BITS, POSITIONS, parse_positions
+from search_functions.role_profiles import position_roles, role_profiles
+from search_functions.tracing import span
+from search_functions.unified_search import KEEPER_FEATURES, OUTFIELD_FEATURES, resolve_weights, role_group
+
+EDITIONS = (15, 16, 17, 18, 19, 20, 21, 22)
+EDITION_PATH = "data/players_{edition}.csv"
+
+# Every numeric column the outfield and keeper searches use, one column each in the store
+FEATURES = OUTFIELD_FEATURES + [f for f in KEEPER_FEATURES if f not in OUTFIELD_FEATURES]
+
+
+class Edition:
+    """
+    One edition inside an EditionStore: which players it has and how it differs from the base matrix.
+
+    Attributes:
+        rows (np.ndarray): Player row in the store for each entry of the edition (CSV order).
+        masks (np.ndarray): Position bitmask per entry (see positions.py).
+        primary (np.ndarray): Primary position per entry (index in POSITIONS).
+        delta_features (np.ndarray): FEATURES columns with at least one small change.
+        deltas (np.ndarray): int8 (entries x delta_features) whole-number change from the base row.
+        exception_entries, exception_features, exception_values: Cells whose change does not fit
+            in deltas (large values such as value_eur, fractions, NaN appearing or disappearing),
+            stored as (entry, FEATURES column, new value).
+        name_entries, names: Entries whose 'short_name' differs from the base name.
+    """
+
+    def __init__(self, rows, masks, primary, delta_features, deltas, exception_entries, exception_features,
+                 exception_values, name_entries, names):
+        self.rows = rows
+        self.masks = masks
+        self.primary = primary
+        self.delta_features = delta_features
+        self.deltas = deltas
+        self.exception_entries = exception_entries
+        self.exception_features = exception_features
+        self.exception_values = exception_values
+        self.name_entries = name_entries
+        self.names = names
+
+    def __len__(self):
+        return len(self.rows)
+
+    @property
+    def nbytes(self):
+        arrays = (self.rows, self.masks, self.primary, self.delta_features, self.deltas, self.exception_entries,
+                  self.exception_features, self.exception_values, self.name_entries)
+        return sum(a.nbytes for a in arrays) + sum(sys.getsizeof(n) for n in self.names)
+
+    @classmethod
+    def encode(cls, rows, masks, primary, old, current, known_entries, name_entries, names):
+        """
+        Encode an edition against the base rows `old` of its known entries (`current` are their values).
+
+        Entries outside known_entries are new players whose base row is this
+        edition's row, so they have no changes.
+        """
+        difference = current - old
+        both_missing = np.isnan(old) & np.isnan(current)
+        small = (difference == np.round(difference)) & (np.abs(difference) <= 127)
+        exceptions = ~(small | both_missing)
+
+        difference[~small] = 0
+        delta_features = np.flatnonzero(difference.any(axis=0))
+        deltas = np.zeros((len(rows), len(delta_features)), dtype=np.int8)
+        deltas[known_entries] = difference[:, delta_features]
+
+        exception_at, exception_features = np.nonzero(exceptions)
+        return cls(rows=rows, masks=masks, primary=primary, delta_features=delta_features.astype(np.uint8),
+                   deltas=deltas, exception_entries=known_entries[exception_at].astype(np.int32),
+                   exception_features=exception_features.astype(np.uint8),
+                   exception_values=current[exception_at, exception_features],
+                   name_entries=name_entries, names=names)
+
+    def apply(self, X, entries=None):
+        """
+        Write this edition's changes into X, a copy of the base rows of all entries (or of `entries`).
+        """
+        if entries is None:
+            X[:, self.delta_features] += self.deltas
+            X[self.exception_entries, self.exception_features] = self.exception_values
+            return X
+
+        X[:, self.delta_features] += self.deltas[entries]
+        for i, entry in enumerate(np.atleast_1d(entries)):
+            at = self.exception_entries == entry
+            X[i, self.exception_features[at]] = self.exception_values[at]
+        return X
+
+
+class EditionStore:
+    """
+    Several FIFA editions of the player table, keyed by 'sofifa_id'.
+
+    Each player has one base row (float32, FEATURES columns) holding their
+    values in the newest edition they appear in. Every edition stores which
+    players it has and how their values differ from the base: ratings, age
+    and body measures change by a few whole points between editions, so the
+    differences are kept as int8 (only for columns where something changed),
+    and the few cells that do not fit (value_eur, missing values appearing)
+    as (entry, column, value) triples. An edition's matrix is rebuilt on
+    demand as base[rows] plus its differences, independent of the other
+    editions.
+
+    Cross-edition search scores a player from one edition against the pools of
+    one or more editions in a single pass over one MetricIndex built for
+    those editions (cached per set of editions and pool).
+
+    Use EditionStore.load() to read the CSV files.
+    """
+
+    def __init__(self, ids, base, names, editions):
+        self.ids = ids
+        self.base = base
+        self.names = names
+        self.editions = editions
+        self._id_order = np.argsort(ids, kind="stable")
+        self._name_rows = {}
+        self._pools = {}
+
+    @classmethod
+    def load(cls, editions=EDITIONS, path_pattern=EDITION_PATH):
+        """
+        Read the editions' CSV files (only the needed columns), newest first.
+
+        Only one edition's columns are in memory at a time: a player seen for
+        the first time adds a base row, a player already known adds only the
+        cells that differ from their base row.
+
+        Args:
+            editions (iterable): Edition numbers, e.g. (15, ..., 22).
+            path_pattern (str): Path with an {edition} placeholder.
+        """
+        import pandas as pd
+
+        columns = ["sofifa_id", "short_name", "player_positions"] + FEATURES
+        ids = sorted_ids = sorted_rows = np.empty(0, dtype=np.int64)
+        base = np.empty((0, len(FEATURES)), dtype=np.float32)
+        names = np.empty(0, dtype=object)
+        loaded = {}
+
+        for edition in sorted(editions, reverse=True):
+            path = path_pattern.format(edition=edition)
+            with span("editions.load", edition=edition, path=path) as s:
+                frame = pd.read_csv(path, usecols=lambda column: column in columns, low_memory=False)
+                frame = frame.drop_duplicates("sofifa_id")
+                edition_ids = frame["sofifa_id"].to_numpy(dtype=np.int64)
+                values = frame.reindex(columns=FEATURES).to_numpy(dtype=np.float32)
+                edition_names = frame["short_name"].to_numpy(dtype=object)
+                masks, primary = parse_positions(frame["player_positions"].to_numpy())
+                del frame
+
+                # Known players: look up their base row; new players get one
+                at = np.searchsorted(sorted_ids, edition_ids)
+                known = at < len(sorted_ids)
+                known[known] = sorted_ids[at[known]] == edition_ids[known]
+                rows = np.empty(len(edition_ids), dtype=np.int64)
+                rows[known] = sorted_rows[at[known]]
+                new = np.flatnonzero(~known)
+                rows[new] = len(ids) + np.arange(len(new))
+
+                known_entries = np.flatnonzero(known)
+                renamed = known_entries[names[rows[known_entries]] != edition_names[known_entries]]
+                loaded[edition] = Edition.encode(
+                    rows.astype(np.int32), masks, primary, base[rows[known_entries]], values[known_entries],
+                    known_entries, renamed.astype(np.int32), edition_names[renamed])
+
+                ids = np.concatenate([ids, edition_ids[new]])
+                base = np.concatenate([base, values[new]])
+                names = np.concatenate([names, edition_names[new]])
+                sorted_rows = np.argsort(ids, kind="stable")
+                sorted_ids = ids[sorted_rows]
+                s.set(rows=len(rows), new_players=len(new), exceptions=len(loaded[edition].exception_values))
+
+        return cls(ids, base, names, {edition: loaded[edition] for edition in sorted(loaded)})
+
+    def __len__(self):
+        """Number of distinct players over all editions."""
+        return len(self.ids)
+
+    @property
+    def nbytes(self):
+        """Memory held by the store (arrays plus name strings)."""
+        return (self.ids.nbytes + self.base.nbytes + sum(sys.getsizeof(n) for n in self.names)
+                + sum(edition.nbytes for edition in self.editions.values()))
+
+    def _edition(self, edition):
+        if edition not in self.editions:
+            raise ValueError(f"Unknown edition: {edition}. Loaded: {sorted(self.editions)}")
+        return self.editions[edition]
+
+    def player_rows(self, sofifa_ids):
+        """Store row of each sofifa_id (-1 for unknown ids)."""
+        sofifa_ids = np.asarray(sofifa_ids, dtype=np.int64)
+        at = np.minimum(np.searchsorted(self.ids, sofifa_ids, sorter=self._id_order), len(self.ids) - 1)
+        rows = self._id_order[at]
+        return np.where(self.ids[rows] == sofifa_ids, rows, -1)
+
+    def matrix(self, edition):
+        """
+        The edition's FEATURES matrix, rebuilt from the base rows and the edition's differences.
+
+        Returns:
+            np.ndarray: float32 (players in the edition x FEATURES), row i belongs to store row edition.rows[i].
+        """
+        e = self._edition(edition)
+        return e.apply(self.base[e.rows])
+
+    def edition_names(self, edition):
+        """'short_name' per entry of an edition."""
+        e = self._edition(edition)
+        names = self.names[e.rows]
+        names[e.name_entries] = e.names
+        return names
+
+    def entry_name(self, entry, edition):
+        """'short_name' of one entry of an edition."""
+        e = self._edition(edition)
+        renamed = np.flatnonzero(e.name_entries == entry)
+        return e.names[renamed[0]] if len(renamed) else self.names[e.rows[entry]]
+
+    def matrix_row(self, entry, edition):
+        """FEATURES values of one entry of an edition (float64)."""
+        e = self._edition(edition)
+        return e.apply(self.base[e.rows[[entry]]], entries=[entry])[0].astype(np.float64)
+
+    def find(self, player, edition):
+        """
+        Entries of an edition for a sofifa_id or an exact 'short_name'.
+
+        Returns:
+            np.ndarray: Entry positions in the edition (empty if not found).
+        """
+        e = self._edition(edition)
+        if isinstance(player, (int, np.integer)):
+            return np.flatnonzero(e.rows == self.player_rows([player])[0])
+        if edition not in self._name_rows:
+            import pandas as pd
+            names = self.edition_names(edition)
+            self._name_rows[edition] = pd.Series(np.arange(len(names))).groupby(names).indices
+        return self._name_rows[edition].get(player, np.empty(0, dtype=np.int64))
+
+    def frame(self, edition):
+        """An edition as a DataFrame (sofifa_id, short_name and FEATURES), e.g. for unified_search-style code."""
+        import pandas as pd
+
+        e = self._edition(edition)
+        frame = pd.DataFrame(self.matrix(edition), columns=FEATURES)
+        frame.insert(0, "short_name", self.edition_names(edition))
+        frame.insert(0, "sofifa_id", self.ids[e.rows])
+        return frame
+
+    def default_role(self, entry, edition):
+        """Role for an entry's primary position (see unified_search.default_role)."""
+        primary = self._edition(edition).primary[entry]
+        if primary == NO_POSITION:
+            raise ValueError(f"No known position for entry {entry} of edition {edition}.")
+        return position_roles[POSITIONS[primary]]
+
+    def pool(self, editions, group):
+        """
+        Candidate pool of one pool type over one or more editions (built once per combination).
+
+        Rows with a missing feature are dropped, as in unified_search. Features
+        are standardized with the pool's own mean and standard deviation.
+
+        Returns:
+            dict: 'edition', 'entry' and store 'row' per pool row, 'index' (MetricIndex),
+            'features' (columns of FEATURES used), 'mean' and 'scale' of the standardization.
+        """
+        key = (tuple(sorted(editions)), group)
+        if key in self._pools:
+            return self._pools[key]
+
+        feature_list = KEEPER_FEATURES if group == "gk" else OUTFIELD_FEATURES
+        features = np.array([FEATURES.index(f) for f in feature_list])
+        with span("editions.pool", editions=len(key[0]), group=group) as s:
+            parts, edition_of, entry_of, row_of = [], [], [], []
+            for edition in key[0]:
+                e = self._edition(edition)
+                is_keeper = (e.masks & POSITION_BITS["GK"]) != 0
+                X = self.matrix(edition)[:, features]
+                keep = np.flatnonzero((is_keeper if group == "gk" else ~is_keeper) & ~np.isnan(X).any(axis=1))
+                parts.append(X[keep])
+                edition_of.append(np.full(len(keep), edition, dtype=np.int16))
+                entry_of.append(keep.astype(np.int32))
+                row_of.append(e.rows[keep])
+
+            X = np.concatenate(parts).astype(np.float64)
+            mean, scale = X.mean(axis=0), X.std(axis=0)
+            scale[scale == 0] = 1.0
+            X -= mean
+            X /= scale
+            pool = {"edition": np.concatenate(edition_of), "entry": np.concatenate(entry_of),
+                    "row": np.concatenate(row_of), "index": MetricIndex(X), "features": features, "mean": mean, "scale": scale}
+            s.set(rows=len(X))
+
+        self._pools[key] = pool
+        return pool
+
+    def clear_cache(self):
+        """Drop the cached pools and name lookups (their memory is not counted in nbytes)."""
+        self._pools.clear()
+        self._name_rows.clear()
+
+    def search(self, player, from_edition, to_editions=None, player_role: str = None, top_n: int = 10,
+               metric: str = "cosine", weights: dict = None, exclude_self: bool = True):
+        """
+        Find the players in `to_editions` most similar to a player as they were in `from_edition`.
+
+        "Who in FIFA 22 is most similar to FIFA 17 Özil":
+            store.search("M. Özil", 17, 22, "cam")
+
+        The query is the player's row in `from_edition`, standardized with the
+        target pool's statistics, and the whole target pool (all requested
+        editions at once) is scored in one pass.
+
+        Args:
+            player (int or str): sofifa_id, or exact 'short_name' in from_edition.
+            from_edition (int): Edition the reference player is taken from.
+            to_editions (int or iterable): Edition(s) to search; all loaded editions when not given.
+            player_role (str): Key in role_profiles; inferred from the player's primary position when not given.
+            top_n (int): Number of similar players to return.
+            metric (str): 'cosine', 'euclidean', 'mahalanobis' or 'manhattan'.
+            weights (dict): Per-feature weight overrides on top of the role profile.
+            exclude_self (bool): Leave the reference player (any edition) out of the results.
+
+        Returns:
+            DataFrame: sofifa_id, short_name, edition and 'similarity' (cosine) or 'distance', closest first.
+
+        Raises:
+            ValueError: Unknown edition or role, or the player is not in from_edition.
+        """
+        import pandas as pd
+
+        entries = self.find(player, from_edition)
+        if len(entries) == 0:
+            raise ValueError(f"{player} not found in edition {from_edition}.")
+        entry = int(entries[0])
+        if player_role is None:
+            player_role = self.default_role(entry, from_edition)
+        if player_role not in role_profiles:
+            raise ValueError(f"Unknown role: '{player_role}'")
+
+        if to_editions is None:
+            to_editions = tuple(self.editions)
+        elif isinstance(to_editions, (int, np.integer)):
+            to_editions = (int(to_editions),)
+
+        group = role_group(player_role)
+        pool = self.pool(to_editions, group)
+        query = self.matrix_row(entry, from_edition)[pool["features"]]
+        if np.isnan(query).any():
+            raise ValueError(f"{player} has missing {group} features in edition {from_edition}.")
+        query = (query - pool["mean"]) / pool["scale"]
+
+        weights_dict = resolve_weights(player_role, weights)
+        feature_list = KEEPER_FEATURES if group == "gk" else OUTFIELD_FEATURES
+        weight_vector = None if not weights_dict else np.array([weights_dict.get(f, 0.0) for f in feature_list])
+
+        exclude = None
+        if exclude_self:
+            exclude = np.flatnonzero(pool["row"] == self._edition(from_edition).rows[entry])
+
+        with span("editions.similarity", role=player_role, metric=metric, rows=len(pool["index"])):
+            top_indices, distances = pool["index"].search(query, metric=metric, top_n=top_n, exclude=exclude,
+                                                          weights=weight_vector)
+
+        result_editions, result_entries = pool["edition"][top_indices], pool["entry"][top_indices]
+        rows = pool["row"][top_indices]
+        names = [self.entry_name(int(i), int(e)) for e, i in zip(result_editions, result_entries)]
+        score_column = "similarity" if metric == "cosine" else "distance"
+        return pd.DataFrame({"sofifa_id": self.ids[rows], "short_name": names, "edition": result_editions,
+                             score_column: 1.0 - distances if metric == "cosine" else distances})
+
+
+def load_editions(editions=EDITIONS, path_pattern=EDITION_PATH):
+    """Shorthand for EditionStore.load()."""
+    return EditionStore.load(editions, path_pattern)
@@ -1,8 +1,11 @@
 import numpy as np
-from sklearn.metrics.pairwise import cosine_similarity
-import pandas as pd
 
-def find_similar_goalkeepers(keeper_df, X_keeper_scaled, target_name, top_n=5):
+from search_functions.metrics import MetricIndex
+from search_functions.tracing import span
+
+
+def find_similar_goalkeepers(keeper_df, X_keeper_scaled, target_name, top_n=5, metric="cosine", index=None,
+                             weights_dict=None, feature_list=None, rows=None):
     """
     Find the most similar goalkeepers to a target player based on feature similarity.
 
@@ -11,25 +14,44 @@ def find_similar_goalkeepers(keeper_df, X_keeper_scaled, target_name, top_n=5):
         X_keeper_scaled (np.ndarray): Scaled feature matrix for keepers.
         target_name (str): Name of the keeper to find similar players to.
         top_n (int): Number of similar players to return.
+        metric (str): 'cosine', 'euclidean', 'mahalanobis' or 'manhattan'.
+        index (MetricIndex): Prebuilt index over X_keeper_scaled (reuses cached norms).
+        weights_dict (dict): Optional per-feature weights, applied on the query side.
+        feature_list (list): Feature names of the X_keeper_scaled columns, used with weights_dict
+            (default: unified_search.KEEPER_FEATURES, the columns build_search_index uses).
+        rows (np.ndarray): Only consider these row positions of keeper_df as results (all rows when not given).
 
     Returns:
-        pd.DataFrame: Top N similar players (name + similarity score).
+        pd.DataFrame: Top N similar players (name + similarity score, or distance for non-cosine metrics).
     """
-    # Find index of the target player
-    if target_name not in keeper_df["short_name"].values:
+    # Find position of the target player
+    target_positions = np.flatnonzero(keeper_df["short_name"].to_numpy() == target_name)
+    if len(target_positions) == 0:
         raise ValueError(f"{target_name} not found in dataset.")
 
-    target_idx = keeper_df[keeper_df["short_name"] == target_name].index[0]
-    target_vector = X_keeper_scaled[target_idx].reshape(1, -1)
+    if index is None:
+        index = MetricIndex(X_keeper_scaled)
 
-    # Calculate cosine similarity
-    similarities = cosine_similarity(target_vector, X_keeper_scaled)[0]
+    weights = None
+    if weights_dict:
+        if feature_list is None:
+            # Imported here: unified_search imports this module
+            from search_functions.unified_search import KEEPER_FEATURES
+            feature_list = KEEPER_FEATURES
+        if len(feature_list) != index.X.shape[1]:
+            raise ValueError(f"feature_list has {len(feature_list)} names but the keeper matrix has "
+                             f"{index.X.shape[1]} columns; pass the feature_list it was built from.")
+        weights = np.array([weights_dict.get(f, 0.0) for f in feature_list])
 
     # Get top N most similar (excluding the player themselves)
-    top_indices = similarities.argsort()[::-1]
-    top_indices = [i for i in top_indices if i != target_idx][:top_n]
+    with span("gk.top_k", metric=metric, top_n=top_n, rows=len(index) if rows is None else len(rows)):
+        top_indices, distances = index.search(target_positions[0], metric=metric, top_n=top_n,
+                                              exclude=target_positions[:1], weights=weights, rows=rows)
 
     similar_players = keeper_df.iloc[top_indices][["short_name"]].copy()
-    similar_players["similarity"] = similarities[top_indices]
+    if metric == "cosine":
+        similar_players["similarity"] = 1.0 - distances
+    else:
+        similar_players["distance"] = distances
 
-    return similar_players
\ No newline at end of file
+    return similar_players
@@ -0,0 +1,258 @@
+# metrics.py
+
+import numpy as np
+
+METRICS = ("cosine", "euclidean", "mahalanobis", "manhattan")
+
+# Number of distinct row subsets (e.g. position filters) a MetricIndex keeps gathered
+SUBSET_CACHE_SIZE = 32
+
+
+def top_k(values, k, exclude=None):
+    """
+    Return the indices of the k smallest values, ordered smallest first.
+
+    Args:
+        values (np.ndarray): 1-D array of distances.
+        k (int): Number of indices to return.
+        exclude (array-like): Indices that must never be returned (e.g. the query player).
+
+    Returns:
+        np.ndarray: Indices into `values`.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    if exclude is not None and len(exclude) > 0:
+        values = values.copy()
+        values[np.asarray(exclude)] = np.inf
+
+    n_valid = len(values) - (0 if exclude is None else len(np.unique(exclude)))
+    k = max(min(k, n_valid), 0)
+    if k == 0:
+        return np.empty(0, dtype=np.int64)
+
+    candidates = np.argpartition(values, k - 1)[:k] if k < len(values) else np.arange(len(values))
+    return candidates[np.argsort(values[candidates], kind="stable")]
+
+
+class MetricIndex:
+    """
+    Cached feature matrix that can be scored with several distance metrics.
+
+    Everything a metric needs beyond the matrix itself (row norms, squared
+    norms, element-wise squares, the whitening transform for Mahalanobis) is
+    computed on first use and reused by every later query, so comparing
+    metrics on the same data costs a single preprocessing pass per metric.
+
+    Feature weights are applied per query rather than baked into the matrix.
+    Scoring against X * w only needs X @ (w**2 * q) and the weighted row norms
+    (X**2) @ w**2, so a custom-weight query costs the same two matrix-vector
+    products as an unweighted one.
+
+    Args:
+        X (np.ndarray): Feature matrix (players x features), already scaled.
+        X_sq (np.ndarray): Optional precomputed X**2 (e.g. memory-mapped and shared between processes).
+        sq_norms (np.ndarray): Optional precomputed squared row norms.
+    """
+
+    def __init__(self, X, X_sq=None, sq_norms=None):
+        self.X = np.ascontiguousarray(X, dtype=np.float64)
+        self._sq_norms = sq_norms
+        self._norms = None
+        self._X_sq = X_sq
+        self._whitening = {}
+        self._subsets = {}
+
+    def __len__(self):
+        return self.X.shape[0]
+
+    @property
+    def sq_norms(self):
+        if self._sq_norms is None:
+            self._sq_norms = np.einsum("ij,ij->i", self.X, self.X)
+        return self._sq_norms
+
+    @property
+    def norms(self):
+        if self._norms is None:
+            self._norms = np.sqrt(self.sq_norms)
+        return self._norms
+
+    @property
+    def X_sq(self):
+        """Element-wise squared matrix, used for weighted row norms."""
+        if self._X_sq is None:
+            self._X_sq = self.X * self.X
+        return self._X_sq
+
+    def weighted_sq_norms(self, weights):
+        """Squared row norms of X * weights, in one pass over the cached squares."""
+        if weights is None:
+            return self.sq_norms
+        return self.X_sq @ (weights * weights)
+
+    def whitening(self, features=None):
+        """
+        (features, mean, transform, whitened matrix, whitened squared norms) for Mahalanobis.
+
+        Cached per feature subset, since only the set of used features matters:
+        the Mahalanobis distance does not change when features are rescaled.
+        """
+        features = np.arange(self.X.shape[1]) if features is None else np.asarray(features)
+        key = features.tobytes()
+        if key not in self._whitening:
+            X = self.X[:, features]
+            mean = X.mean(axis=0)
+            covariance = np.atleast_2d(np.cov(X, rowvar=False))
+            eigenvalues, eigenvectors = np.linalg.eigh(covariance)
+
+            # Drop (near) singular directions, e.g. constant features
+            keep = eigenvalues > eigenvalues.max() * 1e-10
+            transform = eigenvectors[:, keep] / np.sqrt(eigenvalues[keep])
+
+            X_white = (X - mean) @ transform
+            self._whitening[key] = (features, mean, transform, X_white,
+                                    np.einsum("ij,ij->i", X_white, X_white))
+        return self._whitening[key]
+
+    def _query_vector(self, query):
+        if np.isscalar(query):
+            return self.X[int(query)]
+        return np.asarray(query, dtype=np.float64).ravel()
+
+    def _subset(self, rows):
+        """
+        Cached arrays for a row subset, gathered once so repeated queries on the
+        same subset scan a contiguous matrix of only those rows.
+        """
+        key = np.asarray(rows).tobytes()
+        subset = self._subsets.get(key)
+        if subset is None:
+            subset = self._subsets[key] = {"X": np.ascontiguousarray(self.X[rows])}
+            while len(self._subsets) > SUBSET_CACHE_SIZE:
+                self._subsets.pop(next(iter(self._subsets)), None)
+        return subset
+
+    def _row_sq_norms(self, w, rows):
+        if rows is None:
+            return self.weighted_sq_norms(w)
+        subset = self._subset(rows)
+        if w is None:
+            if "sq_norms" not in subset:
+                subset["sq_norms"] = self.sq_norms[rows]
+            return subset["sq_norms"]
+        if "X_sq" not in subset:
+            subset["X_sq"] = subset["X"] * subset["X"]
+        return subset["X_sq"] @ (w * w)
+
+    def distances(self, query, metric="cosine", weights=None, rows=None):
+        """
+        Distance from the query to every row of the cached matrix.
+
+        Args:
+            query (int or np.ndarray): Row index in the matrix or an (unweighted) feature vector.
+            metric (str): One of METRICS.
+            weights (np.ndarray): Per-feature weights, equivalent to scoring X * weights.
+                For Mahalanobis only the non-zero pattern matters.
+            rows (np.ndarray): Only score these rows (e.g. players eligible for a position).
+                Statistics such as the Mahalanobis whitening still come from the whole matrix.
+
+        Returns:
+            np.ndarray: One distance per row, or per entry of `rows` (cosine distance is 1 - cosine similarity).
+        """
+        q = self._query_vector(query)
+        w = None if weights is None else np.asarray(weights, dtype=np.float64)
+        X = self.X if rows is None else self._subset(rows)["X"]
+
+        if metric in ("cosine", "euclidean"):
+            q_weighted = q if w is None else q * w * w
+            dot = X @ q_weighted
+            row_sq_norms = self._row_sq_norms(w, rows)
+            q_sq_norm = q @ q_weighted
+
+            if metric == "cosine":
+                denominator = np.sqrt(row_sq_norms * q_sq_norm)
+                similarities = np.divide(dot, denominator, out=np.zeros(len(X)), where=denominator > 0)
+                return 1.0 - similarities
+
+            return np.sqrt(np.maximum(row_sq_norms + q_sq_norm - 2.0 * dot, 0.0))
+
+        if metric == "mahalanobis":
+            features = None if w is None else np.flatnonzero(w)
+            features, mean, transform, X_white, white_sq_norms = self.whitening(features)
+            if rows is not None:
+                subset = self._subset(rows)
+                key = ("white", features.tobytes())
+                if key not in subset:
+                    subset[key] = (np.ascontiguousarray(X_white[rows]), white_sq_norms[rows])
+                X_white, white_sq_norms = subset[key]
+            q_white = (q[features] - mean) @ transform
+            sq_distances = white_sq_norms + q_white @ q_white - 2.0 * (X_white @ q_white)
+            return np.sqrt(np.maximum(sq_distances, 0.0))
+
+        if metric == "manhattan":
+            if w is None:
+                return np.abs(X - q).sum(axis=1)
+            return np.abs(X - q) @ np.abs(w)
+
+        raise ValueError(f"Unknown metric: '{metric}'. Choose one of {METRICS}")
+
+    def batch_distances(self, queries, metric="cosine", weights=None, rows=None):
+        """
+        Distances from several queries (sharing one weight profile) to every row.
+
+        Cosine and Euclidean turn the batch into one matrix-matrix product
+        X @ (Q * w**2).T instead of one matrix-vector product per query.
+
+        Args:
+            queries (array-like): Row indices in the matrix or a (queries x features) matrix.
+            rows (np.ndarray): Only score these rows (see distances).
+
+        Returns:
+            np.ndarray: (queries x rows) distances.
+        """
+        queries = np.asarray(queries)
+        Q = self.X[queries] if queries.ndim == 1 else np.asarray(queries, dtype=np.float64)
+        w = None if weights is None else np.asarray(weights, dtype=np.float64)
+
+        if metric in ("cosine", "euclidean"):
+            X = self.X if rows is None else self._subset(rows)["X"]
+            Q_weighted = Q if w is None else Q * (w * w)
+            dots = Q_weighted @ X.T
+            row_sq_norms = self._row_sq_norms(w, rows)
+            q_sq_norms = np.einsum("ij,ij->i", Q, Q_weighted)
+
+            # In place on the (queries x rows) product to avoid large temporaries
+            if metric == "cosine":
+                row_norms, q_norms = np.sqrt(row_sq_norms), np.sqrt(q_sq_norms)
+                inverse_rows = np.divide(1.0, row_norms, out=np.zeros_like(row_norms), where=row_norms > 0)
+                inverse_queries = np.divide(1.0, q_norms, out=np.zeros_like(q_norms), where=q_norms > 0)
+                dots *= inverse_queries[:, None]
+                dots *= inverse_rows[None, :]
+                return np.subtract(1.0, dots, out=dots)
+
+            dots *= -2.0
+            dots += q_sq_norms[:, None]
+            dots += row_sq_norms[None, :]
+            np.maximum(dots, 0.0, out=dots)
+            return np.sqrt(dots, out=dots)
+
+        return np.vstack([self.distances(q, metric=metric, weights=w, rows=rows) for q in Q])
+
+    def search(self, query, metric="cosine", top_n=5, exclude=None, weights=None, rows=None):
+        """
+        Return the top_n closest rows to the query.
+
+        Args:
+            rows (np.ndarray): Only consider these (sorted) rows as results; see distances.
+
+        Returns:
+            tuple: (indices, distances) ordered closest first; indices are rows of the whole matrix.
+        """
+        distances = self.distances(query, metric=metric, weights=weights, rows=rows)
+        if rows is None:
+            indices = top_k(distances, top_n, exclude=exclude)
+            return indices, distances[indices]
+
+        local_exclude = None if exclude is None else np.flatnonzero(np.isin(rows, exclude))
+        local = top_k(distances, top_n, exclude=local_exclude)
+        return rows[local], distances[local]
@@ -1,11 +1,13 @@
-import pandas as pd
-from sklearn.preprocessing import StandardScaler
-from sklearn.metrics.pairwise import cosine_similarity
 import numpy as np
 
-def find_similar_outfield_players(player_name, dataset, feature_list, weights_dict=None, top_n=5):
+from search_functions.metrics import MetricIndex
+from search_functions.tracing import span
+
+
+def find_similar_outfield_players(player_name, dataset, feature_list, weights_dict=None, top_n=5,
+                                  metric="cosine", index=None, rows=None):
     """
-    Finds the top N most similar outfield players to the given player using cosine similarity.
+    Finds the top N most similar outfield players to the given player.
 
     Args:
         player_name (str): Name of the reference player (must be exact match in 'short_name' column)
@@ -13,36 +15,47 @@ def find_similar_outfield_players(player_name, dataset, feature_list, weights_di
         feature_list (list): List of features used for similarity calculation
         weights_dict (dict): Dictionary of weights per feature (e.g. role profile). Keys = feature names
         top_n (int): Number of similar players to return
+        metric (str): 'cosine', 'euclidean', 'mahalanobis' or 'manhattan'
+        index (MetricIndex): Prebuilt index over the scaled (unweighted) features in
+            `feature_list`, row-aligned with `dataset`. Built from `dataset` when not given.
+        rows (np.ndarray): Only consider these row positions of `dataset` as results
+            (e.g. players eligible for a position); all rows when not given.
 
     Returns:
-        DataFrame: Top N most similar players
+        DataFrame: Top N most similar players ('similarity' for cosine, 'distance' otherwise)
     """
 
-    # Standardize the features
-    scaler = StandardScaler()
-    X_scaled = scaler.fit_transform(dataset[feature_list])
+    if index is None:
+        # Standardize the features
+        from sklearn.preprocessing import StandardScaler
+        scaler = StandardScaler()
+        X_scaled = scaler.fit_transform(dataset[feature_list])
+        index = MetricIndex(X_scaled)
 
-    # Apply weights if a profile is given (e.g., CAM, CB, etc.)
+    # Weights (e.g. CAM, CB or a custom profile) are applied on the query side,
+    # so the cached matrix is shared by every weight profile
+    weights = None
     if weights_dict:
         weights = np.array([weights_dict.get(f, 0.0) for f in feature_list])
-        X_scaled = X_scaled * weights
 
-    # Get the player index
-    player_index = dataset[dataset["short_name"] == player_name].index
+    # Get the player position(s) in the matrix
+    player_positions = np.flatnonzero(dataset["short_name"].to_numpy() == player_name)
 
-    if player_index.empty:
+    if len(player_positions) == 0:
+        import pandas as pd
         print(f"Player '{player_name}' not found in dataset.")
         return pd.DataFrame()
 
-    # Calculate cosine similarity
-    similarities = cosine_similarity(X_scaled[player_index], X_scaled).flatten()
+    # Score against every player, skipping the player themselves
+    with span("outfield.top_k", metric=metric, top_n=top_n, rows=len(index) if rows is None else len(rows)):
+        top_indices, distances = index.search(player_positions[0], metric=metric, top_n=top_n,
+                                              exclude=player_positions, weights=weights, rows=rows)
 
     # Create result DataFrame
-    similarity_df = dataset[["short_name"]].copy()
-    similarity_df["similarity"] = similarities
-
-    # Remove the player themselves
-    similarity_df = similarity_df[dataset["short_name"] != player_name]
+    similarity_df = dataset.iloc[top_indices][["short_name"]].copy()
+    if metric == "cosine":
+        similarity_df["similarity"] = 1.0 - distances
+    else:
+        similarity_df["distance"] = distances
 
-    # Return top N
-    return similarity_df.sort_values(by="similarity", ascending=False).head(top_n)
\ No newline at end of file
+    return similarity_df
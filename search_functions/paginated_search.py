@@ -0,0 +1,257 @@
+# paginated_search.py
+
+import secrets
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from search_functions import unified_search
+from search_functions.role_profiles import role_profiles
+
+
+class CursorExpired(LookupError):
+    """The cursor is unknown, timed out or was evicted to stay within the memory budget."""
+
+
+class RankedResults:
+    """
+    All players of a pool ranked by similarity to one query, served a page at a time.
+
+    Distances to the whole pool are computed once. Ranking is incremental: a
+    sorted frontier block is cut from the unsorted remainder with
+    argpartition, and pages are sliced from it; when it runs out the next
+    block (twice as large) is selected from what is left. Page k therefore
+    costs a slice, plus an occasional O(remaining) selection, instead of
+    re-sorting the pool for a larger top_n. Within the ranking, ties are
+    ordered by row.
+
+    Args:
+        distances (np.ndarray): Distance from the query to every row of the pool.
+        exclude (array-like): Rows never returned (the query player).
+        names (np.ndarray): 'short_name' per row.
+        labels (pd.Index or np.ndarray): Dataset index label per row.
+        metric (str): Metric the distances were computed with ('cosine' results show similarity).
+        first_block (int): Size of the first sorted block.
+    """
+
+    def __init__(self, distances, exclude, names, labels, metric="cosine", first_block=64):
+        self.distances = np.asarray(distances, dtype=np.float64)
+        keep = np.ones(len(self.distances), dtype=bool)
+        keep[np.asarray(exclude, dtype=np.int64)] = False
+        row_dtype = np.int32 if len(self.distances) < 2 ** 31 else np.int64
+        self._remaining = np.flatnonzero(keep).astype(row_dtype)
+        self._block = np.empty(0, dtype=row_dtype)
+        self._block_size = first_block
+        self._position = 0
+        self.served = 0
+        self.names = names
+        self.labels = labels
+        self.metric = metric
+
+    def __len__(self):
+        """Number of rankable rows (the pool minus excluded rows)."""
+        return self.served + len(self._block) - self._position + len(self._remaining)
+
+    @property
+    def exhausted(self):
+        return self._position >= len(self._block) and len(self._remaining) == 0
+
+    @property
+    def nbytes(self):
+        """Memory held by this ranking (distances plus row bookkeeping)."""
+        return self.distances.nbytes + self._remaining.nbytes + self._block.nbytes
+
+    def _next_block(self):
+        remaining = self._remaining
+        k = min(self._block_size, len(remaining))
+        if k < len(remaining):
+            values = self.distances[remaining]
+            part = np.argpartition(values, k - 1)
+            block, rest = remaining[part[:k]], remaining[part[k:]]
+        else:
+            block, rest = remaining, remaining[:0]
+        self._block = block[np.lexsort((block, self.distances[block]))]
+        self._remaining = rest
+        self._position = 0
+        self._block_size *= 2
+
+    def next_rows(self, n):
+        """Row positions and distances of the next n results (fewer at the end)."""
+        parts = []
+        while n > 0 and not self.exhausted:
+            if self._position >= len(self._block):
+                self._next_block()
+            take = self._block[self._position:self._position + n]
+            self._position += len(take)
+            n -= len(take)
+            parts.append(take)
+        rows = np.concatenate(parts) if parts else np.empty(0, dtype=np.int64)
+        self.served += len(rows)
+        return rows, self.distances[rows]
+
+    def next_page(self, page_size=20):
+        """The next page as a DataFrame, in the format of search_players."""
+        import pandas as pd
+
+        rows, distances = self.next_rows(page_size)
+        score_column = "similarity" if self.metric == "cosine" else "distance"
+        return pd.DataFrame({"short_name": self.names[rows],
+                             score_column: 1.0 - distances if self.metric == "cosine" else distances},
+                            index=self.labels[rows])
+
+
+def rank_players(player_name: str, player_role: str, metric: str = "cosine", weights: dict = None,
+                 positions=None):
+    """
+    Compute one query's distances to its pool and return them as a RankedResults.
+
+    Same arguments, pool and exclusion rules as search_players. With
+    `positions`, only the eligible rows are scored and ranked.
+
+    Raises:
+        ValueError: Unknown role or feature.
+        LookupError: The player is not in the role's pool.
+    """
+    if player_role not in role_profiles:
+        raise ValueError(f"Unknown role: '{player_role}'")
+
+    group = unified_search.role_group(player_role)
+    pool_df, feature_list, index = unified_search.build_search_index(group)
+    name_rows = unified_search.player_positions(group).get(player_name)
+    if name_rows is None:
+        raise LookupError(f"{player_name} not found in dataset.")
+
+    weights_dict = unified_search.resolve_weights(player_role, weights)
+    weight_vector = None if not weights_dict else np.array([weights_dict.get(f, 0.0) for f in feature_list])
+    exclude = name_rows[:1] if group == "gk" else name_rows
+    names, labels = pool_df["short_name"].to_numpy(), pool_df.index
+    rows = None if positions is None else unified_search.eligible_pool_rows(group, positions)
+    distances = index.distances(int(name_rows[0]), metric=metric, weights=weight_vector, rows=rows)
+    if rows is not None:
+        exclude = np.flatnonzero(np.isin(rows, exclude))
+        names, labels = names[rows], labels[rows]
+    return RankedResults(distances, exclude, names, labels, metric=metric)
+
+
+def iter_pages(player_name: str, player_role: str, page_size: int = 20, metric: str = "cosine",
+               weights: dict = None, positions=None):
+    """
+    Yield result pages (DataFrames of up to page_size rows) lazily until the pool is exhausted.
+
+    With `positions`, only players eligible for one of these positions are paged (see rank_players).
+
+    Example:
+        pages = iter_pages("K. De Bruyne", "cam")
+        first = next(pages)
+        second = next(pages)
+    """
+    ranking = rank_players(player_name, player_role, metric=metric, weights=weights, positions=positions)
+    while not ranking.exhausted:
+        yield ranking.next_page(page_size)
+
+
+class CursorStore:
+    """
+    Open rankings addressed by opaque cursor tokens, for stateless clients (UI, HTTP).
+
+    A cursor keeps its ranking (about 12 bytes per pool row) until it is read
+    to the end, is idle for longer than `ttl` seconds, or is evicted: when the
+    cursors together exceed `memory_budget` bytes, the least recently used
+    ones are dropped first. A cursor also expires when the dataset is
+    reloaded. Reading an expired cursor raises CursorExpired (a LookupError);
+    the client starts again with open().
+
+    Args:
+        memory_budget (int): Bytes all open rankings may use together.
+        ttl (float): Seconds a cursor may stay unused.
+    """
+
+    def __init__(self, memory_budget=256 * 1024 ** 2, ttl=600.0):
+        self.memory_budget = memory_budget
+        self.ttl = ttl
+        self.nbytes = 0
+        self.stats = {"opened": 0, "pages": 0, "evicted": 0, "expired": 0}
+        self._cursors = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._cursors)
+
+    def open(self, player_name: str, player_role: str, page_size: int = 20, metric: str = "cosine",
+             weights: dict = None, positions=None):
+        """
+        Start a paginated search (same arguments as rank_players).
+
+        Returns:
+            tuple: (first page DataFrame, cursor token for the next page or None if there is none)
+        """
+        ranking = rank_players(player_name, player_role, metric=metric, weights=weights, positions=positions)
+        page = ranking.next_page(page_size)
+        with self._lock:
+            self.stats["opened"] += 1
+            self.stats["pages"] += 1
+            if ranking.exhausted:
+                return page, None
+            token = secrets.token_urlsafe(16)
+            self._cursors[token] = (ranking, page_size, unified_search.dataset_version, time.monotonic())
+            self.nbytes += ranking.nbytes
+            self._evict()
+        return page, token
+
+    def next(self, token, page_size=None):
+        """
+        The page after the one last returned for this cursor.
+
+        Args:
+            token (str): Cursor from open() or a previous next().
+            page_size (int): Override the page size the cursor was opened with.
+
+        Returns:
+            tuple: (page DataFrame, the same token, or None once the results are exhausted)
+        """
+        with self._lock:
+            self._expire()
+            entry = self._cursors.pop(token, None)
+            if entry is None:
+                raise CursorExpired(f"Unknown or expired cursor: {token}")
+            ranking, default_size, _, _ = entry
+            self.nbytes -= ranking.nbytes
+
+        # Only the holder of the token pages this ranking, so the selection runs outside the lock
+        page = ranking.next_page(page_size or default_size)
+        with self._lock:
+            self.stats["pages"] += 1
+            if ranking.exhausted:
+                return page, None
+            self._cursors[token] = (ranking, default_size, unified_search.dataset_version, time.monotonic())
+            self.nbytes += ranking.nbytes
+            self._evict()
+        return page, token
+
+    def close(self, token):
+        """Release a cursor early (e.g. the user left the page)."""
+        with self._lock:
+            entry = self._cursors.pop(token, None)
+            if entry is not None:
+                self.nbytes -= entry[0].nbytes
+
+    def _expire(self):
+        now = time.monotonic()
+        stale = [token for token, (_, _, version, used) in self._cursors.items()
+                 if now - used > self.ttl or version != unified_search.dataset_version]
+        for token in stale:
+            self.nbytes -= self._cursors.pop(token)[0].nbytes
+        self.stats["expired"] += len(stale)
+
+    def _evict(self):
+        self._expire()
+        while self.nbytes > self.memory_budget and len(self._cursors) > 1:
+            _, (ranking, _, _, _) = self._cursors.popitem(last=False)
+            self.nbytes -= ranking.nbytes
+            self.stats["evicted"] += 1
+
+
+# Shared default store
+cursor_store = CursorStore()
@@ -0,0 +1,86 @@
+# positions.py
+
+import numpy as np
+
+# FIFA 'player_positions' codes; position i is bit i of a player's position mask
+POSITIONS = ("GK", "CB", "LB", "RB", "LWB", "RWB", "CDM", "CM", "CAM", "LM", "RM", "LW", "RW", "CF", "ST")
+POSITION_BITS = {code: 1 << i for i, code in enumerate(POSITIONS)}
+
+# Primary position code for rows without a (known) position
+NO_POSITION = -1
+
+
+def position_mask(positions):
+    """
+    Bitmask of one or more position codes.
+
+    Args:
+        positions (str, iterable or int): 'LB, LWB' (as in 'player_positions'), ['LB', 'LWB']
+            or an already combined mask (returned as is).
+
+    Returns:
+        int: OR of the position bits.
+
+    Raises:
+        ValueError: Unknown position code.
+    """
+    if isinstance(positions, (int, np.integer)):
+        return int(positions)
+    if isinstance(positions, str):
+        positions = positions.split(",")
+    mask = 0
+    for code in positions:
+        code = code.strip().upper()
+        if code not in POSITION_BITS:
+            raise ValueError(f"Unknown position: '{code}'. Choose from {POSITIONS}")
+        mask |= POSITION_BITS[code]
+    return mask
+
+
+def parse_positions(values):
+    """
+    Parse a 'player_positions' column into position masks and primary positions.
+
+    Only the distinct strings are parsed (a few hundred in the FIFA data,
+    whatever the number of players); rows are then filled by indexing, so the
+    column is scanned once. Unknown codes are ignored.
+
+    Args:
+        values (array-like): 'player_positions' strings, e.g. 'RW, LW, ST' (NaN allowed).
+
+    Returns:
+        tuple: (masks, primary) with masks a uint16 array of position bits and
+        primary the index in POSITIONS of the first listed position (NO_POSITION if none), per row.
+    """
+    values = np.asarray(values, dtype=object)
+    present = np.array([isinstance(v, str) for v in values], dtype=bool)
+    masks = np.zeros(len(values), dtype=np.uint16)
+    primary = np.full(len(values), NO_POSITION, dtype=np.int8)
+    if not present.any():
+        return masks, primary
+
+    distinct, inverse = np.unique(values[present].astype(str), return_inverse=True)
+    distinct_masks = np.zeros(len(distinct), dtype=np.uint16)
+    distinct_primary = np.full(len(distinct), NO_POSITION, dtype=np.int8)
+    for i, text in enumerate(distinct):
+        codes = [code.strip().upper() for code in text.split(",")]
+        known = [code for code in codes if code in POSITION_BITS]
+        for code in known:
+            distinct_masks[i] |= POSITION_BITS[code]
+        if known:
+            distinct_primary[i] = POSITIONS.index(known[0])
+
+    masks[present] = distinct_masks[inverse]
+    primary[present] = distinct_primary[inverse]
+    return masks, primary
+
+
+def eligible_rows(masks, positions):
+    """
+    Row positions whose mask shares at least one bit with the wanted positions.
+
+    Args:
+        masks (np.ndarray): Position masks from parse_positions.
+        positions (str, iterable or int): Position codes (see position_mask) or a ready mask.
+    """
+    return np.flatnonzero(masks & np.uint16(position_mask(positions)))
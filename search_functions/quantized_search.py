@@ -0,0 +1,211 @@
+# quantized_search.py
+
+import os
+import time
+
+import numpy as np
+
+from search_functions.metrics import MetricIndex, top_k
+
+# Rows dequantized at a time in the first pass (keeps the float32 block in cache)
+BLOCK_ROWS = 16384
+
+
+class QuantizedIndex:
+    """
+    Two-stage search: an int8 first pass over the whole pool, exact re-ranking of the best candidates.
+
+    Every feature gets its own scale (max |x| / 127) and the matrix is stored
+    as int8 codes, 1 byte per feature per player instead of 8. The first pass
+    dequantizes one block of rows at a time into float32 and scores it, so
+    the scan reads 8x less memory. The top `rerank` candidates, plus any row
+    whose approximate distance is within `tolerance` of the exact k-th
+    distance, are then re-scored exactly against the full-precision matrix.
+
+    The full-precision matrix is only read at candidate rows. Given a .npy
+    path (as X or as `exact`), it is memory-mapped and stays out of RAM, so
+    only the codes (about 1 byte per feature) are resident. Given an
+    in-memory array and no `exact`, a float32 copy is kept for re-ranking:
+    the index then holds about 5 bytes per feature (int8 codes plus float32),
+    not 1; see resident_nbytes.
+
+    Supports 'cosine', 'euclidean' and 'manhattan'; for 'mahalanobis' use MetricIndex.
+
+    Args:
+        X (np.ndarray, MetricIndex or str): Scaled feature matrix (players x features),
+            or the path of a .npy file holding it (memory-mapped, also used for re-ranking).
+        rerank (int): Number of first-pass candidates re-scored exactly.
+        tolerance (float): Also re-score rows whose approximate distance is within
+            this margin of the exact k-th distance (0 = only the `rerank` candidates).
+        exact (np.ndarray or str): Optional full-precision matrix to re-rank with, or the
+            path of a .npy file holding it (memory-mapped). Default: the X file when X is
+            a path, else an in-memory float32 copy of X.
+    """
+
+    def __init__(self, X, rerank=256, tolerance=0.0, exact=None):
+        from_file = isinstance(X, (str, os.PathLike))
+        if from_file:
+            X = np.load(X, mmap_mode="r")
+        elif isinstance(X, MetricIndex):
+            X = X.X
+        else:
+            X = np.asarray(X)
+
+        # Block by block, so a memory-mapped X is never loaded whole
+        max_abs = np.zeros(X.shape[1], dtype=np.float64)
+        for start in range(0, len(X), BLOCK_ROWS):
+            max_abs = np.maximum(max_abs, np.abs(X[start:start + BLOCK_ROWS]).max(axis=0))
+        self.scale = np.where(max_abs > 0, max_abs / 127.0, 1.0).astype(np.float32)
+        self.codes = np.empty(X.shape, dtype=np.int8)
+        for start in range(0, len(X), BLOCK_ROWS):
+            block = np.rint(X[start:start + BLOCK_ROWS] / self.scale)
+            self.codes[start:start + BLOCK_ROWS] = np.clip(block, -127, 127)
+
+        if isinstance(exact, (str, os.PathLike)):
+            exact = np.load(exact, mmap_mode="r")
+        elif exact is None:
+            exact = X if from_file else np.asarray(X, dtype=np.float32)
+        self.exact = exact
+        self.rerank = rerank
+        self.tolerance = tolerance
+
+    def __len__(self):
+        return len(self.codes)
+
+    @property
+    def nbytes(self):
+        """Bytes used by the first-pass codes."""
+        return self.codes.nbytes + self.scale.nbytes
+
+    @property
+    def resident_nbytes(self):
+        """Bytes held in RAM: the codes, plus the re-ranking matrix unless it is memory-mapped."""
+        mapped = isinstance(self.exact, np.memmap)
+        return self.nbytes + (0 if mapped else self.exact.nbytes)
+
+    def _dequantize(self, start, stop):
+        block = self.codes[start:stop].astype(np.float32)
+        block *= self.scale
+        return block
+
+    def approximate_distances(self, q, metric="cosine", weights=None):
+        """First-pass distances to every row, computed block by block from the int8 codes."""
+        q = np.asarray(q, dtype=np.float32)
+        w = np.ones_like(q) if weights is None else np.asarray(weights, dtype=np.float32)
+        w_sq = w * w
+        q_weighted = q * w_sq
+        q_sq_norm = float(q @ q_weighted)
+
+        distances = np.empty(len(self), dtype=np.float32)
+        for start in range(0, len(self), BLOCK_ROWS):
+            stop = min(start + BLOCK_ROWS, len(self))
+            block = self._dequantize(start, stop)
+
+            if metric == "manhattan":
+                distances[start:stop] = np.abs(block - q) @ np.abs(w)
+                continue
+
+            dots = block @ q_weighted
+            block *= block
+            row_sq_norms = block @ w_sq
+            if metric == "cosine":
+                denominator = np.sqrt(row_sq_norms * q_sq_norm)
+                distances[start:stop] = 1.0 - np.divide(dots, denominator, out=np.zeros_like(dots),
+                                                        where=denominator > 0)
+            elif metric == "euclidean":
+                distances[start:stop] = np.sqrt(np.maximum(row_sq_norms + q_sq_norm - 2.0 * dots, 0.0))
+            else:
+                raise ValueError(f"Quantized search supports cosine, euclidean and manhattan, not '{metric}'")
+        return distances
+
+    def exact_distances(self, q, rows, metric="cosine", weights=None):
+        """Exact distances for a few rows, read from the full-precision matrix."""
+        index = MetricIndex(np.asarray(self.exact[np.sort(rows)], dtype=np.float64))
+        distances = index.distances(np.asarray(q, dtype=np.float64), metric=metric, weights=weights)
+        return distances[np.argsort(np.argsort(rows))]
+
+    def search(self, query, metric="cosine", top_n=5, exclude=None, weights=None, rows=None):
+        """
+        Return the top_n closest rows to the query (interface of MetricIndex.search).
+
+        Args:
+            rows (np.ndarray): Only consider these rows as results. The first pass
+                still scans every code; rows outside `rows` are never candidates.
+
+        Returns:
+            tuple: (indices, distances) ordered closest first, distances exact.
+        """
+        q = np.asarray(self.exact[int(query)] if np.isscalar(query) else query, dtype=np.float64).ravel()
+        approximate = self.approximate_distances(q, metric=metric, weights=weights)
+        if rows is not None:
+            ineligible = np.ones(len(self), dtype=bool)
+            ineligible[np.asarray(rows)] = False
+            approximate[ineligible] = np.inf
+
+        candidates = top_k(approximate, max(self.rerank, top_n), exclude=exclude)
+        candidates = candidates[np.isfinite(approximate[candidates])]
+        distances = self.exact_distances(q, candidates, metric=metric, weights=weights)
+
+        if self.tolerance > 0 and len(candidates) > top_n:
+            # Rows just outside the candidate list may still belong in the exact top_n
+            kth = np.partition(distances, top_n - 1)[top_n - 1]
+            extra = np.flatnonzero(approximate <= kth + self.tolerance)
+            extra = np.setdiff1d(extra, candidates)
+            if exclude is not None:
+                extra = np.setdiff1d(extra, exclude)
+            if len(extra):
+                candidates = np.concatenate([candidates, extra])
+                distances = np.concatenate([distances, self.exact_distances(q, extra, metric, weights)])
+
+        order = top_k(distances, top_n)
+        return candidates[order], distances[order]
+
+
+def recall_report(X, queries, top_n=10, metric="cosine", weights=None, rerank_sizes=(32, 64, 128, 256, 512),
+                  tolerance=0.0):
+    """
+    Measure how often the quantized search returns the exact top_n, per re-rank size.
+
+    Args:
+        X (np.ndarray): Scaled feature matrix.
+        queries (array-like): Row indices used as queries (each excluded from its own results).
+        top_n (int): Result size to compare.
+        rerank_sizes (tuple): Candidate counts to evaluate.
+
+    Returns:
+        pd.DataFrame: rerank, recall (share of exact top_n found), mean latency (ms) and memory per row.
+    """
+    import pandas as pd
+
+    exact_index = MetricIndex(X)
+    quantized = QuantizedIndex(X, tolerance=tolerance)
+
+    start = time.perf_counter()
+    truth = [set(exact_index.search(q, metric=metric, top_n=top_n, exclude=[q], weights=weights)[0].tolist())
+             for q in queries]
+    exact_ms = (time.perf_counter() - start) * 1000 / len(queries)
+
+    rows = []
+    for rerank in rerank_sizes:
+        quantized.rerank = rerank
+        start = time.perf_counter()
+        found = [quantized.search(q, metric=metric, top_n=top_n, exclude=[q], weights=weights)[0] for q in queries]
+        elapsed_ms = (time.perf_counter() - start) * 1000 / len(queries)
+        recall = np.mean([len(truth_set.intersection(result.tolist())) / max(len(truth_set), 1)
+                          for truth_set, result in zip(truth, found)])
+        rows.append((rerank, recall, elapsed_ms, exact_ms))
+
+    report = pd.DataFrame(rows, columns=["rerank", "recall", "quantized_ms", "exact_ms"])
+    report["bytes_per_row_scan"] = quantized.codes.shape[1]
+    report["bytes_per_row_exact"] = exact_index.X.shape[1] * exact_index.X.itemsize
+    return report
+
+
+if __name__ == "__main__":
+    import sys
+    from search_functions.unified_search import build_search_index
+
+    role_pool = sys.argv[1] if len(sys.argv) > 1 else "outfield"
+    pool_df, feature_list, index = build_search_index(role_pool)
+    sample = np.random.default_rng(0).choice(len(pool_df), size=min(200, len(pool_df)), replace=False)
+    print(recall_report(index.X, sample))
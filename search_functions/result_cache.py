@@ -0,0 +1,163 @@
+# result_cache.py
+
+from collections import OrderedDict
+
+from search_functions import unified_search
+from search_functions.paginated_search import rank_players
+from search_functions.positions import position_mask
+from search_functions.role_profiles import role_profiles
+
+
+class SearchResultCache:
+    """
+    LRU cache of search results, in front of search_players.
+
+    Entries are keyed by everything that shapes the result except top_n: the
+    dataset version, the role, the player's row in the pool (so every spelling
+    that resolves to the same row shares one entry), the metric, the fully
+    resolved weights and the position filter (as a bitmask, so 'LB, LWB' and
+    ['LWB', 'LB'] share one entry). Because the key holds the resolved weights rather than
+    the role name alone, editing role_profiles invalidates the affected
+    entries automatically, and reload_dataset() invalidates everything.
+
+    Each entry keeps the longest result list served so far and the query's
+    incremental ranking (paginated_search.RankedResults): a smaller top_n is
+    served by slicing the list, a larger one by pulling only the missing
+    rows from the ranking, without scoring the pool again. Rankings hold one
+    distance per pool row, so they are kept for the most recently used
+    entries only, within `ranking_budget` bytes; an entry whose ranking was
+    dropped recomputes the search once when asked for more rows.
+
+    Args:
+        maxsize (int): Maximum number of cached queries.
+        ranking_budget (int): Bytes the kept rankings may use together.
+    """
+
+    def __init__(self, maxsize=1024, ranking_budget=64 * 1024 ** 2):
+        self.maxsize = maxsize
+        self.ranking_budget = ranking_budget
+        self.hits = 0
+        self.misses = 0
+        self.extensions = 0
+        self.ranking_bytes = 0
+        self._entries = OrderedDict()
+        self._dataset_version = unified_search.dataset_version
+
+    def key(self, player_role, player_row, metric, weights, positions=None):
+        """Cache key for one query (top_n excluded, see class docstring)."""
+        resolved = unified_search.resolve_weights(player_role, weights)
+        weights_key = None if resolved is None else tuple(sorted(resolved.items()))
+        positions_key = None if positions is None else position_mask(positions)
+        return (unified_search.dataset_version, player_role, player_row, metric, weights_key, positions_key)
+
+    def get(self, key, top_n):
+        """
+        Cached result with at least top_n rows (or all rows that exist), else None.
+
+        A result shorter than top_n is extended from the entry's ranking when it still has one.
+        """
+        import pandas as pd
+
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        result, ranking = entry
+        if top_n > len(result) and not (ranking is not None and ranking.exhausted):
+            if ranking is None:
+                return None  # The ranking was dropped: the list cannot be extended
+            before = ranking.nbytes
+            result = pd.concat([result, ranking.next_page(top_n - len(result))])
+            # next_page() changes the ranking's size, so account for the difference, not the new total
+            self.ranking_bytes += ranking.nbytes - before
+            self.extensions += 1
+            self._entries[key] = (result, ranking)
+
+        self._entries.move_to_end(key)
+        return result.head(top_n).copy()
+
+    def put(self, key, result, ranking=None):
+        """Store a result list and, optionally, the ranking it was taken from."""
+        self._set(key, result, ranking)
+        while len(self._entries) > self.maxsize:
+            self._drop(*self._entries.popitem(last=False))
+        self._trim_rankings()
+
+    def _set(self, key, result, ranking):
+        if key in self._entries:
+            self._drop(key, self._entries[key])
+        self._entries[key] = (result, ranking)
+        self._entries.move_to_end(key)
+        if ranking is not None:
+            self.ranking_bytes += ranking.nbytes
+
+    def _drop(self, key, entry):
+        if entry[1] is not None:
+            self.ranking_bytes -= entry[1].nbytes
+
+    def _trim_rankings(self):
+        # Drop rankings (not results) from the least recently used entries until within budget
+        for key in list(self._entries):
+            if self.ranking_bytes <= self.ranking_budget:
+                break
+            result, ranking = self._entries[key]
+            if ranking is not None:
+                self.ranking_bytes -= ranking.nbytes
+                self._entries[key] = (result, None)
+
+    def clear(self):
+        self._entries.clear()
+        self.hits = self.misses = self.extensions = 0
+        self.ranking_bytes = 0
+
+    def info(self):
+        """Hit/miss counters, extensions served from kept rankings and current size."""
+        total = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "extensions": self.extensions,
+                "size": len(self._entries), "maxsize": self.maxsize, "ranking_bytes": self.ranking_bytes,
+                "hit_rate": self.hits / total if total else 0.0}
+
+    def search_players(self, player_name: str, player_role: str = None, top_n: int = 10, metric: str = "cosine",
+                       weights: dict = None, positions=None):
+        """
+        search_players with cached results (same arguments and return value).
+        """
+        if player_role is None:
+            player_role = unified_search.default_role(player_name)
+        if player_role not in role_profiles:
+            raise ValueError(f"Unknown role: '{player_role}'")
+        if unified_search.dataset_version != self._dataset_version:
+            # Entries for the old dataset can never be hit again
+            self._entries.clear()
+            self.ranking_bytes = 0
+            self._dataset_version = unified_search.dataset_version
+
+        rows = unified_search.player_positions(unified_search.role_group(player_role)).get(player_name)
+        if rows is None:
+            # Not cached: let search_players report the missing player as usual
+            return unified_search.search_players(player_name, player_role, top_n=top_n, metric=metric,
+                                                 weights=weights, positions=positions)
+
+        key = self.key(player_role, int(rows[0]), metric, weights, positions)
+        result = self.get(key, top_n)
+        if result is not None:
+            self.hits += 1
+            return result
+
+        self.misses += 1
+        ranking = rank_players(player_name, player_role, metric=metric, weights=weights, positions=positions)
+        result = ranking.next_page(top_n)
+        self.put(key, result, ranking)
+        return result.copy()
+
+
+# Shared default cache
+result_cache = SearchResultCache()
+
+
+def cached_search_players(player_name: str, player_role: str = None, top_n: int = 10, metric: str = "cosine",
+                          weights: dict = None, positions=None):
+    """
+    search_players through the shared LRU result cache (see SearchResultCache).
+    """
+    return result_cache.search_players(player_name, player_role, top_n=top_n, metric=metric, weights=weights,
+                                       positions=positions)
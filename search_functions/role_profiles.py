@@ -82,4 +82,41 @@ role_profiles = {
     "cm": cm_profile,
     "fullback": fullback_profile,
     "gk": None  # No weights needed for GK
-}
\ No newline at end of file
+}
+# Position-level role names (as listed in the README) share the profile of their role
+role_profiles.update({
+    "cf": st_profile,
+    "lw": winger_profile, "rw": winger_profile, "lm": winger_profile, "rm": winger_profile,
+    "lb": fullback_profile, "rb": fullback_profile, "lwb": fullback_profile, "rwb": fullback_profile,
+})
+
+# Positions (FIFA 'player_positions' codes) a player may hold to be eligible for a role
+role_positions = {
+    "cam": ["CAM"],
+    "cb": ["CB"],
+    "st": ["ST", "CF"],
+    "cf": ["CF", "ST"],
+    "winger": ["LW", "RW", "LM", "RM"],
+    "lw": ["LW", "LM"],
+    "rw": ["RW", "RM"],
+    "lm": ["LM", "LW"],
+    "rm": ["RM", "RW"],
+    "cdm": ["CDM"],
+    "cm": ["CM"],
+    "fullback": ["LB", "RB", "LWB", "RWB"],
+    "lb": ["LB", "LWB"],
+    "rb": ["RB", "RWB"],
+    "lwb": ["LWB", "LB"],
+    "rwb": ["RWB", "RB"],
+    "gk": ["GK"],
+}
+
+# Default role for a player's primary (first listed) position
+position_roles = {
+    "GK": "gk",
+    "CB": "cb",
+    "LB": "lb", "RB": "rb", "LWB": "lwb", "RWB": "rwb",
+    "CDM": "cdm", "CM": "cm", "CAM": "cam",
+    "LM": "lm", "RM": "rm", "LW": "lw", "RW": "rw",
+    "CF": "cf", "ST": "st",
+}
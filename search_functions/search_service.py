@@ -0,0 +1,280 @@
+# search_service.py
+
+import asyncio
+import json
+import sys
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from urllib.parse import parse_qs, urlsplit
+
+from search_functions.paginated_search import cursor_store
+from search_functions.positions import position_mask
+from search_functions.role_profiles import role_profiles
+from search_functions.unified_search import build_search_index, search_players_batch
+
+STATUS_TEXT = {200: "OK", 400: "Bad Request", 404: "Not Found", 500: "Internal Server Error", 503: "Service Unavailable"}
+
+
+class Overloaded(Exception):
+    """Raised when too many requests are already waiting; the client should retry later."""
+
+
+class SearchBatcher:
+    """
+    Coalesce concurrent search requests into batched similarity computations.
+
+    Requests with the same role, metric, weight overrides and positions that arrive within
+    `window` seconds share one call to search_players_batch, which runs in an
+    executor so the event loop keeps accepting connections. A batch is sent
+    early once it reaches `max_batch` requests. At most `max_pending` requests
+    may be queued or computing at once, paginated calls through run() included;
+    beyond that search() and run() raise Overloaded.
+
+    Args:
+        window (float): Seconds to wait for more requests before computing a batch.
+        max_batch (int): Largest number of requests in one batch.
+        max_pending (int): Backpressure limit on queued plus in-flight requests.
+        executor (Executor): Where the numeric work runs (default: 2 threads).
+    """
+
+    def __init__(self, window=0.005, max_batch=256, max_pending=2048, executor=None):
+        self.window = window
+        self.max_batch = max_batch
+        self.max_pending = max_pending
+        self.executor = executor or ThreadPoolExecutor(max_workers=2)
+        self.pending = 0
+        self.stats = {"requests": 0, "batches": 0, "rejected": 0}
+        self._buckets = {}
+
+    async def search(self, player_name, player_role, top_n=10, metric="cosine", weights=None, positions=None):
+        """
+        Same result as search_players, computed together with concurrent requests.
+
+        Raises:
+            ValueError: Unknown role, metric, feature or position.
+            LookupError: The player is not in the role's pool.
+            Overloaded: Too many requests are already pending.
+        """
+        if player_role not in role_profiles:
+            raise ValueError(f"Unknown role: '{player_role}'")
+        self._admit()
+
+        loop = asyncio.get_running_loop()
+        mask = None if positions is None else position_mask(positions)
+        key = (player_role, metric, tuple(sorted((weights or {}).items())), mask)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = []
+            loop.call_later(self.window, self._flush, key, bucket)
+
+        future = loop.create_future()
+        bucket.append((player_name, top_n, future))
+        self.pending += 1
+        self.stats["requests"] += 1
+        if len(bucket) >= self.max_batch:
+            self._flush(key, bucket)
+
+        try:
+            return await future
+        finally:
+            self.pending -= 1
+
+    async def run(self, call):
+        """
+        Run one blocking call in the executor, counted against the same pending limit as search().
+
+        Raises:
+            Overloaded: Too many requests are already pending.
+        """
+        self._admit()
+        self.pending += 1
+        self.stats["requests"] += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self.executor, call)
+        finally:
+            self.pending -= 1
+
+    def _admit(self):
+        if self.pending >= self.max_pending:
+            self.stats["rejected"] += 1
+            raise Overloaded(f"{self.pending} requests pending")
+
+    def _flush(self, key, bucket):
+        # The timer of a bucket that was already sent early must not flush its successor
+        if self._buckets.get(key) is bucket:
+            del self._buckets[key]
+            asyncio.ensure_future(self._run(key, bucket))
+
+    async def _run(self, key, bucket):
+        player_role, metric, weights, positions = key
+        names = [name for name, _, _ in bucket]
+        top_n = max(n for _, n, _ in bucket)
+        self.stats["batches"] += 1
+
+        loop = asyncio.get_running_loop()
+        try:
+            results = await loop.run_in_executor(
+                self.executor, partial(search_players_batch, names, player_role, top_n=top_n, metric=metric,
+                                       weights=dict(weights) or None, positions=positions))
+        except Exception as error:
+            for _, _, future in bucket:
+                if not future.done():
+                    future.set_exception(error)
+            return
+
+        for (name, n, future), result in zip(bucket, results):
+            if future.done():
+                continue
+            if result is None:
+                future.set_exception(LookupError(f"{name} not found in dataset."))
+            else:
+                future.set_result(result.head(n))
+
+
+def parse_weights(text):
+    """Parse 'pace:0.4,shooting:0.1' into {'pace': 0.4, 'shooting': 0.1}."""
+    if not text:
+        return None
+    weights = {}
+    for item in text.split(","):
+        feature, _, value = item.partition(":")
+        weights[feature.strip()] = float(value)
+    return weights
+
+
+def parse_positions(text):
+    """Parse 'LB,LWB' into a position mask (see positions.position_mask), or None if not given."""
+    if not text:
+        return None
+    return position_mask(text)
+
+
+async def route(batcher, method, target):
+    """
+    Handle one request.
+
+    GET /search?player=K.%20De%20Bruyne&role=cam&top_n=10&metric=cosine&weights=pace:0.4
+    GET /search?player=K.%20De%20Bruyne&role=cam&positions=CM,CDM   (only players eligible there)
+    GET /search?player=K.%20De%20Bruyne&role=cam&page_size=20   (first page + cursor)
+    GET /page?cursor=...                                          (next page + cursor, null at the end)
+    GET /stats
+
+    Returns:
+        tuple: (status, JSON-serializable body, extra headers)
+    """
+    url = urlsplit(target)
+    params = {name: values[-1] for name, values in parse_qs(url.query).items()}
+
+    if method != "GET":
+        return 400, {"error": f"Unsupported method: {method}"}, {}
+    if url.path == "/stats":
+        return 200, {**batcher.stats, "pending": batcher.pending, "cursors": len(cursor_store)}, {}
+    if url.path == "/page" or (url.path == "/search" and "page_size" in params):
+        return await route_page(batcher, url.path, params)
+    if url.path != "/search":
+        return 404, {"error": f"Unknown path: {url.path}"}, {}
+
+    try:
+        player, role = params["player"], params["role"]
+        top_n = int(params.get("top_n", 10))
+        metric = params.get("metric", "cosine")
+        result = await batcher.search(player, role, top_n=top_n, metric=metric,
+                                      weights=parse_weights(params.get("weights")),
+                                      positions=parse_positions(params.get("positions")))
+    except Overloaded as error:
+        return 503, {"error": str(error)}, {"Retry-After": "1"}
+    except KeyError as error:
+        return 400, {"error": f"Missing parameter: {error}"}, {}
+    except LookupError as error:
+        return 404, {"error": str(error)}, {}
+    except ValueError as error:
+        return 400, {"error": f"Bad request: {error}"}, {}
+
+    return 200, {"player": player, "role": role, "results": result.to_dict(orient="records")}, {}
+
+
+async def route_page(batcher, path, params):
+    """Paginated search: /search with page_size opens a cursor, /page continues it."""
+    try:
+        page_size = int(params["page_size"]) if "page_size" in params else None
+        if path == "/page":
+            call = partial(cursor_store.next, params["cursor"], page_size=page_size)
+        else:
+            call = partial(cursor_store.open, params["player"], params["role"], page_size=page_size,
+                           metric=params.get("metric", "cosine"), weights=parse_weights(params.get("weights")),
+                           positions=parse_positions(params.get("positions")))
+        page, cursor = await batcher.run(call)
+    except Overloaded as error:
+        return 503, {"error": str(error)}, {"Retry-After": "1"}
+    except KeyError as error:
+        return 400, {"error": f"Missing parameter: {error}"}, {}
+    except LookupError as error:
+        return 404, {"error": str(error)}, {}
+    except ValueError as error:
+        return 400, {"error": f"Bad request: {error}"}, {}
+
+    return 200, {"results": page.to_dict(orient="records"), "cursor": cursor}, {}
+
+
+async def handle_connection(batcher, reader, writer):
+    """Minimal HTTP/1.1 handler with keep-alive."""
+    try:
+        while True:
+            request_line = await reader.readline()
+            if not request_line:
+                break
+            method, target, version = request_line.decode("latin-1").split()
+
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+            if int(headers.get("content-length", 0)):
+                await reader.readexactly(int(headers["content-length"]))
+
+            try:
+                status, body, extra_headers = await route(batcher, method, target)
+            except Exception as error:
+                # Answer instead of dropping the connection; the traceback goes to the server log
+                traceback.print_exc()
+                status, body, extra_headers = 500, {"error": f"Internal error: {type(error).__name__}"}, {}
+            payload = json.dumps(body).encode()
+            keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+
+            response = [f"HTTP/1.1 {status} {STATUS_TEXT[status]}",
+                        "Content-Type: application/json",
+                        f"Content-Length: {len(payload)}",
+                        f"Connection: {'keep-alive' if keep_alive else 'close'}"]
+            response += [f"{name}: {value}" for name, value in extra_headers.items()]
+            writer.write(("\r\n".join(response) + "\r\n\r\n").encode() + payload)
+            await writer.drain()
+            if not keep_alive:
+                break
+    except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+        pass
+    finally:
+        writer.close()
+
+
+async def serve(host="127.0.0.1", port=8000, **batcher_options):
+    """
+    Load both player pools, then serve search requests until cancelled.
+    """
+    batcher = SearchBatcher(**batcher_options)
+    loop = asyncio.get_running_loop()
+    for group in ("outfield", "gk"):
+        await loop.run_in_executor(batcher.executor, build_search_index, group)
+
+    server = await asyncio.start_server(partial(handle_connection, batcher), host, port)
+    print(f"Serving similarity search on http://{host}:{port}/search")
+    async with server:
+        await server.serve_forever()
+
+
+if __name__ == "__main__":
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 8000
+    asyncio.run(serve(port=port))
@@ -0,0 +1,113 @@
+# sharded_search.py
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from search_functions.metrics import MetricIndex, top_k
+
+
+class ShardedIndex:
+    """
+    Exact search over a MetricIndex split into row shards scored in parallel threads.
+
+    Each shard is a view of a contiguous block of rows (no copy) with its own
+    cached norms. A query is scored on every shard in a thread pool: the matrix
+    products and element-wise numpy work release the GIL, so shards run on
+    separate cores. Every shard returns its local top-k, and the small
+    candidate lists are merged into the global top-k.
+
+    Mahalanobis uses the whitening of the whole matrix (shard-local covariance
+    would change the metric), sliced per shard.
+
+    Can be passed as `index` to find_similar_outfield_players and
+    find_similar_goalkeepers.
+
+    Args:
+        index (MetricIndex or np.ndarray): Full index (or scaled matrix) to shard.
+        n_shards (int): Number of row shards (default: one per CPU core).
+        executor (ThreadPoolExecutor): Pool to run shards on (default: one thread per shard).
+    """
+
+    def __init__(self, index, n_shards=None, executor=None):
+        self.index = index if isinstance(index, MetricIndex) else MetricIndex(index)
+        self.X = self.index.X
+        self.n_shards = max(1, min(n_shards or os.cpu_count() or 1, len(self.X)))
+        self.bounds = np.linspace(0, len(self.X), self.n_shards + 1).astype(int)
+        self.shards = [MetricIndex(self.X[start:stop]) for start, stop in zip(self.bounds[:-1], self.bounds[1:])]
+        self.executor = executor or ThreadPoolExecutor(max_workers=self.n_shards)
+
+    def __len__(self):
+        return len(self.X)
+
+    def _shard_rows(self, shard, rows):
+        """Shard-local positions of the (sorted) rows that fall in this shard."""
+        start, stop = self.bounds[shard], self.bounds[shard + 1]
+        return rows[np.searchsorted(rows, start):np.searchsorted(rows, stop)] - start
+
+    def _shard_distances(self, shard, q, metric, w, local_rows=None):
+        if metric != "mahalanobis":
+            return self.shards[shard].distances(q, metric=metric, weights=w, rows=local_rows)
+
+        start, stop = self.bounds[shard], self.bounds[shard + 1]
+        features = None if w is None else np.flatnonzero(w)
+        features, mean, transform, X_white, white_sq_norms = self.index.whitening(features)
+        X_white, white_sq_norms = X_white[start:stop], white_sq_norms[start:stop]
+        if local_rows is not None:
+            X_white, white_sq_norms = X_white[local_rows], white_sq_norms[local_rows]
+        q_white = (q[features] - mean) @ transform
+        sq_distances = white_sq_norms + q_white @ q_white - 2.0 * (X_white @ q_white)
+        return np.sqrt(np.maximum(sq_distances, 0.0))
+
+    def _shard_top_k(self, shard, q, metric, w, top_n, exclude, rows=None):
+        start, stop = self.bounds[shard], self.bounds[shard + 1]
+        local_rows = None if rows is None else self._shard_rows(shard, rows)
+        distances = self._shard_distances(shard, q, metric, w, local_rows)
+        local_exclude = None
+        if exclude is not None:
+            local_exclude = exclude[(exclude >= start) & (exclude < stop)] - start
+            if local_rows is not None:
+                local_exclude = np.flatnonzero(np.isin(local_rows, local_exclude))
+        local = top_k(distances, top_n, exclude=local_exclude)
+        if local_rows is not None:
+            return local_rows[local] + start, distances[local]
+        return local + start, distances[local]
+
+    def _prepare(self, query, metric, weights):
+        q = self.X[int(query)] if np.isscalar(query) else np.asarray(query, dtype=np.float64).ravel()
+        w = None if weights is None else np.asarray(weights, dtype=np.float64)
+        if metric == "mahalanobis":
+            # Build the shared whitening once, before the threads need it
+            self.index.whitening(None if w is None else np.flatnonzero(w))
+        return q, w
+
+    def distances(self, query, metric="cosine", weights=None):
+        """Distance from the query to every row, computed shard by shard in parallel."""
+        q, w = self._prepare(query, metric, weights)
+        parts = self.executor.map(lambda shard: self._shard_distances(shard, q, metric, w), range(self.n_shards))
+        return np.concatenate(list(parts))
+
+    def search(self, query, metric="cosine", top_n=5, exclude=None, weights=None, rows=None):
+        """
+        Return the top_n closest rows to the query (same result as MetricIndex.search).
+
+        Args:
+            rows (np.ndarray): Only consider these rows as results (e.g. players eligible for a position).
+
+        Returns:
+            tuple: (indices, distances) ordered closest first.
+        """
+        q, w = self._prepare(query, metric, weights)
+        exclude = None if exclude is None else np.asarray(exclude)
+        rows = None if rows is None else np.sort(np.asarray(rows))
+        parts = list(self.executor.map(lambda shard: self._shard_top_k(shard, q, metric, w, top_n, exclude, rows),
+                                       range(self.n_shards)))
+
+        candidates = np.concatenate([indices for indices, _ in parts])
+        candidate_distances = np.concatenate([distances for _, distances in parts])
+        order = np.lexsort((candidates, candidate_distances))[:top_n]
+        return candidates[order], candidate_distances[order]
+
+    def close(self):
+        self.executor.shutdown()
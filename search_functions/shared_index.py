@@ -0,0 +1,194 @@
+# shared_index.py
+
+import json
+import os
+import shutil
+
+import numpy as np
+
+from search_functions.metrics import MetricIndex
+from search_functions.role_profiles import role_profiles
+from search_functions.unified_search import (DATA_PATH, build_search_index, reload_dataset, resolve_weights,
+                                             role_group)
+
+INDEX_DIR = "data/search_index"
+MANIFEST = "manifest.json"
+GROUPS = ("outfield", "gk")
+ARRAYS = ("X", "X_sq", "sq_norms", "labels", "names", "name_order", "sorted_names")
+
+
+def publish_index(path=DATA_PATH, index_dir=INDEX_DIR):
+    """
+    Build the role matrices once and publish them as a new version for worker processes.
+
+    Every array is written as an .npy file under `index_dir/v<version>/`, then
+    the manifest is replaced atomically, so workers switch to the new version
+    on their next query. Versions older than the previous one are removed;
+    workers still holding them keep their mapping until they switch.
+
+    Args:
+        path (str): Player dataset to build from (e.g. a refreshed players_22.csv).
+        index_dir (str): Directory shared with the workers.
+
+    Returns:
+        int: The published version.
+    """
+    version = _read_manifest(index_dir).get("version", 0) + 1
+    version_dir = os.path.join(index_dir, f"v{version}")
+    os.makedirs(version_dir, exist_ok=True)
+
+    # Always rebuild from disk, even if this process searched the old dataset before
+    reload_dataset()
+
+    groups = {}
+    for group in GROUPS:
+        pool_df, feature_list, index = build_search_index(group, path)
+        names = pool_df["short_name"].to_numpy(dtype=str)
+        name_order = np.argsort(names, kind="stable")
+        arrays = {
+            "X": index.X,
+            "X_sq": index.X_sq,
+            "sq_norms": index.sq_norms,
+            "labels": pool_df.index.to_numpy(),
+            "names": names,
+            "name_order": name_order,
+            "sorted_names": names[name_order],
+        }
+        for name, array in arrays.items():
+            np.save(os.path.join(version_dir, f"{group}_{name}.npy"), array)
+        groups[group] = {"features": list(feature_list), "rows": len(pool_df)}
+
+    manifest = {"version": version, "path": path, "groups": groups}
+    temporary = os.path.join(index_dir, MANIFEST + ".tmp")
+    with open(temporary, "w") as f:
+        json.dump(manifest, f)
+    os.replace(temporary, os.path.join(index_dir, MANIFEST))
+
+    for entry in os.listdir(index_dir):
+        if entry.startswith("v") and entry[1:].isdigit() and int(entry[1:]) < version - 1:
+            shutil.rmtree(os.path.join(index_dir, entry), ignore_errors=True)
+
+    reload_dataset()
+    return version
+
+
+def _read_manifest(index_dir):
+    try:
+        with open(os.path.join(index_dir, MANIFEST)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+class SharedSearchIndex:
+    """
+    Read-only, zero-copy view of the role matrices published by publish_index().
+
+    The matrices are memory-mapped, so every worker process shares the same
+    physical pages (the OS page cache) and memory stays flat as workers are
+    added. Before each query the manifest is checked (one stat call); when a
+    new version has been published the worker re-attaches to it.
+
+    Only the Mahalanobis whitening is still computed per worker, on first use.
+
+    Args:
+        index_dir (str): Directory written by publish_index().
+    """
+
+    def __init__(self, index_dir=INDEX_DIR):
+        self.index_dir = index_dir
+        self.version = None
+        self._manifest_mtime = None
+        self._pools = {}
+        self.refresh()
+
+    def refresh(self):
+        """Attach to the newest published version if it changed. Returns True if it did."""
+        manifest_path = os.path.join(self.index_dir, MANIFEST)
+        mtime = os.stat(manifest_path).st_mtime_ns
+        if mtime == self._manifest_mtime:
+            return False
+
+        manifest = _read_manifest(self.index_dir)
+        if manifest["version"] == self.version:
+            self._manifest_mtime = mtime
+            return False
+
+        version_dir = os.path.join(self.index_dir, f"v{manifest['version']}")
+        pools = {}
+        for group, info in manifest["groups"].items():
+            arrays = {name: np.load(os.path.join(version_dir, f"{group}_{name}.npy"), mmap_mode="r")
+                      for name in ARRAYS}
+            index = MetricIndex(arrays["X"], X_sq=arrays["X_sq"], sq_norms=arrays["sq_norms"])
+            pools[group] = (arrays, info["features"], index)
+
+        self._pools, self.version, self._manifest_mtime = pools, manifest["version"], mtime
+        return True
+
+    def pool(self, group):
+        """(arrays, feature_list, MetricIndex) for 'outfield' or 'gk'."""
+        self.refresh()
+        return self._pools[group]
+
+    def player_positions(self, group, player_name):
+        """Row positions of a 'short_name', by binary search in the shared sorted name order."""
+        arrays, _, _ = self.pool(group)
+        start = np.searchsorted(arrays["sorted_names"], player_name, side="left")
+        stop = np.searchsorted(arrays["sorted_names"], player_name, side="right")
+        return np.sort(arrays["name_order"][start:stop])
+
+    def search(self, player_name: str, player_role: str, top_n: int = 10, metric: str = "cosine",
+               weights: dict = None):
+        """
+        numpy-only core of search_players (no pandas or scikit-learn needed).
+
+        Returns:
+            tuple or None: (rows, scores) with rows into the pool's arrays
+            ('names', 'labels'), closest first, or None if the player is not in
+            the pool. Scores are similarities for cosine and distances otherwise.
+        """
+        if player_role not in role_profiles:
+            raise ValueError(f"Unknown role: '{player_role}'")
+
+        group = role_group(player_role)
+        arrays, feature_list, index = self.pool(group)
+        positions = self.player_positions(group, player_name)
+        if len(positions) == 0:
+            return None
+
+        weights_dict = resolve_weights(player_role, weights)
+        weight_vector = None if not weights_dict else np.array([weights_dict.get(f, 0.0) for f in feature_list])
+
+        exclude = positions[:1] if group == "gk" else positions
+        top_indices, distances = index.search(positions[0], metric=metric, top_n=top_n, exclude=exclude,
+                                              weights=weight_vector)
+        return top_indices, 1.0 - distances if metric == "cosine" else distances
+
+    def search_players(self, player_name: str, player_role: str, top_n: int = 10, metric: str = "cosine",
+                       weights: dict = None):
+        """
+        Same results as unified_search.search_players, served from the shared matrices.
+        """
+        import pandas as pd
+
+        found = self.search(player_name, player_role, top_n=top_n, metric=metric, weights=weights)
+        if found is None:
+            # Same behaviour per pool as the single-process search functions
+            if role_group(player_role) == "gk":
+                raise ValueError(f"{player_name} not found in dataset.")
+            print(f"Player '{player_name}' not found in dataset.")
+            return pd.DataFrame()
+
+        rows, scores = found
+        arrays, _, _ = self.pool(role_group(player_role))
+        score_column = "similarity" if metric == "cosine" else "distance"
+        return pd.DataFrame({"short_name": arrays["names"][rows], score_column: scores},
+                            index=arrays["labels"][rows])
+
+
+if __name__ == "__main__":
+    import sys
+
+    path = sys.argv[1] if len(sys.argv) > 1 else DATA_PATH
+    version = publish_index(path)
+    print(f"Published search index version {version} from {path} to {INDEX_DIR}")
@@ -0,0 +1,277 @@
+# tracing.py
+
+import functools
+import json
+import math
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+# Set TRACE_SPANS to a file path to append every span there as JSON lines
+TRACE_ENV = "TRACE_SPANS"
+
+# Histogram buckets: powers of two from 1 us to ~1100 s
+BUCKET_EDGES_MS = [2.0 ** i / 1000 for i in range(31)]
+
+
+class _NullSpan:
+    """Returned by span() while tracing is off: entering, leaving and set() do nothing."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def set(self, **attributes):
+        pass
+
+
+NULL_SPAN = _NullSpan()
+_sink = None
+_local = threading.local()
+
+
+class Span:
+    """
+    One timed stage. Use through span(); the record goes to the sink on exit.
+
+    Records are dicts with name, parent (enclosing span on the same thread or
+    None), start (Unix time), duration_ms, thread, attributes and, if the
+    block raised, error (exception type name).
+    """
+
+    __slots__ = ("name", "attributes", "sink", "parent", "start", "_t0")
+
+    def __init__(self, name, attributes, sink):
+        self.name = name
+        self.attributes = attributes
+        self.sink = sink
+
+    def set(self, **attributes):
+        """Add attributes while the span is open (e.g. row counts known only afterwards)."""
+        self.attributes.update(attributes)
+
+    def __enter__(self):
+        stack = getattr(_local, "stack", None)
+        if stack is None:
+            stack = _local.stack = []
+        self.parent = stack[-1] if stack else None
+        stack.append(self.name)
+        self.start = time.time()
+        self._t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        duration_ms = (time.perf_counter() - self._t0) * 1000
+        _local.stack.pop()
+        record = {"name": self.name, "parent": self.parent, "start": self.start,
+                  "duration_ms": duration_ms, "thread": threading.get_ident(), "attributes": self.attributes}
+        if exc_type is not None:
+            record["error"] = exc_type.__name__
+        self.sink.record(record)
+        return False
+
+
+def span(name, **attributes):
+    """
+    Time a block as a named stage: `with span("search.similarity", metric=metric): ...`
+
+    While no sink is installed this returns a shared no-op object, so an
+    instrumented hot path pays one global lookup and an empty with-block.
+    """
+    if _sink is None:
+        return NULL_SPAN
+    return Span(name, attributes, _sink)
+
+
+def traced(name):
+    """
+    Decorator form of span(): time every call of the function as stage `name`.
+    """
+    def decorate(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if _sink is None:
+                return function(*args, **kwargs)
+            with Span(name, {}, _sink):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def set_sink(sink):
+    """
+    Install the sink that receives finished spans (None turns tracing off).
+
+    A sink is any object with a record(dict) method.
+
+    Returns:
+        The previously installed sink.
+    """
+    global _sink
+    previous, _sink = _sink, sink
+    return previous
+
+
+def get_sink():
+    return _sink
+
+
+@contextmanager
+def tracing(sink):
+    """Install `sink` for the duration of a with-block and restore the previous one."""
+    previous = set_sink(sink)
+    try:
+        yield sink
+    finally:
+        set_sink(previous)
+
+
+class JsonLinesSink:
+    """
+    Write every span as one JSON object per line.
+
+    Args:
+        target (str or file): Path (opened for appending) or writable text stream.
+    """
+
+    def __init__(self, target):
+        self._owned = isinstance(target, str)
+        self.stream = open(target, "a", buffering=1) if self._owned else target
+        self._lock = threading.Lock()
+
+    def record(self, record):
+        line = json.dumps(record, default=str)
+        with self._lock:
+            self.stream.write(line + "\n")
+
+    def close(self):
+        if self._owned:
+            self.stream.close()
+
+
+class MemorySink:
+    """Keep spans in a list (tests, notebooks, one-off measurements)."""
+
+    def __init__(self):
+        self.records = []
+        self._lock = threading.Lock()
+
+    def record(self, record):
+        with self._lock:
+            self.records.append(record)
+
+    def to_json_lines(self, target):
+        """Write the collected spans to a path or stream as JSON lines."""
+        sink = JsonLinesSink(target)
+        for record in self.records:
+            sink.record(record)
+        sink.close()
+
+
+class HistogramSink:
+    """
+    Aggregate spans per stage name into a log2 duration histogram.
+
+    Only counters are kept (no records), so it can stay installed in a
+    long-running process. Percentiles are read from the histogram and are
+    accurate to one bucket (a factor of two).
+    """
+
+    def __init__(self):
+        self.stages = {}
+        self._lock = threading.Lock()
+
+    def record(self, record):
+        duration_ms = record["duration_ms"]
+        bucket = min(max(0, math.ceil(math.log2(max(duration_ms * 1000, 1.0)))), len(BUCKET_EDGES_MS) - 1)
+        with self._lock:
+            stage = self.stages.get(record["name"])
+            if stage is None:
+                stage = self.stages[record["name"]] = {"count": 0, "errors": 0, "total_ms": 0.0, "max_ms": 0.0,
+                                                       "buckets": [0] * len(BUCKET_EDGES_MS)}
+            stage["count"] += 1
+            stage["errors"] += "error" in record
+            stage["total_ms"] += duration_ms
+            stage["max_ms"] = max(stage["max_ms"], duration_ms)
+            stage["buckets"][bucket] += 1
+
+    @staticmethod
+    def _percentile(buckets, count, q):
+        rank = q * count
+        seen = 0
+        for edge, n in zip(BUCKET_EDGES_MS, buckets):
+            seen += n
+            if seen >= rank:
+                return edge
+        return BUCKET_EDGES_MS[-1]
+
+    def summary(self):
+        """
+        Per-stage statistics, slowest total first.
+
+        Returns:
+            list: Dicts with stage, count, errors, total_ms, mean_ms, p50_ms,
+            p95_ms, p99_ms (bucket upper bounds), max_ms and buckets
+            ({upper bound in ms: count} for non-empty buckets).
+        """
+        with self._lock:
+            stages = {name: dict(stage, buckets=list(stage["buckets"])) for name, stage in self.stages.items()}
+        rows = []
+        for name, stage in stages.items():
+            count = stage["count"]
+            rows.append({
+                "stage": name, "count": count, "errors": stage["errors"],
+                "total_ms": stage["total_ms"], "mean_ms": stage["total_ms"] / count,
+                "p50_ms": min(self._percentile(stage["buckets"], count, 0.50), stage["max_ms"]),
+                "p95_ms": min(self._percentile(stage["buckets"], count, 0.95), stage["max_ms"]),
+                "p99_ms": min(self._percentile(stage["buckets"], count, 0.99), stage["max_ms"]),
+                "max_ms": stage["max_ms"],
+                "buckets": {edge: n for edge, n in zip(BUCKET_EDGES_MS, stage["buckets"]) if n},
+            })
+        return sorted(rows, key=lambda row: row["total_ms"], reverse=True)
+
+    def format(self):
+        """The summary as a text table."""
+        lines = [f"{'stage':<28} {'count':>8} {'total ms':>12} {'mean ms':>10} {'p50 ms':>10} "
+                 f"{'p95 ms':>10} {'p99 ms':>10} {'max ms':>10}"]
+        for row in self.summary():
+            lines.append(f"{row['stage']:<28} {row['count']:>8} {row['total_ms']:>12.2f} {row['mean_ms']:>10.3f} "
+                         f"{row['p50_ms']:>10.3f} {row['p95_ms']:>10.3f} {row['p99_ms']:>10.3f} "
+                         f"{row['max_ms']:>10.3f}")
+        return "\n".join(lines)
+
+
+class FanOutSink:
+    """Pass every span on to several sinks (e.g. JSON lines and a histogram)."""
+
+    def __init__(self, *sinks):
+        self.sinks = sinks
+
+    def record(self, record):
+        for sink in self.sinks:
+            sink.record(record)
+
+
+def histogram_from_json_lines(path):
+    """Aggregate a JSON lines trace file into a HistogramSink."""
+    histogram = HistogramSink()
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                histogram.record(json.loads(line))
+    return histogram
+
+
+if os.environ.get(TRACE_ENV):
+    set_sink(JsonLinesSink(os.environ[TRACE_ENV]))
+
+
+if __name__ == "__main__":
+    # python -m search_functions.tracing trace.jsonl
+    print(histogram_from_json_lines(sys.argv[1]).format())
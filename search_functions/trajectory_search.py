@@ -0,0 +1,291 @@
+# trajectory_search.py
+
+import numpy as np
+
+from search_functions.tracing import span
+
+# Ratings whose development across editions makes up a career trajectory
+TRAJECTORY_FEATURES = ['overall', 'potential', 'pace', 'shooting', 'passing', 'dribbling', 'defending', 'physic']
+
+METHODS = ("dtw", "age")
+
+
+def lb_keogh(query, candidates, lengths, band, weights=None):
+    """
+    LB_Keogh lower bound of the banded DTW distance (squared), for every candidate at once.
+
+    The query's envelope at position j is its per-feature min and max over
+    positions j - band .. j + band. Every candidate position is matched to
+    some query position inside that window, so the squared distance of
+    candidate values outside the envelope never exceeds the DTW cost.
+
+    Args:
+        query (np.ndarray): (length x features) query trajectory.
+        candidates (np.ndarray): (candidates x max length x features), NaN after each candidate's length.
+        lengths (np.ndarray): Number of valid positions per candidate.
+        band (int): Sakoe-Chiba band half-width.
+        weights (np.ndarray): Per-feature weights (as in dtw_distances).
+
+    Returns:
+        np.ndarray: Lower bound per candidate (inf where the lengths cannot be aligned within the band).
+    """
+    n_query = len(query)
+    bound = np.zeros(len(candidates), dtype=np.float32)
+    w = np.ones(query.shape[1], dtype=np.float32) if weights is None else np.asarray(weights, dtype=np.float32) ** 2
+    for j in range(min(candidates.shape[1], n_query + band)):
+        window = query[max(0, j - band):j + band + 1]
+        upper, lower = window.max(axis=0), window.min(axis=0)
+        column = candidates[:, j, :]
+        outside = np.maximum(column - upper, 0) + np.maximum(lower - column, 0)
+        contribution = np.square(outside) @ w
+        bound += np.where(np.isnan(contribution), np.float32(0), contribution)
+    bound[np.abs(lengths.astype(np.int64) - n_query) > band] = np.inf
+    return bound
+
+
+def dtw_distances(query, candidates, lengths, band, weights=None):
+    """
+    Banded DTW (squared Euclidean cell cost) from the query to every candidate, vectorized over candidates.
+
+    The dynamic program walks the (query x candidate) cells inside the band
+    once; each cell is one vector operation over all candidates, so the
+    Python loop runs about length * (2 * band + 1) times whatever the
+    number of candidates. Candidates of different lengths end in different
+    cells and are read out per length.
+
+    Returns:
+        np.ndarray: Squared DTW distance per candidate (inf where not alignable within the band).
+    """
+    n_query, n_positions = len(query), candidates.shape[1]
+    w = np.ones(query.shape[1], dtype=np.float32) if weights is None else np.asarray(weights, dtype=np.float32) ** 2
+    infinity = np.full(len(candidates), np.inf, dtype=np.float32)
+
+    previous = {}
+    for i in range(n_query):
+        current = {}
+        for j in range(max(0, i - band), min(n_positions, i + band + 1)):
+            cost = np.square(candidates[:, j, :] - query[i]) @ w
+            cost[np.isnan(cost)] = np.inf
+            if i == 0 and j == 0:
+                current[j] = cost
+                continue
+            best = np.minimum(np.minimum(previous.get(j, infinity), previous.get(j - 1, infinity)),
+                              current.get(j - 1, infinity))
+            current[j] = cost + best
+        previous = current
+
+    distances = infinity.copy()
+    for j, accumulated in previous.items():
+        ends = lengths == j + 1
+        distances[ends] = accumulated[ends]
+    return distances
+
+
+def age_aligned_distances(query, query_ages, candidates, candidate_ages, weights=None, min_overlap=3):
+    """
+    Mean squared distance over the ages both players have a value for (aligned by age, not by edition).
+
+    Returns:
+        np.ndarray: Distance per candidate (inf with fewer than min_overlap common ages).
+    """
+    w = np.ones(query.shape[1], dtype=np.float32) if weights is None else np.asarray(weights, dtype=np.float32) ** 2
+    total = np.zeros(len(candidates), dtype=np.float32)
+    overlap = np.zeros(len(candidates), dtype=np.int16)
+    for i, age in enumerate(query_ages):
+        at_age = candidate_ages == age
+        matched = at_age.any(axis=1)
+        position = at_age.argmax(axis=1)
+        values = candidates[np.arange(len(candidates)), position]
+        cost = np.square(values - query[i]) @ w
+        matched &= ~np.isnan(cost)
+        total += np.where(matched, cost, np.float32(0))
+        overlap += matched
+    with np.errstate(divide="ignore", invalid="ignore"):
+        distances = total / overlap
+    distances[overlap < min_overlap] = np.inf
+    return distances
+
+
+class TrajectoryIndex:
+    """
+    Career trajectories (the TRAJECTORY_FEATURES of each edition a player appears in) for similarity search.
+
+    Each trajectory is stored left-aligned: position 0 is the player's first
+    edition, and positions after the last are NaN. Features are standardized
+    over all trajectory points, so a point of 'overall' weighs as much as a
+    point of 'pace' relative to their spread.
+
+    Two distances are supported:
+        'dtw': DTW with a Sakoe-Chiba band, so careers that develop at a
+            slightly different pace still match. An LB_Keogh lower bound is
+            computed for all candidates first; exact DTW then runs in
+            growing chunks in lower-bound order and stops once the next
+            bound exceeds the current top_n-th distance.
+        'age': mean squared distance over the ages both players were rated at.
+
+    Args:
+        ids (np.ndarray): sofifa_id per trajectory.
+        names (np.ndarray): 'short_name' per trajectory.
+        values (np.ndarray): (players x max length x features) raw values, NaN padded.
+        ages (np.ndarray): (players x max length) age at each position (-1 padded).
+        features (list): Feature names of the last axis.
+    """
+
+    def __init__(self, ids, names, values, ages, features=TRAJECTORY_FEATURES):
+        self.ids = np.asarray(ids)
+        self.names = np.asarray(names, dtype=object)
+        self.features = list(features)
+        self.ages = np.asarray(ages, dtype=np.int16)
+        self.lengths = (~np.isnan(values).any(axis=2)).sum(axis=1).astype(np.int8)
+
+        self.values = np.array(values, dtype=np.float32)
+        flat = self.values.reshape(-1, self.values.shape[2])
+        self.mean = np.nanmean(flat, axis=0)
+        self.scale = np.nanstd(flat, axis=0)
+        self.scale[~(self.scale > 0)] = 1.0
+        self.values -= self.mean
+        self.values /= self.scale
+        self._id_order = np.argsort(self.ids, kind="stable")
+
+    @classmethod
+    def from_store(cls, store, features=TRAJECTORY_FEATURES, min_editions=2):
+        """
+        Trajectories of every player with at least `min_editions` complete editions in an EditionStore.
+
+        Editions where any of the features is missing (e.g. goalkeepers for the
+        outfield ratings) do not count as a trajectory point.
+        """
+        from search_functions.edition_store import FEATURES
+
+        columns = [FEATURES.index(f) for f in features + ['age']]
+        editions = sorted(store.editions)
+        full = np.full((len(store), len(editions), len(columns)), np.nan, dtype=np.float32)
+        for step, edition in enumerate(editions):
+            full[store.editions[edition].rows, step] = store.matrix(edition)[:, columns]
+        return cls.from_editions(store.ids, store.names, full, features, min_editions)
+
+    @classmethod
+    def from_editions(cls, ids, names, full, features=TRAJECTORY_FEATURES, min_editions=2):
+        """
+        Trajectories from a dense (players x editions x features + age) array, NaN where a player is missing.
+
+        The last feature column must be 'age'.
+        """
+        with span("trajectories.build", players=len(full), editions=full.shape[1]) as s:
+            # Left-align: complete points first, in edition order
+            complete = ~np.isnan(full).any(axis=2)
+            keep = np.flatnonzero(complete.sum(axis=1) >= min_editions)
+            order = np.argsort(~complete[keep], axis=1, kind="stable")
+            full = np.take_along_axis(full[keep], order[:, :, None], axis=1)
+            full[~np.take_along_axis(complete[keep], order, axis=1)] = np.nan
+            s.set(trajectories=len(keep))
+
+        ages = np.nan_to_num(full[:, :, -1], nan=-1).astype(np.int16)
+        return cls(np.asarray(ids)[keep], np.asarray(names, dtype=object)[keep], full[:, :, :-1], ages, features)
+
+    def __len__(self):
+        return len(self.ids)
+
+    @property
+    def nbytes(self):
+        return self.values.nbytes + self.ages.nbytes + self.lengths.nbytes + self.ids.nbytes
+
+    def find(self, player):
+        """Trajectory row of a sofifa_id or exact 'short_name' (None if not found)."""
+        if isinstance(player, (int, np.integer)):
+            at = np.searchsorted(self.ids, player, sorter=self._id_order)
+            if at < len(self.ids) and self.ids[self._id_order[at]] == player:
+                return int(self._id_order[at])
+            return None
+        rows = np.flatnonzero(self.names == player)
+        return int(rows[0]) if len(rows) else None
+
+    def distances(self, row, method="dtw", band=1, weights=None, rows=None):
+        """Exact distance from trajectory `row` to every trajectory (or to `rows`)."""
+        query = self.values[row, :self.lengths[row]]
+        candidates = self.values if rows is None else self.values[rows]
+        if method == "dtw":
+            lengths = self.lengths if rows is None else self.lengths[rows]
+            return np.sqrt(dtw_distances(query, candidates, lengths, band, weights))
+        if method == "age":
+            ages = self.ages if rows is None else self.ages[rows]
+            return np.sqrt(age_aligned_distances(query, self.ages[row, :self.lengths[row]], candidates, ages,
+                                                 weights))
+        raise ValueError(f"Unknown method: '{method}'. Choose one of {METHODS}")
+
+    def search(self, player, top_n: int = 10, method: str = "dtw", band: int = 1, weights: dict = None,
+               first_chunk: int = 1024):
+        """
+        Players whose career trajectory is most similar to the given player's.
+
+        Args:
+            player (int or str): sofifa_id or exact 'short_name'.
+            top_n (int): Number of similar players to return.
+            method (str): 'dtw' (banded DTW with LB_Keogh pruning) or 'age' (age-aligned L2).
+            band (int): DTW band half-width in editions.
+            weights (dict): Optional feature -> weight (features not given weigh 0).
+            first_chunk (int): Candidates in the first exact DTW chunk (doubled for every next chunk).
+
+        Returns:
+            DataFrame: sofifa_id, short_name, editions (trajectory length) and distance, closest first.
+
+        Raises:
+            ValueError: Player without a trajectory, or unknown method.
+        """
+        import pandas as pd
+
+        from search_functions.metrics import top_k
+
+        row = self.find(player)
+        if row is None:
+            raise ValueError(f"{player} has no trajectory (not found or fewer than two editions).")
+        weight_vector = None if not weights else np.array([weights.get(f, 0.0) for f in self.features])
+
+        if method != "dtw":
+            with span("trajectories.similarity", method=method, rows=len(self)):
+                distances = self.distances(row, method=method, weights=weight_vector)
+                top_indices = top_k(distances, top_n, exclude=[row])
+                distances = distances[top_indices]
+        else:
+            top_indices, distances = self._dtw_search(row, top_n, band, weight_vector, first_chunk)
+
+        top_indices = top_indices[np.isfinite(distances)]
+        return pd.DataFrame({"sofifa_id": self.ids[top_indices], "short_name": self.names[top_indices],
+                             "editions": self.lengths[top_indices], "distance": distances[:len(top_indices)]})
+
+    def _dtw_search(self, row, top_n, band, weights, first_chunk):
+        query = self.values[row, :self.lengths[row]]
+        with span("trajectories.lb_keogh", rows=len(self), band=band):
+            bounds = lb_keogh(query, self.values, self.lengths, band, weights)
+            bounds[row] = np.inf
+
+        with span("trajectories.dtw", band=band) as s:
+            # Candidates in lower-bound order, a growing chunk at a time
+            remaining = np.flatnonzero(np.isfinite(bounds))
+            best_rows = np.empty(0, dtype=np.int64)
+            best = np.empty(0, dtype=np.float32)
+            threshold, chunk, exact = np.inf, first_chunk, 0
+            while len(remaining) > 0:
+                k = min(chunk, len(remaining))
+                if k < len(remaining):
+                    part = np.argpartition(bounds[remaining], k - 1)
+                    block, remaining = remaining[part[:k]], remaining[part[k:]]
+                else:
+                    block, remaining = remaining, remaining[:0]
+                block = block[bounds[block] <= threshold]
+                if len(block) == 0:
+                    break
+
+                distances = dtw_distances(query, self.values[block], self.lengths[block], band, weights)
+                exact += len(block)
+                best_rows = np.concatenate([best_rows, block])
+                best = np.concatenate([best, distances])
+                keep = np.argsort(best, kind="stable")[:top_n]
+                best_rows, best = best_rows[keep], best[keep]
+                if len(best) == top_n:
+                    threshold = best[-1]
+                    remaining = remaining[bounds[remaining] <= threshold]
+                chunk *= 2
+            s.set(exact=exact, pruned=len(self) - 1 - exact)
+
+        return best_rows, np.sqrt(best)
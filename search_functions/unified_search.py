@@ -1,63 +1,349 @@
 # unified_search.py
 
-import pandas as pd
-from sklearn.preprocessing import StandardScaler
+import inspect
+from functools import lru_cache, wraps
 
-from search_functions.role_profiles import role_profiles
+import numpy as np
+
+from search_functions.role_profiles import position_roles, role_profiles
+from search_functions.metrics import MetricIndex, top_k
 from search_functions.op_similarity_search import find_similar_outfield_players
 from search_functions.gk_similarity_search import find_similar_goalkeepers
+from search_functions.positions import (NO_POSITION, POSITION_BITS, POSITIONS, eligible_rows, parse_positions,
+                                       position_mask)
+from search_functions.tracing import span
+
+DATA_PATH = "data/players_22.csv"
+
+KEEPER_FEATURES = [
+    'age', 'height_cm', 'weight_kg',
+    'overall', 'potential', 'value_eur',
+    'goalkeeping_diving', 'goalkeeping_handling',
+    'goalkeeping_kicking', 'goalkeeping_positioning',
+    'goalkeeping_reflexes'
+]
+
+OUTFIELD_FEATURES = [
+    'age', 'height_cm', 'weight_kg',
+    'overall', 'potential', 'value_eur',
+    'pace', 'shooting', 'passing',
+    'dribbling', 'defending', 'physic'
+]
+
+# pandas and scikit-learn are imported inside the functions that need them, so
+# importing this module (and the shared index / CLI built on it) stays cheap
+
+# Bumped by reload_dataset(), so caches built on top of the search can tell datasets apart
+dataset_version = 0
+
+
+def _cached(maxsize=None):
+    """
+    lru_cache keyed on the arguments with defaults filled in.
+
+    load_dataset() and load_dataset(DATA_PATH) then share one entry; plain
+    lru_cache would keep two copies of the dataset (and of every pool built on it).
+    """
+    def decorator(function):
+        signature = inspect.signature(function)
+        cached = lru_cache(maxsize=maxsize)(function)
+
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            return cached(*bound.args)
+
+        wrapper.cache_clear = cached.cache_clear
+        wrapper.cache_info = cached.cache_info
+        return wrapper
+    return decorator
+
+
+@_cached()
+def load_dataset(path=DATA_PATH):
+    """
+    Load the player dataset once and keep it in memory.
+    """
+    import pandas as pd
+
+    with span("search.load_csv", path=path) as s:
+        dataset = pd.read_csv(path, low_memory=False)
+        s.set(rows=len(dataset))
+    return dataset
+
+
+def reload_dataset():
+    """
+    Drop the cached dataset and search indexes so the next query reads the data files again.
+
+    Returns:
+        int: The new dataset version.
+    """
+    global dataset_version
+    load_dataset.cache_clear()
+    dataset_positions.cache_clear()
+    build_search_index.cache_clear()
+    player_positions.cache_clear()
+    position_masks.cache_clear()
+    _eligible_pool_rows.cache_clear()
+    dataset_version += 1
+    return dataset_version
+
+
+@_cached()
+def dataset_positions(path=DATA_PATH):
+    """
+    Parse 'player_positions' once into (position masks, primary position) per dataset row (see positions.py).
+    """
+    dataset = load_dataset(path)
+    with span("search.parse_positions", rows=len(dataset)):
+        return parse_positions(dataset['player_positions'].to_numpy())
+
+
+def role_group(player_role: str) -> str:
+    """
+    Map a role to the player pool it is searched in ('gk' or 'outfield').
+    """
+    return "gk" if player_role == "gk" else "outfield"
+
+
+@_cached()
+def build_search_index(group: str, path: str = DATA_PATH):
+    """
+    Build (once per pool and dataset) the filtered player frame and a MetricIndex over its standardized features.
+
+    The matrix is not weighted: role profiles and custom weights are applied
+    per query, so every outfield role shares the same cached matrix.
+
+    Returns:
+        tuple: (pool_df, feature_list, index) where row i of the index is row i of pool_df.
+    """
+    from sklearn.preprocessing import StandardScaler
+
+    dataset = load_dataset(path)
+    feature_list = KEEPER_FEATURES if group == "gk" else OUTFIELD_FEATURES
+
+    with span("search.role_filter", group=group) as s:
+        masks, _ = dataset_positions(path)
+        is_keeper = (masks & POSITION_BITS["GK"]) != 0
+        pool_df = dataset[is_keeper if group == "gk" else ~is_keeper]
+        pool_df = pool_df[feature_list + ["short_name"]].dropna()
+        s.set(rows=len(pool_df))
+
+    with span("search.scale", group=group):
+        scaler = StandardScaler()
+        X_scaled = scaler.fit_transform(pool_df[feature_list])
+        index = MetricIndex(X_scaled)
+    return pool_df, feature_list, index
+
+
+@_cached()
+def player_positions(group: str, path: str = DATA_PATH):
+    """
+    Map every 'short_name' in a pool to its row positions in the search index (built once per pool).
+    """
+    import pandas as pd
+
+    pool_df, _, _ = build_search_index(group, path)
+    return pd.Series(np.arange(len(pool_df))).groupby(pool_df["short_name"].to_numpy()).indices
 
 
-def search_players(player_name: str, player_role: str, top_n: int = 10):
+@_cached()
+def position_masks(group: str, path: str = DATA_PATH):
+    """
+    (position masks, primary position) row-aligned with the pool's search index (built once per pool).
+    """
+    pool_df, _, _ = build_search_index(group, path)
+    masks, primary = dataset_positions(path)
+    rows = load_dataset(path).index.get_indexer(pool_df.index)
+    return masks[rows], primary[rows]
+
+
+def default_role(player_name: str, path: str = DATA_PATH) -> str:
+    """
+    Infer a player's role from their primary (first listed) position, e.g. 'RW, LW, ST' -> 'rw'.
+
+    Raises:
+        ValueError: The player is in neither pool or has no known position.
+    """
+    for group in ("outfield", "gk"):
+        rows = player_positions(group, path).get(player_name)
+        if rows is not None:
+            _, primary = position_masks(group, path)
+            if primary[rows[0]] == NO_POSITION:
+                break
+            return position_roles[POSITIONS[primary[rows[0]]]]
+    raise ValueError(f"No role could be inferred for {player_name}: not found in dataset or no known position.")
+
+
+def eligible_pool_rows(group: str, positions, path: str = DATA_PATH):
+    """
+    Row positions in a pool's search index of the players eligible for any of `positions`.
+
+    Args:
+        positions (str or iterable): Position codes, e.g. 'LB, LWB' or role_positions['fullback'].
+    """
+    return _eligible_pool_rows(group, position_mask(positions), path)
+
+
+@lru_cache(maxsize=256)
+def _eligible_pool_rows(group: str, mask: int, path: str):
+    masks, _ = position_masks(group, path)
+    return eligible_rows(masks, mask)
+
+
+def resolve_weights(player_role: str, weights: dict = None):
+    """
+    Combine a role profile with per-query weight overrides.
+
+    Features in the role profile keep their weight unless overridden; features
+    outside the profile are ignored unless given a weight in `weights`.
+    For goalkeepers (no profile) the result is None unless weights are given.
+
+    Returns:
+        dict or None: Feature -> weight.
+
+    Raises:
+        ValueError: Unknown feature, a negative weight, or no positive weight left.
+    """
+    profile = role_profiles[player_role]
+    if not weights:
+        return profile
+
+    feature_list = KEEPER_FEATURES if role_group(player_role) == "gk" else OUTFIELD_FEATURES
+    unknown = set(weights) - set(feature_list)
+    if unknown:
+        raise ValueError(f"Unknown feature(s) for role '{player_role}': {sorted(unknown)}")
+
+    negative = sorted(f for f, w in weights.items() if not w >= 0)
+    if negative:
+        raise ValueError(f"Weights must be non-negative: {negative}")
+
+    base = profile if profile is not None else {f: 1.0 for f in feature_list}
+    resolved = {**base, **weights}
+    if not any(resolved.get(f, 0.0) > 0 for f in feature_list):
+        # Every distance would be 0, so any top_n would be returned as a perfect match
+        raise ValueError(f"At least one weight must be positive for role '{player_role}'")
+    return resolved
+
+
+def search_players(player_name: str, player_role: str = None, top_n: int = 10, metric: str = "cosine",
+                   weights: dict = None, positions=None):
     """
     Unified search function for both outfield players and goalkeepers.
+
+    The dataset, standardized matrices and metric caches (norms, whitening) are
+    built on the first query and reused afterwards. Weights are applied on the
+    query side, so a custom weight profile costs the same as a built-in role.
+
+    Args:
+        player_name (str): Exact 'short_name' of the reference player.
+        player_role (str): Key in role_profiles, e.g. 'cam', 'lw' or 'gk'. Inferred from the
+            player's primary position when not given (see default_role).
+        top_n (int): Number of similar players to return.
+        metric (str): 'cosine', 'euclidean', 'mahalanobis' or 'manhattan'.
+        weights (dict): Per-feature weight overrides on top of the role profile,
+            e.g. {'pace': 0.4} for "like cam but pace 0.4".
+        positions (str or iterable): Only return players eligible for one of these positions,
+            e.g. 'LB, LWB' or role_positions['fullback']. Only the eligible rows are scored.
     """
-    # Load dataset
-    dataset = pd.read_csv("data/players_22.csv", low_memory=False)
+    if player_role is None:
+        player_role = default_role(player_name)
 
     # Check if role is known
     if player_role not in role_profiles:
         raise ValueError(f"Unknown role: '{player_role}'")
 
-    profile = role_profiles[player_role]
+    group = role_group(player_role)
+    pool_df, feature_list, index = build_search_index(group)
+    weights_dict = resolve_weights(player_role, weights)
+    rows = None if positions is None else eligible_pool_rows(group, positions)
 
-    if player_role == "gk":
-        keeper_features = [
-            'age', 'height_cm', 'weight_kg',
-            'overall', 'potential', 'value_eur',
-            'goalkeeping_diving', 'goalkeeping_handling',
-            'goalkeeping_kicking', 'goalkeeping_positioning',
-            'goalkeeping_reflexes'
-        ]
+    with span("search.similarity", role=player_role, metric=metric, top_n=top_n,
+              rows=len(index) if rows is None else len(rows)):
+        if player_role == "gk":
+            return find_similar_goalkeepers(
+                keeper_df=pool_df,
+                X_keeper_scaled=index.X,
+                target_name=player_name,
+                top_n=top_n,
+                metric=metric,
+                index=index,
+                weights_dict=weights_dict,
+                feature_list=feature_list,
+                rows=rows
+            )
 
-        keeper_df = dataset[dataset['player_positions'].str.contains('GK', na=False)]
-        keeper_df = keeper_df[keeper_features + ["short_name"]].dropna()
+        else:
+            return find_similar_outfield_players(
+                player_name=player_name,
+                dataset=pool_df,
+                feature_list=feature_list,
+                weights_dict=weights_dict,
+                top_n=top_n,
+                metric=metric,
+                index=index,
+                rows=rows
+            )
 
-        scaler = StandardScaler()
-        X_scaled = scaler.fit_transform(keeper_df[keeper_features])
-
-        return find_similar_goalkeepers(
-            keeper_df=keeper_df,
-            X_keeper_scaled=X_scaled,
-            target_name=player_name,
-            top_n=top_n
-        )
-
-    else:
-        outfield_features = [
-            'age', 'height_cm', 'weight_kg',
-            'overall', 'potential', 'value_eur',
-            'pace', 'shooting', 'passing',
-            'dribbling', 'defending', 'physic'
-        ]
-
-        outfield_df = dataset[~dataset['player_positions'].str.contains('GK', na=False)]
-        outfield_df = outfield_df[outfield_features + ['short_name']].dropna()
-
-        return find_similar_outfield_players(
-            player_name=player_name,
-            dataset=outfield_df,
-            feature_list=list(profile.keys()),
-            weights_dict=profile,
-            top_n=top_n
-        )
\ No newline at end of file
+
+def search_players_batch(player_names, player_role: str, top_n: int = 10, metric: str = "cosine",
+                         weights: dict = None, positions=None):
+    """
+    Search several players in the same role with one batched similarity computation.
+
+    All queries share the role's weight profile, so cosine and Euclidean
+    scores for the whole batch come from a single matrix-matrix product.
+
+    Args:
+        player_names (list): Exact 'short_name' of each reference player.
+        player_role (str): Key in role_profiles, e.g. 'cam' or 'gk'.
+        top_n (int): Number of similar players to return per query.
+        metric (str): 'cosine', 'euclidean', 'mahalanobis' or 'manhattan'.
+        weights (dict): Per-feature weight overrides on top of the role profile.
+        positions (str or iterable): Only return players eligible for one of these positions.
+
+    Returns:
+        list: One DataFrame per name (same columns as search_players), or None for names not in the pool.
+    """
+    import pandas as pd
+
+    if player_role not in role_profiles:
+        raise ValueError(f"Unknown role: '{player_role}'")
+
+    group = role_group(player_role)
+    pool_df, feature_list, index = build_search_index(group)
+    weights_dict = resolve_weights(player_role, weights)
+    weight_vector = None if not weights_dict else np.array([weights_dict.get(f, 0.0) for f in feature_list])
+
+    name_rows = player_positions(group)
+    found = [i for i, name in enumerate(player_names) if name in name_rows]
+    results = [None] * len(player_names)
+    if not found:
+        return results
+
+    rows = None if positions is None else eligible_pool_rows(group, positions)
+    query_rows = [name_rows[player_names[i]][0] for i in found]
+    with span("search.similarity", role=player_role, metric=metric, batch=len(query_rows)):
+        distances = index.batch_distances(query_rows, metric=metric, weights=weight_vector, rows=rows)
+    names, labels = pool_df["short_name"].to_numpy(), pool_df.index
+    if rows is not None:
+        names, labels = names[rows], labels[rows]
+    score_column = "similarity" if metric == "cosine" else "distance"
+
+    with span("search.batch_top_k", role=player_role, batch=len(query_rows), top_n=top_n):
+        for row, i in enumerate(found):
+            # Same exclusion as the single-player searches
+            exclude = name_rows[player_names[i]]
+            exclude = exclude[:1] if group == "gk" else exclude
+            if rows is not None:
+                exclude = np.flatnonzero(np.isin(rows, exclude))
+            top_indices = top_k(distances[row], top_n, exclude=exclude)
+
+            scores = distances[row, top_indices]
+            results[i] = pd.DataFrame({"short_name": names[top_indices],
+                                       score_column: 1.0 - scores if metric == "cosine" else scores},
+                                      index=labels[top_indices])
+
+    return results
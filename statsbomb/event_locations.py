@@ -0,0 +1,42 @@
+"""
+Hjelpefunksjoner for koordinater i StatsBomb eventdata
+
+Koordinatene er lister ([x, y] eller [x, y, z]) når data kommer fra API-et,
+men strenger ("[61.0, 40.1]") når eventdata er lest inn fra CSV. Funksjonene
+her håndterer begge deler uten å gå gjennom radene i Python.
+"""
+
+import numpy as np
+import pandas as pd
+
+# StatsBomb sitt koordinatsystem (120x80)
+PITCH_LENGTH = 120.0
+PITCH_WIDTH = 80.0
+
+_COORDINATE_PATTERN = r'^\s*\[\s*([-+\d.eE]+)\s*,\s*([-+\d.eE]+)'
+
+
+def location_array(values):
+    """
+    Gjør om en kolonne med koordinater til en (n, 2) float-matrise
+
+    Args:
+        values (pd.Series or list): Kolonne som 'location', 'pass_end_location' osv.
+
+    Returns:
+        np.ndarray: Matrise med x og y, NaN der koordinater mangler
+    """
+    values = pd.Series(values)
+    if values.empty:
+        return np.empty((0, 2))
+
+    coordinates = values.astype(str).str.extract(_COORDINATE_PATTERN)
+    return coordinates.astype(float).to_numpy()
+
+
+def clip_to_pitch(xy):
+    """Klipp koordinater slik at de ligger innenfor banen"""
+    clipped = np.array(xy, dtype=float, copy=True)
+    clipped[:, 0] = np.clip(clipped[:, 0], 0, PITCH_LENGTH)
+    clipped[:, 1] = np.clip(clipped[:, 1], 0, PITCH_WIDTH)
+    return clipped
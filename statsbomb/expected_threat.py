@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+Expected Threat (xT) for Premier League 2015/2016
+
+Deler banen inn i et rutenett og estimerer for hver sone sannsynligheten for
+å skyte, for å flytte ballen (pasning/føring) og hvor ballen havner. xT-flaten
+løses ved å iterere verdiligningen
+
+    xT = P(skudd) * P(mål | skudd) + P(flytt) * T @ xT
+
+til den konvergerer. Alle tellinger gjøres med np.bincount, så hele
+tilpasningen og verdsettingen tar sekunder for en hel sesong.
+"""
+
+import numpy as np
+import pandas as pd
+
+from event_locations import PITCH_LENGTH, PITCH_WIDTH, clip_to_pitch, location_array
+
+
+class ExpectedThreat:
+    """
+    Expected Threat-modell over et n_x * n_y rutenett
+
+    Args:
+        n_x (int): Antall soner i lengderetningen
+        n_y (int): Antall soner i bredden
+    """
+
+    def __init__(self, n_x=16, n_y=12):
+        self.n_x = n_x
+        self.n_y = n_y
+        self.n_zones = n_x * n_y
+        self.xt = None
+        self.iterations = 0
+
+    def zone_index(self, xy):
+        """
+        Finn sone-indeks for hver koordinat
+
+        Args:
+            xy (np.ndarray): (n, 2) matrise med koordinater
+
+        Returns:
+            np.ndarray: Sone-indeks (x_bin * n_y + y_bin) for hver rad
+        """
+        xy = clip_to_pitch(xy)
+        x_bin = np.minimum((xy[:, 0] / PITCH_LENGTH * self.n_x).astype(int), self.n_x - 1)
+        y_bin = np.minimum((xy[:, 1] / PITCH_WIDTH * self.n_y).astype(int), self.n_y - 1)
+        return x_bin * self.n_y + y_bin
+
+    def _moves(self, events_df):
+        """
+        Hent alle pasninger og føringer med start- og sluttsone
+
+        Returns:
+            tuple: (maske over events_df, startsone, sluttsone, vellykket)
+        """
+        is_pass = (events_df['type'] == 'Pass').to_numpy()
+        is_carry = (events_df['type'] == 'Carry').to_numpy()
+        is_move = is_pass | is_carry
+
+        moves = events_df[is_move]
+        start = location_array(moves['location'])
+
+        end = location_array(moves['pass_end_location'])
+        if 'carry_end_location' in moves.columns:
+            carry_rows = is_carry[is_move]
+            end[carry_rows] = location_array(moves['carry_end_location'])[carry_rows]
+
+        valid = ~np.isnan(start).any(axis=1) & ~np.isnan(end).any(axis=1)
+        # Føringer har ikke utfall, pasninger er vellykket når pass_outcome mangler
+        successful = valid & (is_carry[is_move] | moves['pass_outcome'].isna().to_numpy())
+
+        mask = is_move.copy()
+        mask[is_move] = valid
+        start_zone = self.zone_index(start[valid])
+        end_zone = self.zone_index(end[valid])
+        return mask, start_zone, end_zone, successful[valid]
+
+    def fit(self, events_df, max_iter=100, tol=1e-6):
+        """
+        Tilpass xT-flaten fra alle Pass-, Carry- og Shot-events
+
+        Args:
+            events_df (pd.DataFrame): DataFrame med events
+            max_iter (int): Maks antall iterasjoner av verdiligningen
+            tol (float): Stopp når største endring er mindre enn dette
+
+        Returns:
+            ExpectedThreat: Modellen selv (tilpasset)
+        """
+        n = self.n_zones
+
+        # Flytt-tellinger og overganger
+        _, start_zone, end_zone, successful = self._moves(events_df)
+        move_counts = np.bincount(start_zone, minlength=n).astype(float)
+        transitions = np.bincount(start_zone[successful] * n + end_zone[successful],
+                                  minlength=n * n).astype(float).reshape(n, n)
+
+        # Skudd-tellinger og målsannsynlighet (StatsBomb xG per sone)
+        shots = events_df[events_df['type'] == 'Shot']
+        shot_xy = location_array(shots['location'])
+        has_location = ~np.isnan(shot_xy).any(axis=1)
+        shot_zone = self.zone_index(shot_xy[has_location])
+        shot_xg = shots['shot_statsbomb_xg'].fillna(0).to_numpy(dtype=float)[has_location]
+        shot_counts = np.bincount(shot_zone, minlength=n).astype(float)
+        xg_sums = np.bincount(shot_zone, weights=shot_xg, minlength=n)
+
+        actions = move_counts + shot_counts
+        with np.errstate(divide='ignore', invalid='ignore'):
+            shot_prob = np.where(actions > 0, shot_counts / actions, 0.0)
+            move_prob = np.where(actions > 0, move_counts / actions, 0.0)
+            goal_prob = np.where(shot_counts > 0, xg_sums / shot_counts, 0.0)
+            transition_matrix = np.where(move_counts[:, None] > 0, transitions / move_counts[:, None], 0.0)
+
+        # Løs verdiligningen ved matrise-iterasjon
+        scoring = shot_prob * goal_prob
+        moving = move_prob[:, None] * transition_matrix
+        xt = np.zeros(n)
+        iterations = 0
+        while iterations < max_iter:
+            updated = scoring + moving @ xt
+            iterations += 1
+            converged = np.max(np.abs(updated - xt)) < tol
+            xt = updated
+            if converged:
+                break
+
+        self.xt = xt
+        self.iterations = iterations
+        self.shot_probability = shot_prob
+        self.move_probability = move_prob
+        self.goal_probability = goal_prob
+        self.transition_matrix = transition_matrix
+        return self
+
+    @property
+    def surface(self):
+        """xT-flaten som (n_x, n_y) matrise"""
+        if self.xt is None:
+            raise ValueError("Modellen er ikke tilpasset. Kall fit() først.")
+        return self.xt.reshape(self.n_x, self.n_y)
+
+    def rate(self, events_df):
+        """
+        Beregn xT lagt til for hver vellykket pasning og føring
+
+        Args:
+            events_df (pd.DataFrame): DataFrame med events
+
+        Returns:
+            pd.Series: xT lagt til per event (NaN for events som ikke er pasning/føring,
+                0 for mislykkede pasninger)
+        """
+        if self.xt is None:
+            raise ValueError("Modellen er ikke tilpasset. Kall fit() først.")
+
+        mask, start_zone, end_zone, successful = self._moves(events_df)
+        values = np.full(len(events_df), np.nan)
+        values[mask] = np.where(successful, self.xt[end_zone] - self.xt[start_zone], 0.0)
+        return pd.Series(values, index=events_df.index, name='xt_added')
+
+
+def calculate_player_xt(events_df, model=None):
+    """
+    Tilpass (om nødvendig) en xT-modell og summer xT lagt til per spiller
+
+    Args:
+        events_df (pd.DataFrame): DataFrame med alle events
+        model (ExpectedThreat): Ferdig tilpasset modell, ellers tilpasses en ny
+
+    Returns:
+        pd.DataFrame: Én rad per spiller med player_name, xt_added,
+            xt_from_passes og xt_from_carries
+    """
+    if model is None:
+        model = ExpectedThreat().fit(events_df)
+
+    xt_added = model.rate(events_df)
+    rated = events_df.loc[xt_added.notna(), ['player', 'type']].assign(xt_added=xt_added.dropna())
+
+    per_type = rated.pivot_table(index='player', columns='type', values='xt_added',
+                                 aggfunc='sum', fill_value=0.0)
+    player_xt = pd.DataFrame({
+        'player_name': per_type.index,
+        'xt_from_passes': per_type.get('Pass', pd.Series(0.0, index=per_type.index)).to_numpy(),
+        'xt_from_carries': per_type.get('Carry', pd.Series(0.0, index=per_type.index)).to_numpy(),
+    })
+    player_xt['xt_added'] = player_xt['xt_from_passes'] + player_xt['xt_from_carries']
+    return player_xt[['player_name', 'xt_added', 'xt_from_passes', 'xt_from_carries']]
+
+
+if __name__ == "__main__":
+    import sys
+
+    filename = sys.argv[1] if len(sys.argv) > 1 else 'data/sample_match_events.csv'
+    events = pd.read_csv(filename)
+    model = ExpectedThreat().fit(events)
+    print(f"xT konvergerte etter {model.iterations} iterasjoner")
+    print(calculate_player_xt(events, model).sort_values('xt_added', ascending=False).head(10))
@@ -9,14 +9,25 @@ Dato: September 2025
 
 import pandas as pd
 import numpy as np
-from statsbombpy import sb
+import ast
 import os
+import sys
 import time
 import glob
 from datetime import datetime
 import warnings
 warnings.filterwarnings('ignore')
 
+from expected_threat import calculate_player_xt
+from pass_network import NETWORK_FEATURES, calculate_network_features
+
+try:
+    from search_functions.tracing import span, traced
+except ImportError:
+    # Kjørt som script (statsbomb/ først på søkestien): tracing ligger i rotmappen
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from search_functions.tracing import span, traced
+
 
 def create_data_directory():
     """Opprett data-mappe hvis den ikke eksisterer"""
@@ -61,6 +72,7 @@ def find_existing_events_data():
     return None
 
 
+@traced("pipeline.load")
 def load_existing_events_data(filename):
     """
     Last inn eksisterende eventdata fra CSV-fil
@@ -156,6 +168,7 @@ def get_events_data(use_existing=True):
     return events_df
 
 
+@traced("pipeline.fetch")
 def fetch_all_events_for_season():
     """
     Hent alle events for alle kamper i Premier League 2015/2016
@@ -163,6 +176,9 @@ def fetch_all_events_for_season():
     Returns:
         pd.DataFrame: Kombinert DataFrame med alle events
     """
+    # Importeres først her: statistikk fra lagrede filer trenger ikke statsbombpy
+    from statsbombpy import sb
+
     print("Henter alle events for Premier League 2015/2016...")
     
     # Premier League 2015/2016
@@ -186,7 +202,8 @@ def fetch_all_events_for_season():
                 print(f"Behandler kamp {idx}/{total_matches}...")
             
             try:
-                events = sb.events(match_id=match_id)
+                with span("pipeline.fetch_match", match_id=int(match_id)):
+                    events = sb.events(match_id=match_id)
                 
                 # Legg til kampinformasjon
                 events['match_id'] = match_id
@@ -219,6 +236,118 @@ def fetch_all_events_for_season():
         return None
 
 
+def _parse_lineup(tactics):
+    """
+    Hent (navn, id) for alle spillere i en Starting XI-oppstilling
+
+    Tactics-feltet er en dict fra API-et, men en streng når eventdata er
+    lest inn fra CSV.
+    """
+    if isinstance(tactics, str):
+        try:
+            tactics = ast.literal_eval(tactics)
+        except (ValueError, SyntaxError):
+            return []
+    if not isinstance(tactics, dict):
+        return []
+    return [(entry['player']['name'], entry['player']['id'])
+            for entry in tactics.get('lineup', [])]
+
+
+def calculate_minutes_played(events_df):
+    """
+    Beregn spilte minutter per spiller per kamp fra Starting XI, bytter og røde kort
+
+    Kampklokken gjøres om til sammenhengende spilletid per kamp (tillegg i
+    første omgang teller med, overlapp mellom omgangene fjernes), og hver
+    spiller får ett intervall [inn, ut] per kamp. Alt beregnes med
+    groupby/merge over hele sesongen på én gang.
+
+    Args:
+        events_df (pd.DataFrame): DataFrame med alle events
+
+    Returns:
+        pd.DataFrame: Én rad per spiller per kamp med kolonnene
+            match_id, player, team, start_minute, end_minute, minutes_played
+    """
+    columns = ['match_id', 'player', 'team', 'start_minute', 'end_minute', 'minutes_played']
+
+    # Straffekonkurranse (periode 5) teller ikke som spilletid
+    events = events_df[events_df['period'] <= 4]
+    if events.empty:
+        return pd.DataFrame(columns=columns)
+
+    clock = events['minute'].to_numpy(dtype=float) + events['second'].to_numpy(dtype=float) / 60
+
+    # Start, slutt og forskyvning for hver omgang
+    bounds = (pd.DataFrame({'match_id': events['match_id'].to_numpy(),
+                            'period': events['period'].to_numpy(),
+                            'clock': clock})
+              .groupby(['match_id', 'period'])['clock'].agg(['min', 'max']))
+    bounds['length'] = bounds['max'] - bounds['min']
+    bounds['offset'] = bounds.groupby(level='match_id')['length'].cumsum() - bounds['length']
+    match_length = bounds.groupby(level='match_id')['length'].sum()
+
+    def elapsed(frame):
+        """Spilletid siden avspark for et utvalg events"""
+        keys = pd.MultiIndex.from_arrays([frame['match_id'], frame['period']])
+        period_info = bounds.reindex(keys)
+        frame_clock = frame['minute'].to_numpy(dtype=float) + frame['second'].to_numpy(dtype=float) / 60
+        return period_info['offset'].to_numpy() + frame_clock - period_info['min'].to_numpy()
+
+    # Startoppstillinger: inn ved minutt 0
+    starting_xi = events[events['type'] == 'Starting XI']
+    lineups = pd.DataFrame({
+        'match_id': starting_xi['match_id'].to_numpy(),
+        'team': starting_xi['team'].to_numpy(),
+        'lineup': [_parse_lineup(t) for t in starting_xi['tactics']],
+    }).explode('lineup').dropna(subset=['lineup'])
+    starters = pd.DataFrame({
+        'match_id': lineups['match_id'].to_numpy(),
+        'player': [entry[0] for entry in lineups['lineup']],
+        'team': lineups['team'].to_numpy(),
+        'start_minute': 0.0,
+    })
+
+    # Innbyttere: inn når byttet skjer
+    substitutions = events[events['type'] == 'Substitution']
+    substitutions = substitutions.assign(_elapsed=elapsed(substitutions))
+    subs_on = pd.DataFrame({
+        'match_id': substitutions['match_id'].to_numpy(),
+        'player': substitutions['substitution_replacement'].to_numpy(),
+        'team': substitutions['team'].to_numpy(),
+        'start_minute': substitutions['_elapsed'].to_numpy(),
+    })
+
+    # Ut av banen: byttet ut eller utvist
+    sent_off = events['type'].eq('Foul Committed') & events['foul_committed_card'].isin(['Red Card', 'Second Yellow'])
+    if 'bad_behaviour_card' in events.columns:
+        sent_off |= events['type'].eq('Bad Behaviour') & events['bad_behaviour_card'].isin(['Red Card', 'Second Yellow'])
+    red_cards = events[sent_off]
+    exits = pd.concat([
+        pd.DataFrame({'match_id': substitutions['match_id'].to_numpy(),
+                      'player': substitutions['player'].to_numpy(),
+                      'end_minute': substitutions['_elapsed'].to_numpy()}),
+        pd.DataFrame({'match_id': red_cards['match_id'].to_numpy(),
+                      'player': red_cards['player'].to_numpy(),
+                      'end_minute': elapsed(red_cards)}),
+    ], ignore_index=True).groupby(['match_id', 'player'], as_index=False)['end_minute'].min()
+
+    # Slå sammen til intervaller og regn ut minutter
+    appearances = (pd.concat([starters, subs_on], ignore_index=True)
+                   .dropna(subset=['player'])
+                   .groupby(['match_id', 'player'], as_index=False)
+                   .agg(team=('team', 'first'), start_minute=('start_minute', 'min')))
+    appearances = appearances.merge(exits, on=['match_id', 'player'], how='left')
+    full_time = appearances['match_id'].map(match_length).to_numpy()
+    appearances['end_minute'] = np.fmin(appearances['end_minute'].to_numpy(), full_time)
+    appearances['minutes_played'] = np.clip(
+        appearances['end_minute'].to_numpy() - appearances['start_minute'].to_numpy(), 0, None)
+
+    return appearances[columns]
+
+
+@traced("pipeline.aggregate")
 def calculate_player_statistics(events_df):
     """
     Beregn omfattende spillerstatistikk fra eventdata
@@ -236,6 +365,12 @@ def calculate_player_statistics(events_df):
     
     print(f"Behandler {len(player_events):,} events med spillerinformasjon")
     
+    # Spilte minutter fra oppstillinger, bytter og røde kort
+    with span("pipeline.minutes"):
+        match_minutes = calculate_minutes_played(events_df)
+    minutes_per_player = match_minutes.groupby('player')['minutes_played'].sum()
+    appearances_per_player = match_minutes.groupby('player')['match_id'].agg(set)
+    
     # Opprett tom statistikk-dict
     player_stats = {}
     
@@ -477,8 +612,9 @@ def calculate_player_statistics(events_df):
     final_stats = []
     
     for player_name, stats in player_stats.items():
-        # Konverter set til count
-        stats['matches_played'] = len(stats['matches_played'])
+        # Konverter set til count (kamper med events eller i oppstillingen)
+        stats['matches_played'] = len(stats['matches_played'] | appearances_per_player.get(player_name, set()))
+        stats['minutes_played'] = float(minutes_per_player.get(player_name, 0))
         
         # Beregn rater og gjennomsnitt
         if stats['passes_attempted'] > 0:
@@ -512,11 +648,40 @@ def calculate_player_statistics(events_df):
             stats['goals_per_game'] = 0
             stats['assists_per_game'] = 0
         
+        # Per-90-statistikk
+        if stats['minutes_played'] > 0:
+            per_90 = 90 / stats['minutes_played']
+            stats['passes_per_90'] = stats['passes_attempted'] * per_90
+            stats['shots_per_90'] = stats['shots_total'] * per_90
+            stats['goals_per_90'] = stats['goals_scored'] * per_90
+            stats['assists_per_90'] = stats['assists'] * per_90
+            stats['xg_per_90'] = stats['total_xg'] * per_90
+        else:
+            stats['passes_per_90'] = 0
+            stats['shots_per_90'] = 0
+            stats['goals_per_90'] = 0
+            stats['assists_per_90'] = 0
+            stats['xg_per_90'] = 0
+        
         final_stats.append(stats)
     
     # Konverter til DataFrame
     df = pd.DataFrame(final_stats)
     
+    # Expected Threat (xT) fra pasninger og føringer
+    with span("pipeline.xt"):
+        player_xt = calculate_player_xt(events_df)
+    df = df.merge(player_xt, on='player_name', how='left')
+    xt_columns = ['xt_added', 'xt_from_passes', 'xt_from_carries']
+    df[xt_columns] = df[xt_columns].fillna(0)
+    df['xt_per_90'] = (df['xt_added'] * 90 / df['minutes_played'].replace(0, np.nan)).fillna(0)
+    
+    # Pasningsnettverk (grad, sentralitet og betweenness)
+    with span("pipeline.network"):
+        network_features = calculate_network_features(events_df)
+    df = df.merge(network_features, on='player_name', how='left')
+    df[NETWORK_FEATURES] = df[NETWORK_FEATURES].fillna(0)
+    
     # Sorter etter antall kamper spilt og deretter total events
     df = df.sort_values(['matches_played', 'total_events'], ascending=[False, False])
     
@@ -525,6 +690,7 @@ def calculate_player_statistics(events_df):
     return df
 
 
+@traced("pipeline.save")
 def save_player_statistics(stats_df):
     """
     Lagre spillerstatistikk til CSV-filer
@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+Pasningsnettverk per lag og kamp med scipy.sparse
+
+Hver vellykket pasning (player -> pass_recipient) blir en kant i et rettet,
+vektet nettverk. Alle kamp/lag-nettverkene ligger i én blokkdiagonal
+sparse matrise, og sesongnettverket per lag er P^T A P der P er en sparse
+projeksjon fra (kamp, lag, spiller) til (lag, spiller). Nettverksmålene
+regnes ut med sparse lineær algebra, uten tette spiller x spiller-matriser
+eller Python-løkker over grafen:
+
+- vektet inn-/ut-grad og andel av lagets pasninger
+- egenvektorsentralitet (potensiterasjon normalisert per lag)
+- tilnærmet betweenness (korteste-vei-trær fra utvalgte kilder per lag,
+  der undertre-størrelser løses som et sparse ligningssystem)
+"""
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from scipy.sparse import csgraph
+
+NETWORK_FEATURES = [
+    'network_out_degree', 'network_in_degree', 'network_pass_share',
+    'network_eigenvector', 'network_betweenness',
+]
+
+# Kilder per lag i betweenness-tilnærmingen (exact=True bruker alle)
+DEFAULT_SOURCES = 16
+
+
+def build_match_networks(events_df):
+    """
+    Bygg pasningsnettverk for hvert lag i hver kamp
+
+    Args:
+        events_df (pd.DataFrame): DataFrame med events
+
+    Returns:
+        tuple: (adjacency, nodes) der adjacency er en blokkdiagonal csr_matrix
+            (pasninger fra rad til kolonne) og nodes er en DataFrame med
+            match_id, team og player for hver node
+    """
+    passes = events_df[(events_df['type'] == 'Pass') &
+                       events_df['pass_outcome'].isna() &
+                       events_df['player'].notna() &
+                       events_df['pass_recipient'].notna()]
+
+    passers = pd.MultiIndex.from_arrays([passes['match_id'], passes['team'], passes['player']])
+    recipients = pd.MultiIndex.from_arrays([passes['match_id'], passes['team'], passes['pass_recipient']])
+    node_index = passers.append(recipients).unique()
+
+    n = len(node_index)
+    adjacency = sparse.coo_matrix(
+        (np.ones(len(passes)), (node_index.get_indexer(passers), node_index.get_indexer(recipients))),
+        shape=(n, n)).tocsr()
+    nodes = node_index.to_frame(index=False, name=['match_id', 'team', 'player'])
+    return adjacency, nodes
+
+
+def aggregate_season_network(adjacency, nodes):
+    """
+    Summer kamp-nettverkene til ett sesongnettverk per lag
+
+    Returns:
+        tuple: (season_adjacency, season_nodes) med én node per (lag, spiller)
+    """
+    season_keys = pd.MultiIndex.from_arrays([nodes['team'], nodes['player']])
+    season_index = season_keys.unique()
+    projection = sparse.csr_matrix(
+        (np.ones(len(nodes)), (np.arange(len(nodes)), season_index.get_indexer(season_keys))),
+        shape=(len(nodes), len(season_index)))
+
+    season_adjacency = (projection.T @ adjacency @ projection).tocsr()
+    season_nodes = season_index.to_frame(index=False, name=['team', 'player'])
+    return season_adjacency, season_nodes
+
+
+def eigenvector_centrality(adjacency, blocks, max_iter=200, tol=1e-8):
+    """
+    Egenvektorsentralitet for hver blokk (lag) i en blokkdiagonal graf
+
+    Potensiterasjon på den symmetriske grafen (A + A^T + I), der vektoren
+    normaliseres per blokk i hver iterasjon slik at hvert lag får sin egen
+    ledende egenvektor (maks = 1 innen laget).
+
+    Args:
+        adjacency (sparse matrix): Vektet nabomatrise
+        blocks (np.ndarray): Blokk-id (0..k-1) for hver node
+
+    Returns:
+        np.ndarray: Sentralitet per node
+    """
+    n = adjacency.shape[0]
+    symmetric = (adjacency + adjacency.T + sparse.identity(n, format='csr')).tocsr()
+    centrality = np.ones(n)
+
+    for _ in range(max_iter):
+        updated = symmetric @ centrality
+        block_max = np.zeros(blocks.max() + 1)
+        np.maximum.at(block_max, blocks, updated)
+        updated /= np.where(block_max[blocks] > 0, block_max[blocks], 1)
+        converged = np.max(np.abs(updated - centrality)) < tol
+        centrality = updated
+        if converged:
+            break
+    return centrality
+
+
+def _tree_dependencies(distances, sources):
+    """
+    Summen av etterkommere per node over korteste-vei-trærne fra sources
+
+    For hver kilde gir Dijkstra et korteste-vei-tre; en nodes bidrag til
+    betweenness er antall etterkommere i treet. Undertre-størrelsene S for
+    alle kildene løses samtidig fra det sparse systemet S = 1 + T^T S, der T
+    er (blokkdiagonalen av) forelder-matrisene til trærne.
+    """
+    n = distances.shape[0]
+    k = len(sources)
+    _, predecessors = csgraph.dijkstra(distances, directed=True, indices=sources, return_predecessors=True)
+
+    # Forelder-matrise for alle trærne: node (i, v) -> (i, forelder)
+    tree_rows, nodes = np.nonzero(predecessors >= 0)
+    parents = predecessors[tree_rows, nodes]
+    parent_matrix = sparse.csr_matrix(
+        (np.ones(len(nodes)), (tree_rows * n + parents, tree_rows * n + nodes)), shape=(k * n, k * n))
+
+    # Undertre-størrelser: S = 1 + (barn-summer), iterert til treets dybde
+    subtree = np.ones(k * n)
+    for _ in range(n):
+        updated = 1.0 + parent_matrix @ subtree
+        if np.array_equal(updated, subtree):
+            break
+        subtree = updated
+
+    dependency = subtree.reshape(k, n) - 1.0
+    dependency[predecessors < 0] = 0.0  # kilden selv og noder som ikke nås
+    return dependency.sum(axis=0)
+
+
+def approximate_betweenness(adjacency, blocks, n_sources=DEFAULT_SOURCES, exact=False, random_state=0):
+    """
+    Tilnærmet betweenness fra korteste-vei-trær, regnet per lag
+
+    Kantlengden er 1 / antall pasninger (sterke koblinger er korte).
+    Grafen er blokkdiagonal (ingen pasninger mellom lag), så hvert lag
+    regnes for seg: Dijkstra og undertre-systemet er aldri større enn
+    kilder x lagets spillere, uansett hvor mange lag sesongen har. Som
+    standard brukes et utvalg av n_sources kilder per lag, og bidraget
+    skaleres opp til lagets størrelse.
+
+    Args:
+        adjacency (sparse matrix): Vektet nabomatrise
+        blocks (np.ndarray): Blokk-id (lag) for hver node
+        n_sources (int): Antall tilfeldige kilder per lag
+        exact (bool): Bruk alle noder som kilder (eksakt for unike korteste veier)
+        random_state (int): Frø for utvalget av kilder
+
+    Returns:
+        np.ndarray: Betweenness per node, normalisert med (n_lag - 1)(n_lag - 2)
+    """
+    distances = adjacency.tocsr(copy=True)
+    distances.data = 1.0 / distances.data
+    rng = np.random.default_rng(random_state)
+
+    betweenness = np.zeros(adjacency.shape[0])
+    order = np.argsort(blocks, kind='stable')
+    bounds = np.flatnonzero(np.diff(blocks[order])) + 1
+    for members in np.split(order, bounds):
+        m = len(members)
+        if m < 3:
+            continue  # ingen node kan ligge mellom to andre
+        if exact or n_sources >= m:
+            sources = np.arange(m)
+        else:
+            sources = np.sort(rng.choice(m, n_sources, replace=False))
+        block = distances[members][:, members]
+        betweenness[members] = _tree_dependencies(block, sources) * (m / len(sources)) / ((m - 1) * (m - 2))
+    return betweenness
+
+
+def calculate_network_features(events_df, n_sources=DEFAULT_SOURCES, exact_betweenness=False):
+    """
+    Nettverksmål per spiller fra sesongens pasningsnettverk
+
+    Args:
+        events_df (pd.DataFrame): DataFrame med alle events
+        n_sources (int): Antall kilder per lag i betweenness-tilnærmingen
+        exact_betweenness (bool): Regn betweenness fra alle noder (eksakt, men dyrere)
+
+    Returns:
+        pd.DataFrame: Én rad per spiller med player_name og kolonnene i NETWORK_FEATURES
+    """
+    adjacency, nodes = build_match_networks(events_df)
+    if len(nodes) == 0:
+        return pd.DataFrame(columns=['player_name'] + NETWORK_FEATURES)
+    season_adjacency, season_nodes = aggregate_season_network(adjacency, nodes)
+
+    teams = pd.factorize(season_nodes['team'])[0]
+    out_degree = np.asarray(season_adjacency.sum(axis=1)).ravel()
+    in_degree = np.asarray(season_adjacency.sum(axis=0)).ravel()
+    team_passes = np.bincount(teams, weights=out_degree)
+
+    features = pd.DataFrame({
+        'player_name': season_nodes['player'],
+        'network_out_degree': out_degree,
+        'network_in_degree': in_degree,
+        'network_pass_share': out_degree / np.maximum(team_passes[teams], 1),
+        'network_eigenvector': eigenvector_centrality(season_adjacency, teams),
+        'network_betweenness': approximate_betweenness(season_adjacency, teams, n_sources,
+                                                       exact=exact_betweenness),
+    })
+
+    # Spillere som har byttet lag: summer grader, vekt sentralitet med antall pasninger
+    involvement = out_degree + in_degree
+    weighted = features[['network_pass_share', 'network_eigenvector', 'network_betweenness']].mul(involvement, axis=0)
+    grouped = pd.concat([features[['player_name', 'network_out_degree', 'network_in_degree']], weighted],
+                        axis=1).assign(_involvement=involvement).groupby('player_name', sort=False).sum()
+    for column in ['network_pass_share', 'network_eigenvector', 'network_betweenness']:
+        grouped[column] /= grouped['_involvement'].where(grouped['_involvement'] > 0, 1)
+
+    return grouped.reset_index()[['player_name'] + NETWORK_FEATURES]
+
+
+if __name__ == "__main__":
+    import sys
+
+    filename = sys.argv[1] if len(sys.argv) > 1 else 'data/sample_match_events.csv'
+    features = calculate_network_features(pd.read_csv(filename))
+    print(features.sort_values('network_eigenvector', ascending=False).head(10))
@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+Kobling av StatsBomb-spillere til FIFA-rader
+
+StatsBomb bruker fulle navn ("Mesut Özil") mens FIFA har short_name
+("M. Özil") og long_name. I stedet for å sammenligne alle par blokkes
+kandidatene først: par må dele et normalisert etternavnsledd,
+og fødselsår må stemme (±1 år) når det finnes på begge sider. Spillere som
+ikke finner en kandidat via navn (kallenavn som "Fernandinho") prøves på
+nytt i blokker av lag og fødselsår. Innenfor blokkene scores alle par i én
+vektorisert operasjon med cosine similarity på tegn-n-gram.
+
+Koblingstabellen lagres som CSV og oppdateres inkrementelt: bare spillere
+som ikke allerede er koblet blir scoret ved neste kjøring.
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+from sklearn.feature_extraction.text import HashingVectorizer
+
+LINKS_PATH = 'data/player_links.csv'
+LINK_COLUMNS = ['player_id', 'player_name', 'team', 'sofifa_id', 'short_name', 'long_name', 'club_name',
+                'score', 'method']
+
+# Vekt på lagnavn i totalscoren (resten er navnelikhet)
+TEAM_WEIGHT = 0.2
+
+_ngrams = HashingVectorizer(analyzer='char_wb', ngram_range=(2, 3), n_features=2 ** 18,
+                            alternate_sign=False, norm='l2')
+
+
+def normalize_names(names):
+    """
+    Normaliser navn: uten aksenter, små bokstaver, bare bokstaver og mellomrom
+
+    Args:
+        names (pd.Series): Navn
+
+    Returns:
+        pd.Series: Normaliserte navn ('' for manglende)
+    """
+    return (names.fillna('').astype(str)
+            .str.normalize('NFKD').str.encode('ascii', 'ignore').str.decode('ascii')
+            .str.lower()
+            .str.replace(r'[^a-z ]+', ' ', regex=True)
+            .str.replace(r'\s+', ' ', regex=True)
+            .str.strip())
+
+
+def _initial_form(normalized):
+    """'mesut ozil' -> 'm ozil', samme form som en normalisert FIFA short_name"""
+    parts = normalized.str.split(' ', n=1)
+    return (parts.str[0].str[:1] + ' ' + parts.str[1].fillna('')).str.strip()
+
+
+def _surname_tokens(normalized, min_length=3):
+    """
+    Etternavnsledd per rad som (radnummer, ledd), brukt som blokknøkler
+
+    Første ledd (fornavn eller initial) hoppes over når navnet har flere
+    ledd, så vanlige fornavn ikke gir enorme blokker.
+    """
+    tokens = normalized.str.split(' ')
+    tokens = tokens.where(tokens.str.len() <= 1, tokens.str[1:]).explode()
+    tokens = tokens[tokens.str.len() >= min_length]
+    return pd.DataFrame({'row': tokens.index.to_numpy(), 'token': tokens.to_numpy()})
+
+
+def _birth_years(df, column):
+    if column not in df.columns:
+        return np.full(len(df), np.nan)
+    return pd.to_datetime(df[column], errors='coerce').dt.year.to_numpy(dtype=float)
+
+
+def _pair_similarity(left, right, left_rows, right_rows):
+    """Cosine similarity mellom n-gramvektorer for mange par på én gang"""
+    if len(left_rows) == 0:
+        return np.empty(0)
+    return np.asarray(left[left_rows].multiply(right[right_rows]).sum(axis=1)).ravel()
+
+
+def _greedy_assignment(sb_rows, fifa_rows):
+    """
+    Posisjoner til parene som beholdes når par sortert etter synkende score tas i rekkefølge
+
+    Et par beholdes bare hvis verken StatsBomb-spilleren eller FIFA-raden er brukt av et par med høyere score.
+    """
+    used_sb, used_fifa = set(), set()
+    keep = []
+    for i, (sb, fifa) in enumerate(zip(sb_rows.tolist(), fifa_rows.tolist())):
+        if sb not in used_sb and fifa not in used_fifa:
+            used_sb.add(sb)
+            used_fifa.add(fifa)
+            keep.append(i)
+    return np.asarray(keep, dtype=np.intp)
+
+
+class PlayerLinker:
+    """
+    Kobler StatsBomb-spillere til FIFA-rader med blokking og vektorisert navnelikhet
+
+    FIFA-siden (blokknøkler og n-gramvektorer) bygges én gang, så samme
+    linker kan brukes for flere sesonger eller inkrementelle oppdateringer.
+
+    Args:
+        fifa_df (pd.DataFrame): FIFA-data med sofifa_id, short_name, long_name, club_name og dob
+        min_score (float): Laveste totalscore for at en kobling godtas
+    """
+
+    def __init__(self, fifa_df, min_score=0.6):
+        self.fifa = fifa_df.reset_index(drop=True)
+        self.min_score = min_score
+
+        short = normalize_names(self.fifa['short_name'])
+        long = normalize_names(self.fifa.get('long_name', self.fifa['short_name']))
+        self.fifa_short = _ngrams.transform(short)
+        self.fifa_long = _ngrams.transform(long)
+        self.fifa_team_names = normalize_names(self.fifa.get('club_name', pd.Series('', index=self.fifa.index)))
+        self.fifa_team = _ngrams.transform(self.fifa_team_names)
+        self.fifa_years = _birth_years(self.fifa, 'dob')
+
+        self.fifa_tokens = pd.concat([_surname_tokens(short), _surname_tokens(long)]).drop_duplicates()
+
+    def _candidates(self, tokens, sb_years, fifa_years, team_blocks):
+        """Kandidatpar fra navneblokker og, for de uten treff, lag/fødselsår-blokker"""
+        by_name = tokens.merge(self.fifa_tokens, on='token', suffixes=('_sb', '_fifa'))
+        pairs = by_name[['row_sb', 'row_fifa']].drop_duplicates().assign(method='name')
+
+        missing = np.setdiff1d(np.arange(len(sb_years)), pairs['row_sb'].to_numpy())
+        if len(missing) and team_blocks is not None:
+            sb_teams, fifa_teams = team_blocks
+            sb_block = pd.DataFrame({'row_sb': missing, 'team': sb_teams[missing]})
+            fifa_block = pd.DataFrame({'row_fifa': np.arange(len(fifa_teams)), 'team': fifa_teams})
+            by_team = sb_block[sb_block['team'] != ''].merge(fifa_block, on='team')
+            pairs = pd.concat([pairs, by_team[['row_sb', 'row_fifa']].assign(method='team_birth_year')])
+
+        # Fødselsår må stemme når det finnes på begge sider
+        sb_year, fifa_year = sb_years[pairs['row_sb']], fifa_years[pairs['row_fifa']]
+        known = ~np.isnan(sb_year) & ~np.isnan(fifa_year)
+        return pairs[~known | (np.abs(sb_year - fifa_year) <= 1)]
+
+    def link(self, statsbomb_df, exclude_sofifa_ids=()):
+        """
+        Finn beste FIFA-rad for hver StatsBomb-spiller
+
+        Args:
+            statsbomb_df (pd.DataFrame): Spillere med player_name og gjerne player_id, team og birth_date
+            exclude_sofifa_ids (iterable): FIFA-rader som allerede er koblet og ikke kan brukes igjen
+
+        Returns:
+            pd.DataFrame: Én rad per koblet spiller (kolonnene i LINK_COLUMNS)
+        """
+        players = statsbomb_df.reset_index(drop=True)
+        full = normalize_names(players['player_name'])
+        sb_years = _birth_years(players, 'birth_date')
+
+        team_blocks = None
+        has_team = 'team' in players.columns
+        if has_team:
+            sb_team_names = normalize_names(players['team'])
+            team_blocks = (sb_team_names.to_numpy(), self.fifa_team_names.to_numpy())
+
+        pairs = self._candidates(_surname_tokens(full), sb_years, self.fifa_years, team_blocks)
+        left, right = pairs['row_sb'].to_numpy(), pairs['row_fifa'].to_numpy()
+
+        # Navnelikhet: fullt navn mot long_name, og initialform mot short_name
+        sb_full = _ngrams.transform(full)
+        sb_short = _ngrams.transform(_initial_form(full))
+        name_score = np.maximum(_pair_similarity(sb_full, self.fifa_long, left, right),
+                                _pair_similarity(sb_short, self.fifa_short, left, right))
+
+        score = name_score
+        if has_team:
+            team_score = _pair_similarity(_ngrams.transform(sb_team_names), self.fifa_team, left, right)
+            score = (1 - TEAM_WEIGHT) * name_score + TEAM_WEIGHT * team_score
+
+        taken = np.isin(self.fifa['sofifa_id'].to_numpy()[right], np.asarray(list(exclude_sofifa_ids)))
+        scored = pairs.assign(score=score)
+        scored = scored[(scored['score'] >= self.min_score) & ~taken]
+
+        # Grådig én-til-én: høyeste score først, hver spiller og FIFA-rad brukes én gang
+        scored = scored.sort_values('score', ascending=False, kind='stable')
+        scored = scored.iloc[_greedy_assignment(scored['row_sb'].to_numpy(), scored['row_fifa'].to_numpy())]
+
+        sb_rows, fifa_rows = scored['row_sb'].to_numpy(), scored['row_fifa'].to_numpy()
+        links = pd.DataFrame({
+            'player_id': players['player_id'].to_numpy()[sb_rows] if 'player_id' in players.columns else np.nan,
+            'player_name': players['player_name'].to_numpy()[sb_rows],
+            'team': players['team'].to_numpy()[sb_rows] if has_team else np.nan,
+        })
+        for column in ['sofifa_id', 'short_name', 'long_name', 'club_name']:
+            links[column] = self.fifa[column].to_numpy()[fifa_rows] if column in self.fifa.columns else np.nan
+        links['score'] = scored['score'].round(4).to_numpy()
+        links['method'] = scored['method'].to_numpy()
+        return links[LINK_COLUMNS].sort_values('player_name').reset_index(drop=True)
+
+
+def load_links(filename=LINKS_PATH):
+    """Last inn koblingstabellen (tom tabell hvis filen ikke finnes)"""
+    if not os.path.exists(filename):
+        return pd.DataFrame(columns=LINK_COLUMNS)
+    return pd.read_csv(filename)
+
+
+def update_links(linker, statsbomb_df, filename=LINKS_PATH):
+    """
+    Inkrementell kobling: bare spillere som ikke finnes i tabellen blir scoret
+
+    Spillere identifiseres med player_id når den finnes, ellers med player_name.
+
+    Returns:
+        pd.DataFrame: Hele den oppdaterte koblingstabellen (lagres også til filename)
+    """
+    existing = load_links(filename)
+    key = 'player_id' if 'player_id' in statsbomb_df.columns else 'player_name'
+    players = statsbomb_df.drop_duplicates(key)
+    new_players = players[~players[key].isin(existing[key])]
+
+    if len(new_players):
+        new_links = linker.link(new_players, exclude_sofifa_ids=existing['sofifa_id'].dropna())
+        existing = pd.concat([existing, new_links], ignore_index=True) if len(existing) else new_links
+        print(f"🔗 Koblet {len(new_links)} av {len(new_players)} nye spillere")
+    else:
+        print("🔗 Ingen nye spillere å koble")
+
+    os.makedirs(os.path.dirname(filename) or '.', exist_ok=True)
+    existing.to_csv(filename, index=False)
+    return existing
+
+
+if __name__ == "__main__":
+    import sys
+    import time
+
+    stats_file = sys.argv[1] if len(sys.argv) > 1 else 'data/pl_2015_2016_player_stats_full_20250910_181721.csv'
+    fifa_file = sys.argv[2] if len(sys.argv) > 2 else 'data/players_16.csv'
+
+    start = time.perf_counter()
+    linker = PlayerLinker(pd.read_csv(fifa_file, low_memory=False))
+    links = update_links(linker, pd.read_csv(stats_file))
+    print(f"⏱️ {time.perf_counter() - start:.2f}s, {len(links)} koblinger i {LINKS_PATH}")
+    print(links.sort_values('score').head(10))
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Fordelingsbasert spillerlikhet med 1-D Wasserstein-avstander
+
+I stedet for tellinger som short_passes/long_passes beskrives hver spiller
+med fordelingen av pasningslengde, pasningsvinkel, skuddavstand og
+x-posisjon for aksjoner. Hver fordeling lagres som en kvantilskisse med et
+fast antall kvantiler. For 1-D fordelinger er Wasserstein-1-avstanden
+integralet av |F^-1(u) - G^-1(u)|, som på skissene blir gjennomsnittet av
+absolutte kvantilforskjeller - ett vektorisert uttrykk mot alle spillere.
+"""
+
+import numpy as np
+import pandas as pd
+
+from event_locations import PITCH_LENGTH, PITCH_WIDTH, location_array
+
+DISTRIBUTIONS = ['pass_length', 'pass_angle', 'shot_distance', 'action_x']
+
+
+def _distribution_values(events_df):
+    """
+    Hent (spiller, fordeling, verdi) for alle fordelingene
+
+    Returns:
+        list: Én (spillere, verdier) per fordeling i DISTRIBUTIONS
+    """
+    events = events_df[events_df['player'].notna()]
+    is_pass = (events['type'] == 'Pass').to_numpy()
+    is_shot = (events['type'] == 'Shot').to_numpy()
+    players = events['player'].to_numpy()
+
+    xy = location_array(events['location'])
+    shots_xy = xy[is_shot]
+    shot_distance = np.hypot(PITCH_LENGTH - shots_xy[:, 0], PITCH_WIDTH / 2 - shots_xy[:, 1])
+
+    return [
+        (players[is_pass], events['pass_length'].to_numpy(dtype=float)[is_pass]),
+        (players[is_pass], events['pass_angle'].to_numpy(dtype=float)[is_pass]),
+        (players[is_shot], shot_distance),
+        (players, xy[:, 0]),
+    ]
+
+
+def grouped_quantiles(codes, values, n_groups, levels):
+    """
+    Kvantiler per gruppe uten løkke over gruppene
+
+    Verdiene sorteres på (gruppe, verdi); kvantil u i en gruppe med n
+    verdier er den empiriske inverse fordelingsfunksjonen, dvs. verdien i
+    posisjon start + floor(u * n). Da går summen over skissene mot den
+    eksakte Wasserstein-avstanden mellom de empiriske fordelingene.
+
+    Args:
+        codes (np.ndarray): Gruppe-id (0..n_groups-1) per verdi
+        values (np.ndarray): Verdier
+        n_groups (int): Antall grupper
+        levels (np.ndarray): Kvantilnivåer i [0, 1]
+
+    Returns:
+        tuple: (quantiles (n_groups, len(levels)) med NaN for tomme grupper, counts (n_groups,))
+    """
+    valid = ~np.isnan(values)
+    codes, values = codes[valid], values[valid]
+    order = np.lexsort((values, codes))
+    sorted_values = values[order]
+
+    counts = np.bincount(codes, minlength=n_groups)
+    starts = np.cumsum(counts) - counts
+
+    offsets = np.minimum(np.floor(levels[None, :] * counts[:, None]).astype(np.int64),
+                         np.maximum(counts - 1, 0)[:, None])
+    positions = starts[:, None] + offsets
+
+    empty = counts == 0
+    if len(sorted_values) == 0:
+        return np.full((n_groups, len(levels)), np.nan), counts
+    positions[empty] = 0
+
+    quantiles = sorted_values[positions]
+    quantiles[empty] = np.nan
+    return quantiles, counts
+
+
+class QuantileSketches:
+    """
+    Kvantilskisser (spiller x fordeling x kvantil) for alle spillere
+
+    Args:
+        players (pd.Index): Spillernavn
+        quantiles (np.ndarray): Form (n_spillere, n_fordelinger, n_kvantiler)
+        counts (np.ndarray): Antall observasjoner bak hver skisse, form (n_spillere, n_fordelinger)
+        distributions (list): Navn på fordelingene
+    """
+
+    def __init__(self, players, quantiles, counts, distributions=DISTRIBUTIONS):
+        self.players = pd.Index(players)
+        self.quantiles = np.asarray(quantiles, dtype=np.float32)
+        self.counts = np.asarray(counts)
+        self.distributions = list(distributions)
+
+        # Typisk spredning per fordeling, slik at avstander i meter og radianer kan summeres
+        spread = self.quantiles[:, :, -1] - self.quantiles[:, :, 0]
+        has_sketch = ~np.isnan(spread)
+        spread = np.where(has_sketch, spread, 0).sum(axis=0) / np.maximum(has_sketch.sum(axis=0), 1)
+        self.scale = np.where(np.isfinite(spread) & (spread > 0), spread, 1.0)
+
+    @classmethod
+    def from_events(cls, events_df, n_quantiles=32, min_count=5):
+        """
+        Bygg skisser fra StatsBomb eventdata
+
+        Args:
+            events_df (pd.DataFrame): DataFrame med events
+            n_quantiles (int): Antall kvantiler per skisse (fast størrelse)
+            min_count (int): Skisser med færre observasjoner settes til NaN
+        """
+        players = pd.Index(events_df.loc[events_df['player'].notna(), 'player'].unique())
+        levels = (np.arange(n_quantiles) + 0.5) / n_quantiles
+
+        quantiles = np.full((len(players), len(DISTRIBUTIONS), n_quantiles), np.nan)
+        counts = np.zeros((len(players), len(DISTRIBUTIONS)), dtype=np.int64)
+        for d, (names, values) in enumerate(_distribution_values(events_df)):
+            quantiles[:, d], counts[:, d] = grouped_quantiles(
+                players.get_indexer(names), values, len(players), levels)
+
+        quantiles[counts < min_count] = np.nan
+        return cls(players, quantiles, counts)
+
+    def wasserstein(self, query):
+        """
+        1-D Wasserstein-avstand fra en spiller til alle spillere, per fordeling
+
+        Args:
+            query (str or np.ndarray): Spillernavn eller en skisse (n_fordelinger, n_kvantiler)
+
+        Returns:
+            np.ndarray: Avstander med form (n_spillere, n_fordelinger), skalert per fordeling
+        """
+        if isinstance(query, str):
+            query = self.quantiles[self.players.get_loc(query)]
+        return np.abs(self.quantiles - query[None, :, :]).mean(axis=2) / self.scale
+
+    def find_similar(self, player_name, top_n=5, distributions=None, weights=None):
+        """
+        Finn spillerne med mest like fordelinger (summert Wasserstein-avstand)
+
+        Args:
+            player_name (str): Spilleren det søkes etter
+            top_n (int): Antall spillere som returneres
+            distributions (list): Fordelinger som brukes (standard: alle som spilleren har)
+            weights (dict): Vekt per fordeling (standard: 1)
+
+        Returns:
+            pd.DataFrame: player_name, wasserstein (lavere = mer lik) og avstand per fordeling
+        """
+        if player_name not in self.players:
+            raise ValueError(f"{player_name} finnes ikke i skissene.")
+        query_pos = self.players.get_loc(player_name)
+
+        distances = self.wasserstein(player_name)
+        selected = np.array([d in (distributions or self.distributions) for d in self.distributions])
+        selected &= ~np.isnan(self.quantiles[query_pos]).any(axis=1)
+        weight_vector = np.array([(weights or {}).get(d, 1.0) for d in self.distributions]) * selected
+
+        # Spillere som mangler en valgt fordeling kan ikke sammenlignes
+        total = np.where(selected, distances, 0.0) @ weight_vector
+        total[np.isnan(distances[:, selected]).any(axis=1)] = np.inf
+        total[query_pos] = np.inf
+
+        top_n = min(top_n, int(np.isfinite(total).sum()))
+        top_indices = np.argpartition(total, top_n - 1)[:top_n] if top_n > 0 else np.empty(0, dtype=int)
+        top_indices = top_indices[np.argsort(total[top_indices])]
+
+        result = pd.DataFrame({'player_name': self.players[top_indices], 'wasserstein': total[top_indices]})
+        for d, name in enumerate(self.distributions):
+            result[name] = distances[top_indices, d]
+        return result
+
+    def save(self, filename):
+        """Lagre skissene som en komprimert .npz-fil"""
+        np.savez_compressed(filename, players=self.players.to_numpy(dtype=str), quantiles=self.quantiles,
+                            counts=self.counts, distributions=np.array(self.distributions))
+
+    @classmethod
+    def load(cls, filename):
+        """Last inn skisser lagret med save()"""
+        with np.load(filename) as data:
+            return cls(data['players'], data['quantiles'], data['counts'], list(data['distributions']))
+
+
+if __name__ == "__main__":
+    import sys
+
+    filename = sys.argv[1] if len(sys.argv) > 1 else 'data/sample_match_events.csv'
+    sketches = QuantileSketches.from_events(pd.read_csv(filename))
+    print(f"Skisser for {len(sketches.players)} spillere, {sketches.quantiles.shape[2]} kvantiler per fordeling")
+    example = sketches.players[np.argmax(sketches.counts[:, 0])]
+    print(f"\nSpillere med pasningsfordeling lik {example}:")
+    print(sketches.find_similar(example, distributions=['pass_length', 'pass_angle', 'action_x']))
@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+Formtabeller per spiller over de siste N serierundene
+
+Eventdata aggregeres til en matrise (statistikk x spiller x serierunde) og
+lagres som kumulative summer. Summen over et vindu er da bare
+C[:, :, slutt] - C[:, :, slutt - N], så alle vinduer for alle spillere
+regnes ut med én vektorisert operasjon. Nye serierunder legges til
+inkrementelt ved å forlenge de kumulative summene med én kolonne.
+
+Vinduene er felles serierunder, ikke hver spillers egne siste N kamper:
+en spiller som ikke spilte i noen av rundene får færre kamper i vinduet
+(se 'appearances').
+"""
+
+import numpy as np
+import pandas as pd
+from sklearn.metrics.pairwise import cosine_similarity
+from sklearn.preprocessing import StandardScaler
+
+# Statistikk som følges i formtabellen
+FORM_STATS = [
+    'appearances', 'minutes_played', 'xg', 'shots', 'goals',
+    'key_passes', 'passes_completed', 'pressures', 'ball_recoveries',
+]
+
+
+def _flag(events_df, column, value=True):
+    """Boolsk maske for en kolonne som kan mangle i eventdata"""
+    if column not in events_df.columns:
+        return np.zeros(len(events_df), dtype=bool)
+    return (events_df[column] == value).to_numpy()
+
+
+def _match_weeks(events_df):
+    """
+    Serierunde per event: match_week, ellers rangert kampdato, ellers rangert match_id
+
+    Uten match_week og match_date blir hver kamp sin egen runde, i match_id-rekkefølge.
+    """
+    if 'match_week' in events_df.columns:
+        return events_df['match_week']
+    if 'match_date' in events_df.columns:
+        return pd.to_datetime(events_df['match_date']).rank(method='dense').astype(int)
+    if 'match_id' in events_df.columns:
+        return events_df['match_id'].rank(method='dense').astype(int)
+    raise ValueError("Eventdata mangler kolonnene 'match_week', 'match_date' og 'match_id'; "
+                     "minst én trengs for å ordne serierundene")
+
+
+def weekly_player_values(events_df, match_minutes=None):
+    """
+    Summer formstatistikk per spiller per serierunde
+
+    Args:
+        events_df (pd.DataFrame): DataFrame med events ('match_week', 'match_date' eller 'match_id' ordner rundene)
+        match_minutes (pd.DataFrame): Valgfritt, resultat fra calculate_minutes_played()
+
+    Returns:
+        pd.DataFrame: MultiIndex (player, match_week) med én kolonne per statistikk i FORM_STATS
+    """
+    events = events_df[events_df['player'].notna()]
+    event_type = events['type'].to_numpy()
+    is_shot = event_type == 'Shot'
+    is_pass = event_type == 'Pass'
+
+    values = pd.DataFrame({
+        'player': events['player'].to_numpy(),
+        'match_week': _match_weeks(events).to_numpy(),
+        'match_id': events['match_id'].to_numpy(),
+        'xg': np.where(is_shot, events['shot_statsbomb_xg'].fillna(0).to_numpy(dtype=float), 0.0),
+        'shots': is_shot,
+        'goals': is_shot & _flag(events, 'shot_outcome', 'Goal'),
+        'key_passes': is_pass & (_flag(events, 'pass_shot_assist') | _flag(events, 'pass_goal_assist')),
+        'passes_completed': is_pass & events['pass_outcome'].isna().to_numpy(),
+        'pressures': event_type == 'Pressure',
+        'ball_recoveries': event_type == 'Ball Recovery',
+    })
+
+    weekly = values.groupby(['player', 'match_week']).agg(
+        appearances=('match_id', 'nunique'),
+        **{stat: (stat, 'sum') for stat in FORM_STATS if stat in values.columns},
+    ).astype(float)
+
+    weekly['minutes_played'] = 0.0
+    if match_minutes is not None and len(match_minutes) > 0:
+        week_of_match = values.groupby('match_id')['match_week'].first()
+        minutes = match_minutes.assign(match_week=match_minutes['match_id'].map(week_of_match))
+        minutes = minutes.groupby(['player', 'match_week'])['minutes_played'].sum()
+        weekly = weekly.reindex(weekly.index.union(minutes.index), fill_value=0.0)
+        weekly['minutes_played'] = minutes.reindex(weekly.index, fill_value=0.0)
+        # Innbyttere uten events har likevel spilt kampen
+        weekly['appearances'] = np.maximum(weekly['appearances'], (weekly['minutes_played'] > 0).astype(float))
+
+    return weekly[FORM_STATS]
+
+
+class RollingForm:
+    """
+    Kumulative summer av formstatistikk per spiller og serierunde
+
+    Bruk RollingForm.from_events() for en hel sesong og add_match_week() for
+    å oppdatere etter en ny serierunde.
+    """
+
+    def __init__(self):
+        self.players = pd.Index([], dtype=object)
+        self.weeks = np.empty(0, dtype=int)
+        # Form (statistikk, spiller, serierunde + 1); kolonne 0 er null
+        self.cumulative = np.zeros((len(FORM_STATS), 0, 1))
+
+    @classmethod
+    def from_events(cls, events_df, match_minutes=None):
+        """Bygg formtabellen for alle serierunder i eventdataene"""
+        form = cls()
+        form.add_match_week(events_df, match_minutes)
+        return form
+
+    def add_match_week(self, events_df, match_minutes=None):
+        """
+        Legg til én eller flere nye serierunder
+
+        Kun de nye rundene aggregeres; eksisterende kumulative summer
+        forlenges uten å regnes ut på nytt.
+
+        Args:
+            events_df (pd.DataFrame): Events for de nye serierundene
+            match_minutes (pd.DataFrame): Valgfritt, spilte minutter for de samme kampene
+        """
+        weekly = weekly_player_values(events_df, match_minutes)
+        if weekly.empty:
+            return self
+
+        new_weeks = np.sort(weekly.index.get_level_values('match_week').unique().to_numpy())
+        if len(self.weeks) and new_weeks[0] <= self.weeks[-1]:
+            raise ValueError(f"Serierunde {new_weeks[0]} er allerede lagt til (siste runde er {self.weeks[-1]})")
+
+        # Nye spillere får nuller for tidligere runder
+        players = self.players.append(weekly.index.get_level_values('player').unique().difference(self.players))
+        cumulative = np.zeros((len(FORM_STATS), len(players), self.cumulative.shape[2]))
+        cumulative[:, :len(self.players), :] = self.cumulative
+
+        # (statistikk, spiller, ny runde) og forleng de kumulative summene
+        player_pos = players.get_indexer(weekly.index.get_level_values('player'))
+        week_pos = np.searchsorted(new_weeks, weekly.index.get_level_values('match_week'))
+        block = np.zeros((len(FORM_STATS), len(players), len(new_weeks)))
+        block[:, player_pos, week_pos] = weekly.to_numpy().T
+        extension = cumulative[:, :, -1:] + np.cumsum(block, axis=2)
+
+        self.players = players
+        self.weeks = np.concatenate((self.weeks, new_weeks))
+        self.cumulative = np.concatenate((cumulative, extension), axis=2)
+        return self
+
+    def _window_sums(self, window, end_position):
+        start_position = max(end_position - window, 0)
+        return self.cumulative[:, :, end_position] - self.cumulative[:, :, start_position]
+
+    def snapshot(self, window=5, match_week=None, min_minutes=0):
+        """
+        Formstatistikk for alle spillere over de siste `window` serierundene
+
+        Vinduet er de samme rundene for alle spillere, ikke hver spillers siste `window` kamper.
+
+        Args:
+            window (int): Antall serierunder i vinduet
+            match_week (int): Siste runde i vinduet (standard: siste runde som er lagt til)
+            min_minutes (float): Ta bare med spillere med minst så mange minutter i vinduet
+
+        Returns:
+            pd.DataFrame: Én rad per spiller med summer og per-90-verdier i vinduet
+        """
+        if not len(self.weeks):
+            raise ValueError("Formtabellen er tom. Legg til serierunder først.")
+        if match_week is None:
+            end_position = len(self.weeks)
+        else:
+            end_position = int(np.searchsorted(self.weeks, match_week, side='right'))
+
+        sums = self._window_sums(window, end_position)
+        snapshot = pd.DataFrame(sums.T, columns=FORM_STATS)
+        snapshot.insert(0, 'player_name', self.players)
+
+        minutes = snapshot['minutes_played'].to_numpy()
+        with np.errstate(divide='ignore', invalid='ignore'):
+            for stat in FORM_STATS[2:]:
+                snapshot[f'{stat}_per_90'] = np.where(minutes > 0, snapshot[stat] * 90 / minutes, 0.0)
+
+        snapshot = snapshot[snapshot['appearances'] > 0]
+        if min_minutes:
+            snapshot = snapshot[snapshot['minutes_played'] >= min_minutes]
+        return snapshot.reset_index(drop=True)
+
+    def rolling(self, stat, window=5):
+        """
+        Rullerende sum av én statistikk for alle spillere og alle serierunder
+
+        Returns:
+            pd.DataFrame: Spillere som rader, serierunder som kolonner
+        """
+        stat_cumulative = self.cumulative[FORM_STATS.index(stat)]
+        starts = np.maximum(np.arange(1, len(self.weeks) + 1) - window, 0)
+        sums = stat_cumulative[:, 1:] - stat_cumulative[:, starts]
+        return pd.DataFrame(sums, index=self.players, columns=self.weeks)
+
+
+def find_players_in_similar_form(snapshot, player_name, features=None, top_n=5):
+    """
+    Finn spillere med lignende form som en gitt spiller (cosine similarity)
+
+    Args:
+        snapshot (pd.DataFrame): Resultat fra RollingForm.snapshot()
+        player_name (str): Spilleren det søkes etter
+        features (list): Kolonner som sammenlignes (standard: alle per-90-verdier)
+        top_n (int): Antall spillere som returneres
+
+    Returns:
+        pd.DataFrame: De top_n mest like spillerne med likhetsscore
+    """
+    if features is None:
+        features = [column for column in snapshot.columns if column.endswith('_per_90')]
+
+    matches = np.flatnonzero(snapshot['player_name'].to_numpy() == player_name)
+    if len(matches) == 0:
+        raise ValueError(f"{player_name} finnes ikke i formtabellen.")
+
+    X_scaled = StandardScaler().fit_transform(snapshot[features])
+    similarities = cosine_similarity(X_scaled[matches[:1]], X_scaled)[0]
+
+    order = np.argsort(similarities)[::-1]
+    order = order[order != matches[0]][:top_n]
+    similar_players = snapshot.iloc[order][['player_name']].copy()
+    similar_players['similarity'] = similarities[order]
+    return similar_players
+
+
+if __name__ == "__main__":
+    import sys
+
+    filename = sys.argv[1] if len(sys.argv) > 1 else 'data/sample_match_events.csv'
+    form = RollingForm.from_events(pd.read_csv(filename))
+    print(f"Formtabell for {len(form.players)} spillere over {len(form.weeks)} serierunder")
+    print(form.snapshot(window=5).sort_values('xg', ascending=False).head(10))
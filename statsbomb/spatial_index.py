@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Romlig indeks over eventdata for sonebaserte spørringer
+
+Bygger et uniformt rutenett over banen der hver celle har en postliste med
+event-rader, sortert etter event-type og spiller. Spørringer som "hvem mottar
+flest baller i venstre halvrom i siste tredjedel" leser kun cellene som
+overlapper sonen: celler helt inne i sonen telles direkte fra postlistene,
+og bare kantcellene sjekkes punkt for punkt.
+"""
+
+import numpy as np
+import pandas as pd
+
+from event_locations import PITCH_LENGTH, PITCH_WIDTH, clip_to_pitch, location_array
+
+# Navngitte soner i StatsBomb-koordinater: (x_min, x_max, y_min, y_max).
+# Laget som angriper spiller mot høyre, og lav y er venstre side.
+ZONES = {
+    'final_third': (80.0, 120.0, 0.0, 80.0),
+    'middle_third': (40.0, 80.0, 0.0, 80.0),
+    'defensive_third': (0.0, 40.0, 0.0, 80.0),
+    'penalty_box': (102.0, 120.0, 18.0, 62.0),
+    'zone_14': (80.0, 102.0, 30.0, 50.0),
+    'left_half_space': (0.0, 120.0, 18.0, 30.0),
+    'right_half_space': (0.0, 120.0, 50.0, 62.0),
+    'left_half_space_final_third': (80.0, 120.0, 18.0, 30.0),
+    'right_half_space_final_third': (80.0, 120.0, 50.0, 62.0),
+    'left_wing': (0.0, 120.0, 0.0, 18.0),
+    'right_wing': (0.0, 120.0, 62.0, 80.0),
+}
+
+
+def _concat_ranges(starts, stops):
+    """Slå sammen flere [start, stop) intervaller til én indeksliste uten Python-løkke"""
+    lengths = stops - starts
+    total = int(lengths.sum())
+    if total == 0:
+        return np.empty(0, dtype=np.int64)
+    offsets = np.repeat(starts - (np.cumsum(lengths) - lengths), lengths)
+    return offsets + np.arange(total)
+
+
+def _points_in_polygon(xy, polygon):
+    """Ray casting for mange punkter mot ett polygon (løkke over kantene, ikke punktene)"""
+    x, y = xy[:, 0], xy[:, 1]
+    inside = np.zeros(len(xy), dtype=bool)
+    x_start, y_start = polygon[-1]
+    for x_end, y_end in polygon:
+        crosses = (y_end > y) != (y_start > y)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            x_cross = (x_start - x_end) * (y - y_end) / (y_start - y_end) + x_end
+        inside ^= crosses & (x < x_cross)
+        x_start, y_start = x_end, y_end
+    return inside
+
+
+class EventSpatialIndex:
+    """
+    Uniformt rutenett med postlister per (celle, event-type), sortert på spiller
+
+    Args:
+        events_df (pd.DataFrame): DataFrame med events (trenger 'location', 'type', 'player')
+        cell_size (float): Cellestørrelse i meter (StatsBomb-enheter)
+    """
+
+    def __init__(self, events_df, cell_size=5.0):
+        self.cell_size = float(cell_size)
+        self.n_x = int(np.ceil(PITCH_LENGTH / self.cell_size))
+        self.n_y = int(np.ceil(PITCH_WIDTH / self.cell_size))
+
+        xy = location_array(events_df['location'])
+        keep = ~np.isnan(xy).any(axis=1) & events_df['player'].notna().to_numpy()
+        xy = clip_to_pitch(xy[keep])
+        events = events_df[keep]
+
+        player_codes, self.players = pd.factorize(events['player'])
+        type_codes, self.types = pd.factorize(events['type'])
+        self._type_lookup = {event_type: code for code, event_type in enumerate(self.types)}
+
+        cells = self._cell_of(xy)
+        order = np.lexsort((player_codes, type_codes, cells))
+
+        # Postlister lagret sammenhengende (CSR): én peker per (celle, type)
+        self.xy = xy[order]
+        self.player_codes = player_codes[order]
+        self.type_codes = type_codes[order]
+        self.event_ids = (events['id'] if 'id' in events.columns else events.index.to_series()).to_numpy()[order]
+        keys = cells[order].astype(np.int64) * len(self.types) + self.type_codes
+        self._pointers = np.concatenate(
+            ([0], np.cumsum(np.bincount(keys, minlength=self.n_x * self.n_y * len(self.types)))))
+
+    def __len__(self):
+        return len(self.event_ids)
+
+    def _cell_of(self, xy):
+        x_bin = np.minimum((xy[:, 0] // self.cell_size).astype(np.int64), self.n_x - 1)
+        y_bin = np.minimum((xy[:, 1] // self.cell_size).astype(np.int64), self.n_y - 1)
+        return x_bin * self.n_y + y_bin
+
+    def _type_codes_for(self, event_types):
+        if event_types is None:
+            return np.arange(len(self.types))
+        if isinstance(event_types, str):
+            event_types = [event_types]
+        return np.array([self._type_lookup[t] for t in event_types if t in self._type_lookup], dtype=np.int64)
+
+    def _postings(self, cells, type_codes):
+        """Indekser (i den sorterte rekkefølgen) for alle events i gitte celler og typer"""
+        keys = (cells[:, None] * len(self.types) + type_codes[None, :]).ravel()
+        return _concat_ranges(self._pointers[keys], self._pointers[keys + 1])
+
+    def _cell_bounds(self, cells):
+        x0 = (cells // self.n_y) * self.cell_size
+        y0 = (cells % self.n_y) * self.cell_size
+        return x0, np.minimum(x0 + self.cell_size, PITCH_LENGTH), y0, np.minimum(y0 + self.cell_size, PITCH_WIDTH)
+
+    def _candidate_cells(self, x_min, x_max, y_min, y_max):
+        """Alle celler som overlapper et rektangel"""
+        i0, i1 = int(max(x_min, 0) // self.cell_size), int(min(x_max, PITCH_LENGTH) // self.cell_size)
+        j0, j1 = int(max(y_min, 0) // self.cell_size), int(min(y_max, PITCH_WIDTH) // self.cell_size)
+        i = np.arange(i0, min(i1, self.n_x - 1) + 1)
+        j = np.arange(j0, min(j1, self.n_y - 1) + 1)
+        return (i[:, None] * self.n_y + j[None, :]).ravel()
+
+    def _count(self, positions, by_type):
+        """Tell events per spiller (eventuelt per type) for gitte posisjoner"""
+        if by_type:
+            counts = pd.crosstab(pd.Categorical.from_codes(self.player_codes[positions], self.players),
+                                 pd.Categorical.from_codes(self.type_codes[positions], self.types))
+            counts.index.name, counts.columns.name = 'player', None
+            return counts.loc[counts.sum(axis=1).sort_values(ascending=False).index]
+
+        counts = np.bincount(self.player_codes[positions], minlength=len(self.players))
+        hits = np.flatnonzero(counts)
+        result = pd.DataFrame({'player': self.players[hits], 'count': counts[hits]})
+        return result.sort_values('count', ascending=False, ignore_index=True)
+
+    def rectangle_positions(self, x_min, x_max, y_min, y_max, event_types=None):
+        """Posisjoner (i indeksens rekkefølge) for events innenfor et rektangel"""
+        type_codes = self._type_codes_for(event_types)
+        cells = self._candidate_cells(x_min, x_max, y_min, y_max)
+        cx0, cx1, cy0, cy1 = self._cell_bounds(cells)
+        interior = (cx0 >= x_min) & (cx1 <= x_max) & (cy0 >= y_min) & (cy1 <= y_max)
+
+        inner = self._postings(cells[interior], type_codes)
+        edge = self._postings(cells[~interior], type_codes)
+        edge_xy = self.xy[edge]
+        edge = edge[(edge_xy[:, 0] >= x_min) & (edge_xy[:, 0] <= x_max) &
+                    (edge_xy[:, 1] >= y_min) & (edge_xy[:, 1] <= y_max)]
+        return np.concatenate((inner, edge))
+
+    def polygon_positions(self, polygon, event_types=None):
+        """Posisjoner (i indeksens rekkefølge) for events innenfor et polygon"""
+        polygon = np.asarray(polygon, dtype=float)
+        type_codes = self._type_codes_for(event_types)
+        cells = self._candidate_cells(polygon[:, 0].min(), polygon[:, 0].max(),
+                                      polygon[:, 1].min(), polygon[:, 1].max())
+        cx0, cx1, cy0, cy1 = self._cell_bounds(cells)
+
+        # En celle er helt inne hvis alle hjørner er inne og ingen kant av polygonet berører den
+        corners = np.stack([np.column_stack(c) for c in ((cx0, cy0), (cx0, cy1), (cx1, cy0), (cx1, cy1))])
+        corners_inside = _points_in_polygon(corners.reshape(-1, 2), polygon).reshape(4, -1).all(axis=0)
+        edge_start, edge_end = polygon, np.roll(polygon, -1, axis=0)
+        ex0, ex1 = np.minimum(edge_start[:, 0], edge_end[:, 0]), np.maximum(edge_start[:, 0], edge_end[:, 0])
+        ey0, ey1 = np.minimum(edge_start[:, 1], edge_end[:, 1]), np.maximum(edge_start[:, 1], edge_end[:, 1])
+        touched = ((ex0[None, :] <= cx1[:, None]) & (ex1[None, :] >= cx0[:, None]) &
+                   (ey0[None, :] <= cy1[:, None]) & (ey1[None, :] >= cy0[:, None])).any(axis=1)
+        interior = corners_inside & ~touched
+
+        inner = self._postings(cells[interior], type_codes)
+        edge = self._postings(cells[~interior], type_codes)
+        edge = edge[_points_in_polygon(self.xy[edge], polygon)]
+        return np.concatenate((inner, edge))
+
+    def query_rectangle(self, x_min, x_max, y_min, y_max, event_types=None, by_type=False):
+        """
+        Tell events per spiller innenfor et rektangel
+
+        Args:
+            x_min, x_max, y_min, y_max (float): Rektangelet i StatsBomb-koordinater
+            event_types (str or list): Event-type(r) å telle, f.eks. 'Ball Receipt*'. None = alle
+            by_type (bool): Returner én kolonne per event-type i stedet for totalt antall
+
+        Returns:
+            pd.DataFrame: Spillere sortert etter antall events i sonen
+        """
+        return self._count(self.rectangle_positions(x_min, x_max, y_min, y_max, event_types), by_type)
+
+    def query_zone(self, zone, event_types=None, by_type=False):
+        """Tell events per spiller i en navngitt sone fra ZONES"""
+        if zone not in ZONES:
+            raise ValueError(f"Ukjent sone: '{zone}'")
+        return self.query_rectangle(*ZONES[zone], event_types=event_types, by_type=by_type)
+
+    def query_polygon(self, polygon, event_types=None, by_type=False):
+        """
+        Tell events per spiller innenfor et polygon
+
+        Args:
+            polygon (list): Hjørnepunkter [(x, y), ...] i StatsBomb-koordinater
+            event_types (str or list): Event-type(r) å telle. None = alle
+            by_type (bool): Returner én kolonne per event-type i stedet for totalt antall
+
+        Returns:
+            pd.DataFrame: Spillere sortert etter antall events i sonen
+        """
+        return self._count(self.polygon_positions(polygon, event_types), by_type)
+
+    def event_ids_in_rectangle(self, x_min, x_max, y_min, y_max, event_types=None):
+        """Event-id-er for alle events innenfor et rektangel"""
+        return self.event_ids[self.rectangle_positions(x_min, x_max, y_min, y_max, event_types)]
+
+
+if __name__ == "__main__":
+    import sys
+
+    filename = sys.argv[1] if len(sys.argv) > 1 else 'data/sample_match_events.csv'
+    index = EventSpatialIndex(pd.read_csv(filename))
+    print(f"Indekserte {len(index):,} events i {index.n_x}x{index.n_y} celler")
+
+    print("\nMottak i venstre halvrom, siste tredjedel:")
+    print(index.query_zone('left_half_space_final_third', event_types='Ball Receipt*').head())
+
+    print("\nPress i siste tredjedel:")
+    print(index.query_zone('final_third', event_types='Pressure').head())